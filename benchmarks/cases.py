@@ -0,0 +1,253 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_candles
+
+SIZES = {"1": 1, "1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+class Case:
+    """
+    One benchmark: setup(n) builds the inputs (not timed), run(ctx) is
+    timed, and `units(n)` is what throughput is reported in (bars, bar x
+    config, ticks...). Sizes beyond what a case can do in reasonable time
+    are simply not listed for it.
+    """
+
+    def __init__(self, name, setup, run, sizes=("10k", "100k", "1m"), units=None, unit="bars", repeat=3):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.sizes = sizes
+        self.units = units or (lambda n: n)
+        self.unit = unit
+        self.repeat = repeat
+
+
+def _candles(n):
+    return synthetic_candles(n)
+
+
+# ---------------------------
+# BACKTEST
+# ---------------------------
+def _backtest(make_strategy):
+    def run(candles):
+        from borgbot.backtest.engine import BacktestEngine
+
+        return BacktestEngine(make_strategy()).run(candles)
+    return run
+
+
+def _sma():
+    from borgbot.strategies.sma import SMAStrategy
+
+    return SMAStrategy({"fast": 9, "slow": 21})
+
+
+def _rsi():
+    from borgbot.strategies.rsi import RSIStrategy
+
+    return RSIStrategy({"period": 14})
+
+
+def _stack():
+    from borgbot.strategies.stack import StrategyStack
+
+    return StrategyStack([(_sma(), 0.5), (_rsi(), 0.5)])
+
+
+def _cached(n):
+    from borgbot.data.indicator_cache import build_indicator_cache
+
+    return build_indicator_cache(_candles(n))
+
+
+# ---------------------------
+# INDICATORS
+# ---------------------------
+def _indicator_cache(candles):
+    from borgbot.data.indicator_cache import build_indicator_cache
+
+    return build_indicator_cache(candles)
+
+
+def _trailing_sma(candles):
+    from borgbot.indicators.sma import trailing_sma
+
+    return trailing_sma(candles["close"].to_numpy(), 50)
+
+
+def _rsi_indicator(candles):
+    from borgbot.indicators.rsi import rsi
+
+    return rsi(candles["close"], 14)
+
+
+def _atr_indicator(candles):
+    from borgbot.indicators.atr import atr
+
+    return atr(candles["high"], candles["low"], candles["close"], 14)
+
+
+# ---------------------------
+# RESEARCH
+# ---------------------------
+SWEEP_FAST, SWEEP_SLOW = "5:9", "20:24"
+
+
+def _sweep_combos():
+    from borgbot.research.grid import generate_sma_grid
+
+    return generate_sma_grid(SWEEP_FAST, SWEEP_SLOW)
+
+
+def _sweep(candles):
+    from borgbot.research.optimizer import run_single
+
+    return [run_single(combo, candles) for combo in _sweep_combos()]
+
+
+EXPR_ENTRY = "cross(sma(close, fast), sma(close, slow)) & (rsi(close, p) < 45)"
+EXPR_EXIT = "crossunder(sma(close, fast), sma(close, slow))"
+
+
+def _expr_configs():
+    return [
+        {"type": "expr", "entry": EXPR_ENTRY, "exit": EXPR_EXIT, "fast": fast, "slow": slow, "p": p}
+        for fast in (5, 9, 13) for slow in (20, 30, 40) for p in (10, 14)
+    ]
+
+
+def _expr_sweep(candles):
+    from borgbot.strategies.expr import CACHE, ExprStrategy
+    from borgbot.strategies.stack import signal_matrix
+
+    CACHE.clear()  # every repeat pays for the shared indicators once
+    return signal_matrix([ExprStrategy(cfg) for cfg in _expr_configs()], candles)
+
+
+SWEEP_TRAILING, SWEEP_FEES, SWEEP_SLIPPAGE = (0.01, 0.02, 0.05, 0.1), (0.0, 5.0, 10.0), (0.0, 0.0005, 0.001)
+
+
+def _exec_setup(n):
+    from borgbot.strategies.base import WARMUP_BARS, signal_series
+
+    candles = _candles(n)
+    return np.asarray(candles["close"], dtype=np.float64), signal_series(_sma(), candles, WARMUP_BARS)
+
+
+def _exec_sweep(ctx):
+    from borgbot.backtest.sweep import sweep_execution
+
+    return sweep_execution(*ctx, SWEEP_TRAILING, SWEEP_FEES, SWEEP_SLIPPAGE)
+
+
+def _walkforward(candles):
+    from borgbot.research.walkforward_core import run_walkforward
+
+    return run_walkforward({"type": "sma", "fast": 9, "slow": 21}, candles, train_months=1, test_months=1)
+
+
+MC_SIMS = 10_000
+
+
+def _trade_ledger(n):
+    return np.random.default_rng(0).normal(0.001, 0.02, n)
+
+
+def _monte_carlo(returns):
+    from borgbot.research.robustness import confidence
+
+    return confidence(returns, sims=MC_SIMS, method="block", seed=0)
+
+
+# ---------------------------
+# LIVE TICK
+# ---------------------------
+class _QuietLogger:
+    def info(self, *args, **kw):
+        pass
+
+    warning = error = info
+
+
+def _live_setup(n):
+    from borgbot.core.engine import TradingEngine
+    from borgbot.data.candles import CandleArray
+    from borgbot.execution.paper import PaperExecutionAdapter
+    from borgbot.risk.fixed_fraction import FixedFractionSizing
+    from borgbot.state.store import StateStore, connect
+    from borgbot.strategies.stack import StrategyStack
+
+    tmp = tempfile.mkdtemp(prefix="borg-bench-")
+    state = StateStore(connect(os.path.join(tmp, "bench.db"), bot="bench"), bot="bench")
+    state.set_position(0.0, 1000.0, 0.0)
+    state.set_starting_cash(1000.0)
+    state.flush()
+
+    engine = TradingEngine(
+        StrategyStack([(_sma(), 1.0)]),
+        FixedFractionSizing({"max_position_frac": 0.1}),
+        PaperExecutionAdapter(state, _QuietLogger(), fees_bps=10.0, slippage_pct=0.0005),
+    )
+    c = _candles(n + 200)
+    rows = np.column_stack([
+        c["timestamp"].to_numpy().astype("datetime64[ms]").astype(np.int64),
+        c[["open", "high", "low", "close", "volume"]].to_numpy(),
+    ]).tolist()
+    return {"engine": engine, "state": state, "rows": rows, "buffer": CandleArray().merge_rows(rows[:200]), "n": n}
+
+
+def _live_ticks(ctx):
+    """What paper_runner does per new candle: buffer, signal, sizing, fill, one commit."""
+    from borgbot.core.context import MarketContext
+
+    engine, state, buffer = ctx["engine"], ctx["state"], ctx["buffer"]
+    for row in ctx["rows"][200: 200 + ctx["n"]]:
+        buffer.merge_rows([row], max_len=1000)
+        price = row[4]
+        state.mark_price(price, int(row[0]))
+        engine.on_new_candle(MarketContext(buffer), state.equity(price), price)
+        state.set_last_candle_ts(int(row[0]))
+        state.flush()
+
+
+# ---------------------------
+# STARTUP
+# ---------------------------
+def _cli_help(_):
+    src = os.path.join(os.path.dirname(__file__), "..", "src")
+    env = {**os.environ, "PYTHONPATH": src}
+    subprocess.run([sys.executable, "-m", "borgbot.backtest.run", "--help"], env=env, capture_output=True, check=True)
+
+
+CASES = [
+    Case("backtest_sma", _candles, _backtest(_sma)),
+    Case("backtest_rsi", _cached, _backtest(_rsi)),
+    Case("backtest_stack", _cached, _backtest(_stack)),
+    Case("indicator_cache", _candles, _indicator_cache),
+    Case("trailing_sma", _candles, _trailing_sma),
+    Case("rsi", _candles, _rsi_indicator),
+    Case("atr", _candles, _atr_indicator),
+    Case(
+        "optimizer_sweep", _candles, _sweep, sizes=("10k", "100k"),
+        units=lambda n: n * len(_sweep_combos()), unit="bar-configs", repeat=1,
+    ),
+    Case("expr_sweep", _candles, _expr_sweep, units=lambda n: n * len(_expr_configs()), unit="bar-configs"),
+    Case(
+        "exec_sweep", _exec_setup, _exec_sweep,
+        units=lambda n: n * len(SWEEP_TRAILING) * len(SWEEP_FEES) * len(SWEEP_SLIPPAGE), unit="bar-settings",
+    ),
+    Case(
+        "monte_carlo", _trade_ledger, _monte_carlo, sizes=("1k", "10k"),
+        units=lambda n: n * MC_SIMS, unit="trade-sims", repeat=1,
+    ),
+    Case("walkforward", _candles, _walkforward, sizes=("100k", "1m"), repeat=1),
+    Case("live_tick", _live_setup, _live_ticks, sizes=("1k",), unit="ticks", repeat=1),
+    Case("cli_help", lambda n: None, _cli_help, sizes=("1",), unit="runs"),
+]
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from benchmarks.cases import CASES, SIZES
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+# fail when throughput drops more than this fraction below the baseline
+THRESHOLD = float(os.environ.get("BENCH_THRESHOLD", "0.25"))
+
+
+def measure(case, size):
+    n = SIZES[size]
+    ctx = case.setup(n)
+    best = float("inf")
+    for _ in range(case.repeat):
+        t0 = time.perf_counter()
+        case.run(ctx)
+        best = min(best, time.perf_counter() - t0)
+    return best, case.units(n) / best
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get("cases", {})
+
+
+def save_baselines(path, results):
+    cases = load_baselines(path)
+    cases.update(results)
+    with open(path, "w") as f:
+        json.dump(
+            {"machine": f"{platform.machine()} {platform.python_version()}", "cases": dict(sorted(cases.items()))},
+            f, indent=2,
+        )
+        f.write("\n")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Throughput benchmarks with baseline regression check")
+    parser.add_argument("--cases", help="comma separated case names (default: all)")
+    parser.add_argument("--sizes", default="1,1k,10k,100k", help="comma separated from " + ",".join(SIZES))
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--update", action="store_true", help="store these results as the new baselines")
+
+    args = parser.parse_args()
+
+    wanted = set(args.cases.split(",")) if args.cases else None
+    sizes = args.sizes.split(",")
+    baselines = load_baselines(args.baselines)
+
+    results, regressions = {}, []
+
+    print(f"{'case':18} {'size':>5} {'seconds':>9} {'per second':>12} {'unit':11} {'baseline':>12} {'change':>8}")
+
+    for case in CASES:
+        if wanted and case.name not in wanted:
+            continue
+        for size in case.sizes:
+            if size not in sizes:
+                continue
+            seconds, rate = measure(case, size)
+            key = f"{case.name}@{size}"
+            results[key] = {"seconds": round(seconds, 6), "per_s": round(rate, 3), "unit": case.unit}
+
+            base = baselines.get(key, {}).get("per_s")
+            change = f"{(rate / base - 1) * 100:+.1f}%" if base else "new"
+            print(
+                f"{case.name:18} {size:>5} {seconds:>9.4f} {rate:>12.0f} {case.unit:11} "
+                f"{base or 0:>12.0f} {change:>8}"
+            )
+            if base and rate < base * (1 - args.threshold):
+                regressions.append(key)
+
+    if args.update:
+        save_baselines(args.baselines, results)
+        print(f"\nBaselines updated: {args.baselines}")
+        return
+
+    if regressions:
+        print(f"\nREGRESSION (>{args.threshold:.0%} slower than baseline): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
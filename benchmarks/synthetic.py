@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+START = "2022-01-01"
+
+
+def synthetic_candles(n: int, seed: int = 0, freq: str = "min", start: str = START):
+    """
+    Deterministic random-walk OHLCV candles (same n + seed -> same bytes).
+
+    Prices drift slowly with regime changes so SMA/RSI strategies actually
+    trade; high/low bracket open/close like real bars.
+    """
+    rng = np.random.default_rng(seed)
+    regime = np.repeat(rng.normal(0, 0.0004, n // 5000 + 1), 5000)[:n]
+    returns = rng.normal(0, 0.002, n) + regime
+    close = 20_000 * np.exp(np.cumsum(returns))
+    open_ = np.r_[close[0], close[:-1]]
+    wick = np.abs(rng.normal(0, 0.001, n))
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq=freq),
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + wick),
+        "low": np.minimum(open_, close) * (1 - wick),
+        "close": close,
+        "volume": rng.gamma(2.0, 5.0, n),
+    })
@@ -19,18 +19,26 @@ for s in borg-btc-1m borg-btc-1h borg-eth-1m borg-eth-1h; do
 done
 echo
 
-echo "== DB trades summary =="
-for db in /opt/borg/state/*usdt_*.db; do
-  name="$(basename "$db")"
-  out="$(docker run --rm -v /opt/borg/state:/state alpine:3 sh -lc \
-    "apk add --no-cache sqlite >/dev/null 2>&1; \
-     sqlite3 -readonly /state/$name \"select count(*), max(ts) from trades;\" 2>/dev/null || true" \
-  2>/dev/null || true)"
-  cnt="${out%%|*}"; ts_ms="${out##*|}"
-  if [[ -n "${ts_ms:-}" && "$ts_ms" != " " ]]; then
-    ts_iso="$(date -u -d "@$(( ${ts_ms%%.*} / 1000 ))" +'%Y-%m-%dT%H:%M:%SZ' 2>/dev/null || echo '?')"
-  else
-    ts_iso="?"
-  fi
-  printf "%-16s trades=%-6s last_ts=%s\n" "$name" "${cnt:-0}" "$ts_iso"
+echo "== Tick latency (last metrics.stats, ms) =="
+for f in /opt/borg/logs/*usdt_*.jsonl; do
+  [ -f "$f" ] || continue
+  line="$(tac "$f" 2>/dev/null | grep -m1 '"event": "metrics.stats"' || true)"
+  printf "%-20s " "$(basename "$f" .jsonl)"
+  if [ -z "$line" ]; then echo "n/a"; continue; fi
+  python3 -c '
+import json, sys
+e = json.loads(sys.argv[1])
+t = e.get("stages", {}).get("tick", {})
+c = e.get("counters", {})
+skipped = sum(v for k, v in c.items() if k.startswith("orders_skipped"))
+print("tick p50=%s p99=%s n=%s 429s=%s skipped=%s at %s" % (
+    t.get("p50_ms", "n/a"), t.get("p99_ms", "n/a"), t.get("n", 0),
+    c.get("rate_limited", 0), skipped, e.get("timestamp", "?")))
+' "$line"
 done
+echo
+
+echo "== DB trades summary =="
+# one container, one indexed query over the shared state db
+docker run --rm -v /opt/borg/state:/app/state borg-bot:local \
+  python -m borgbot.state.report --db /app/state/borg.db 2>/dev/null || echo "state db unavailable"
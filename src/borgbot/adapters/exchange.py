@@ -1,10 +1,10 @@
 from typing import List, Tuple, Optional
-import ccxt
-TIMEFRAME_MAP = {"1m":"1m","3m":"3m","5m":"5m","15m":"15m","30m":"30m","1h":"1h"}
+TIMEFRAME_MAP = {"1m":"1m","3m":"3m","5m":"5m","15m":"15m","30m":"30m","1h":"1h","2h":"2h","4h":"4h","6h":"6h","12h":"12h","1d":"1d"}
 class ExchangeAdapter:
     def __init__(self, name: str):
         name = name.lower()
         if name != "kucoin": raise ValueError("Only 'kucoin' supported in MVP")
+        import ccxt  # slow to import; only pay for it once an adapter is built
         self.ex = ccxt.kucoin({
             "enableRateLimit": True,
             "options": {"adjustForTimeDifference": True},
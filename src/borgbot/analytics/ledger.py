@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+from borgbot.state.store import get_snapshots
+
+DEFAULT_STARTING_CASH = 1000.0
+
+CHECKPOINT_DDL = """
+CREATE TABLE IF NOT EXISTS ledger_checkpoints (
+    bot TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL,
+    last_ts INTEGER,
+    last_price REAL,
+    cash REAL NOT NULL,
+    base_qty REAL NOT NULL,
+    trades INTEGER NOT NULL,
+    buys INTEGER NOT NULL,
+    sells INTEGER NOT NULL,
+    round_trips INTEGER NOT NULL,
+    fees REAL NOT NULL,
+    volume REAL NOT NULL,
+    pnl_min REAL,
+    pnl_max REAL,
+    pnl_sum REAL NOT NULL
+)
+"""
+CHECKPOINT_COLUMNS = (
+    "bot", "last_id", "last_ts", "last_price", "cash", "base_qty", "trades", "buys", "sells",
+    "round_trips", "fees", "volume", "pnl_min", "pnl_max", "pnl_sum",
+)
+
+
+def _empty_checkpoint(bot, starting_cash):
+    return {
+        "bot": bot, "last_id": 0, "last_ts": None, "last_price": None,
+        "cash": starting_cash, "base_qty": 0.0, "trades": 0, "buys": 0, "sells": 0,
+        "round_trips": 0, "fees": 0.0, "volume": 0.0, "pnl_min": None, "pnl_max": None, "pnl_sum": 0.0,
+    }
+
+
+def load_checkpoints(conn):
+    conn.execute(CHECKPOINT_DDL)
+    cur = conn.execute(f"SELECT {', '.join(CHECKPOINT_COLUMNS)} FROM ledger_checkpoints")
+    return {r[0]: dict(zip(CHECKPOINT_COLUMNS, r)) for r in cur.fetchall()}
+
+
+def save_checkpoints(conn, checkpoints):
+    cols = ", ".join(CHECKPOINT_COLUMNS)
+    marks = ",".join("?" * len(CHECKPOINT_COLUMNS))
+    conn.executemany(
+        f"INSERT OR REPLACE INTO ledger_checkpoints({cols}) VALUES ({marks})",
+        [tuple(cp[c] for c in CHECKPOINT_COLUMNS) for cp in checkpoints],
+    )
+
+
+# column order of the arrays returned by load_new_trades
+TRADE_FIELDS = ("id", "ts", "buy", "qty", "price", "fee", "base_after")
+
+
+def load_new_trades(conn, bot, after_id=0):
+    """
+    (n, 7) float array of a bot's trades after `after_id`, in fill (id) order.
+
+    idx_trades_bot_id seeks straight to the first trade past the checkpoint,
+    so an incremental report reads only the new trades.
+    """
+    rows = conn.execute(
+        "SELECT id, ts, side='buy', qty, price, fee, base_after FROM trades "
+        "WHERE bot=? AND id>? ORDER BY id",
+        (bot, after_id),
+    ).fetchall()
+    return np.array(rows, dtype=float).reshape(-1, len(TRADE_FIELDS))
+
+
+def replay(trades, cash0, base0, starting_cash):
+    """
+    Vectorized ledger replay (same arithmetic as scripts/pnl.sh).
+
+    Returns cash, base and PnL after every fill, with equity marked at the fill price.
+    """
+    _, _, buy, qty, price, fee, _ = trades.T
+    buy = buy > 0
+
+    notional = qty * price
+    cash = cash0 + np.cumsum(np.where(buy, -(notional + fee), notional - fee))
+    base = base0 + np.cumsum(np.where(buy, qty, -qty))
+    pnl = cash + base * price - starting_cash
+
+    return cash, base, pnl
+
+
+def fold(checkpoint, trades, starting_cash):
+    """Advance one bot's checkpoint over its new trades."""
+    if len(trades) == 0:
+        return checkpoint
+
+    cash, base, pnl = replay(trades, checkpoint["cash"], checkpoint["base_qty"], starting_cash)
+    ids, ts, buy, qty, price, fee, base_after = trades.T
+    buy = buy > 0
+    sell = ~buy
+    closed = sell & (base_after <= 1e-12)
+
+    cp = dict(checkpoint)
+    cp.update(
+        last_id=int(ids[-1]),
+        last_ts=int(ts[-1]),
+        last_price=float(price[-1]),
+        cash=float(cash[-1]),
+        base_qty=float(base[-1]),
+        trades=cp["trades"] + len(trades),
+        buys=cp["buys"] + int(buy.sum()),
+        sells=cp["sells"] + int(sell.sum()),
+        round_trips=cp["round_trips"] + int(closed.sum()),
+        fees=cp["fees"] + float(fee.sum()),
+        volume=cp["volume"] + float((qty * price).sum()),
+        pnl_min=float(pnl.min()) if cp["pnl_min"] is None else min(cp["pnl_min"], float(pnl.min())),
+        pnl_max=float(pnl.max()) if cp["pnl_max"] is None else max(cp["pnl_max"], float(pnl.max())),
+        pnl_sum=cp["pnl_sum"] + float(pnl.sum()),
+    )
+    return cp
+
+
+def ledger_report(conn, prices=None, checkpoints_conn=None):
+    """
+    Per-bot equity, PnL and trade stats (DataFrame, one row per bot) from the trades table.
+
+    With `checkpoints_conn` (a separate db; `conn` is only read), only
+    trades after each bot's stored checkpoint are read and the checkpoints
+    are advanced afterwards; without it every trade is replayed. Equity is
+    marked at `prices[bot]`, else the bot's latest snapshot price, else its
+    last fill. PnL min/max/avg are over the equity after every fill.
+    """
+    prices = prices or {}
+    checkpoints = load_checkpoints(checkpoints_conn) if checkpoints_conn is not None else {}
+    last_ids = dict(conn.execute("SELECT bot, MAX(id) FROM trades GROUP BY bot").fetchall())
+    snapshots = {s["bot"]: s for s in get_snapshots(conn)}
+    starting = dict(conn.execute("SELECT bot, starting_cash FROM positions").fetchall())
+    traded = [r[0] for r in conn.execute("SELECT DISTINCT bot FROM trades")]
+
+    bots = sorted(set(checkpoints) | set(snapshots) | set(starting) | set(traded))
+
+    rows, updated = [], []
+
+    for bot in bots:
+        sc = starting.get(bot) or DEFAULT_STARTING_CASH
+        cp = checkpoints.get(bot)
+        if cp is None or cp["last_id"] > (last_ids.get(bot) or 0):
+            # first run, or a checkpoint from some other db: replay from the start
+            cp = _empty_checkpoint(bot, sc)
+        new = load_new_trades(conn, bot, cp["last_id"])
+        if len(new):
+            cp = fold(cp, new, sc)
+            updated.append(cp)
+
+        snap = snapshots.get(bot) or {}
+        price = prices.get(bot) or snap.get("price") or cp["last_price"] or 0.0
+        equity = cp["cash"] + cp["base_qty"] * price
+        pnl = equity - sc
+
+        rows.append({
+            "bot": bot,
+            "price": price,
+            "cash": cp["cash"],
+            "base": cp["base_qty"],
+            "equity": equity,
+            "pnl": pnl,
+            "roi_pct": pnl / sc * 100 if sc else 0.0,
+            "trades": cp["trades"],
+            "buys": cp["buys"],
+            "sells": cp["sells"],
+            "round_trips": cp["round_trips"],
+            "fees": cp["fees"],
+            "volume": cp["volume"],
+            "pnl_min": cp["pnl_min"],
+            "pnl_max": cp["pnl_max"],
+            "pnl_avg": cp["pnl_sum"] / cp["trades"] if cp["trades"] else None,
+            "last_ts": cp["last_ts"],
+        })
+
+    if checkpoints_conn is not None and updated:
+        checkpoints_conn.execute("BEGIN IMMEDIATE")
+        try:
+            save_checkpoints(checkpoints_conn, updated)
+            checkpoints_conn.execute("COMMIT")
+        except Exception:
+            checkpoints_conn.execute("ROLLBACK")
+            raise
+
+    return pd.DataFrame(rows)
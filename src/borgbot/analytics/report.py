@@ -0,0 +1,72 @@
+import argparse
+import datetime
+import os
+import sqlite3
+
+from borgbot.state.store import DB_PATH, connect_readonly
+
+CSV_HEADER = "timestamp,service,price,cash,base,equity,pnl,roi"
+
+
+def _fmt(v, spec):
+    return format(v, spec) if v is not None else "n/a"
+
+
+def print_report(df):
+
+    print(
+        f"{'service':12} | {'price':>10} {'cash':>10} {'base':>12} {'equity':>10} {'pnl':>9} {'roi%':>7} | "
+        f"{'n':>6} {'buys':>5} {'sells':>5} {'fees':>8} {'min_pnl':>9} {'max_pnl':>9} {'avg_pnl':>9}"
+    )
+
+    for r in df.itertuples(index=False):
+        print(
+            f"{r.bot:12} | {r.price:10.2f} {r.cash:10.2f} {r.base:12.8f} {r.equity:10.2f} {r.pnl:9.2f} {r.roi_pct:7.2f} | "
+            f"{r.trades:6d} {r.buys:5d} {r.sells:5d} {r.fees:8.2f} "
+            f"{_fmt(r.pnl_min, '.2f'):>9} {_fmt(r.pnl_max, '.2f'):>9} {_fmt(r.pnl_avg, '.2f'):>9}"
+        )
+
+
+def append_csv(df, path):
+    """Same rows scripts/pnl_csv.sh used to append."""
+    ts = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    new_file = not os.path.exists(path)
+
+    with open(path, "a") as f:
+        if new_file:
+            f.write(CSV_HEADER + "\n")
+        for r in df.itertuples(index=False):
+            f.write(
+                f"{ts},{r.bot},{r.price:.2f},{r.cash:.2f},{r.base:.8f},"
+                f"{r.equity:.2f},{r.pnl:.2f},{r.roi_pct:.2f}\n"
+            )
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="PnL / ledger report straight from the state db")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--csv", help="also append one row per bot to this csv")
+    parser.add_argument(
+        "--checkpoints",
+        default=os.environ.get("LEDGER_CHECKPOINTS"),
+        help="sqlite file of per-bot ledger checkpoints, so later runs only read new trades (never the state db)",
+    )
+
+    args = parser.parse_args()
+
+    from borgbot.analytics.ledger import ledger_report  # numpy / pandas
+
+    conn = connect_readonly(args.db)
+    checkpoints = sqlite3.connect(args.checkpoints, isolation_level=None) if args.checkpoints else None
+    df = ledger_report(conn, checkpoints_conn=checkpoints)
+
+    print(f"timestamp: {datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')}")
+    print_report(df)
+
+    if args.csv:
+        append_csv(df, args.csv)
+
+
+if __name__ == "__main__":
+    main()
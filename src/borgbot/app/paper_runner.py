@@ -1,20 +1,20 @@
-import os, time, traceback, uuid
+import os, time, traceback
 from datetime import datetime
-import pytz
-from pydantic import BaseModel
-from borgbot.infra.logging import configure_logging
-from borgbot.infra.config import load_config
 from borgbot.infra.ids import run_id
+from borgbot.infra.metrics import Metrics, serve_metrics
 from borgbot.adapters.exchange import ExchangeAdapter
-from borgbot.core.strategy import SMAConfig, sma_cross_strategy
-from borgbot.core.risk import RiskState, is_in_window, daily_loss_breached
-from borgbot.state.store import connect, get_last_candle_ts, set_last_candle_ts, get_position, set_position
+from borgbot.core.context import MarketContext
+from borgbot.data.candles import CandleArray
+from borgbot.data.timeframes import TF_MS
+from borgbot.state.store import BOT_ID, adopt_legacy_db, connect, StateStore
 from borgbot.execution.paper import PaperExecutionAdapter
 from borgbot.core.engine import TradingEngine
 from borgbot.risk.fixed_fraction import FixedFractionSizing
 from borgbot.strategies.stack import StrategyStack
 
-TF_MS = {"1m":60000, "3m":180000, "5m":300000, "15m":900000, "30m":1800000, "1h":3600000}
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))  # 0 = no http endpoint
+METRICS_LOG_SECONDS = int(os.environ.get("METRICS_LOG_SECONDS", "60"))
+LIVE_BARS = int(os.environ.get("LIVE_BARS", "1000"))  # history kept for strategies beyond one fetch
 
 def sleep_until_next_close(timeframe: str, grace_s: int = 2):
     tf_ms = TF_MS.get(timeframe, 60000)
@@ -22,26 +22,61 @@ def sleep_until_next_close(timeframe: str, grace_s: int = 2):
     next_close = ((now // tf_ms) + 1) * tf_ms + (grace_s * 1000)
     sleep_s = max(1, (next_close - now) / 1000.0); time.sleep(sleep_s)
 
-def equity_from_state(conn, last_price: float) -> float:
-    base_qty, cash, avg = get_position(conn)
-    return cash + base_qty * last_price
+def equity_from_state(state, last_price: float) -> float:
+    return state.equity(last_price)
 
-def ensure_starting_cash(conn, starting_cash: float, logger):
-    base_qty, cash, _ = get_position(conn)
+def closed_bars(ohlcv, timeframe: str, now_ms: int):
+    # the exchange's last row is usually the candle still forming
+    tf_ms = TF_MS.get(timeframe, 60000)
+    return [r for r in ohlcv if r[0] + tf_ms <= now_ms]
+
+def warm_higher_tf(ex, cfg, logger):
+    """Seed each higher timeframe from native bars, then fold in base bars of the forming ones."""
+    from borgbot.data.mtf import MultiTimeframe  # pandas; only bots with higher_tf need it
+
+    mtf = MultiTimeframe(cfg.higher_tf, base_timeframe=cfg.timeframe)
+    now = int(time.time() * 1000)
+    for tf in mtf.timeframes:
+        mtf.seed(tf, ex.ohlcv(cfg.symbol, tf, limit=mtf.lookback(tf) + 2), now)
+    since = min((f.last_base_ts + 1 for f in mtf.frames.values() if f.last_base_ts is not None), default=None)
+    mtf.update(closed_bars(ex.ohlcv(cfg.symbol, cfg.timeframe, limit=1000, since=since), cfg.timeframe, now))
+    logger.info("mtf.warm", spec=cfg.higher_tf, latest=mtf.latest())
+    return mtf
+
+def ensure_starting_cash(state, starting_cash: float, logger):
+    base_qty, cash, _ = state.get_position()
     if base_qty == 0.0 and cash == 0.0:
-        set_position(conn, 0.0, starting_cash, 0.0)
+        state.set_position(0.0, starting_cash, 0.0)
+        state.set_starting_cash(starting_cash)
+        state.flush()
         logger.info("init.cash", starting_cash=starting_cash)
 
 def main():
+    # pydantic/yaml, structlog and pytz load here, not on import: tools that import this module skip them
+    import pytz
+    from borgbot.infra.logging import configure_logging
+    from borgbot.infra.config import load_config
+    from borgbot.core.risk import RiskState, is_in_window, daily_loss_breached
+
     rid = run_id()
     logger = configure_logging(run_id=rid)
     cfg = load_config()
     logger.info("app.start", settings=cfg.model_dump())
 
+    metrics = Metrics(BOT_ID)
+    if METRICS_PORT:
+        serve_metrics(metrics, METRICS_PORT, host=os.environ.get("METRICS_HOST", "127.0.0.1"))
+    next_stats = time.monotonic() + METRICS_LOG_SECONDS
+
     conn = connect()
-    ensure_starting_cash(conn, cfg.starting_cash, logger)
+    legacy = adopt_legacy_db(conn)
+    if legacy:
+        logger.info("state.merged", path=legacy)
+    state = StateStore(conn)
+    ensure_starting_cash(state, cfg.starting_cash, logger)
     ex = ExchangeAdapter(cfg.exchange)
-    
+    mtf = warm_higher_tf(ex, cfg, logger) if cfg.higher_tf else None
+
     # Temporary simple strategy stub
     class HoldStrategy:
         def generate_signal(self, context):
@@ -54,61 +89,91 @@ def main():
     })
 
     execution = PaperExecutionAdapter(
-    conn,
+    state,
     logger,
     fees_bps=cfg.fees_bps,
     slippage_pct=cfg.slippage_pct,
+    metrics=metrics,
     )
 
-    engine = TradingEngine(strategy_stack, risk_engine, execution)
+    engine = TradingEngine(strategy_stack, risk_engine, execution, metrics=metrics)
 
 
     # risk day-open state (local time)
     tz = pytz.timezone(os.environ.get("TZ", "Europe/Dublin"))
-    last_ts = get_last_candle_ts(conn)
+    last_ts = state.last_candle_ts
+    candles = CandleArray()
     rs = None  # RiskState set after first price
 
     while True:
+        if time.monotonic() >= next_stats:
+            logger.info("metrics.stats", bot=BOT_ID, **metrics.stats())
+            next_stats = time.monotonic() + METRICS_LOG_SECONDS
+
         try:
-            ohlcv = ex.ohlcv(cfg.symbol, cfg.timeframe, limit=max(100, cfg.sma_slow + 10), since=None)
-            ts = [int(r[0]) for r in ohlcv]; closes = [float(r[4]) for r in ohlcv]; latest_ts = ts[-1]
+            tick_t0 = time.perf_counter()
+            with metrics.time("fetch"):
+                ohlcv = ex.ohlcv(cfg.symbol, cfg.timeframe, limit=max(100, cfg.sma_slow + 10), since=None)
+            candles.merge_rows(ohlcv, max_len=LIVE_BARS)
+            latest_ts = int(candles["timestamp"][-1])
 
             if last_ts is None: last_ts = latest_ts - 1
             if latest_ts == last_ts:
                 sleep_until_next_close(cfg.timeframe, grace_s=2)
                 continue
 
-            price = closes[-1]
-            now_local = datetime.now(tz)
+            metrics.inc("candles")
+            price = float(candles["close"][-1])
+            state.mark_price(price, latest_ts)
 
-            # init risk state at first tick of the local day
-            day_ymd = now_local.strftime("%Y-%m-%d")
-            if rs is None or rs.day_ymd != day_ymd:
-                eq = equity_from_state(conn, price)
-                rs = RiskState(day_open_equity=eq, day_ymd=day_ymd)
-                logger.info("risk.day_start", equity_open=eq, day=day_ymd)
+            with metrics.time("risk"):
+                now_local = datetime.now(tz)
 
-            # checks: trading window + daily loss
-            if not is_in_window(now_local, cfg.risk.trading_window):
+                # init risk state at first tick of the local day
+                day_ymd = now_local.strftime("%Y-%m-%d")
+                if rs is None or rs.day_ymd != day_ymd:
+                    eq = equity_from_state(state, price)
+                    rs = RiskState(day_open_equity=eq, day_ymd=day_ymd)
+                    logger.info("risk.day_start", equity_open=eq, day=day_ymd)
+
+                # checks: trading window + daily loss
+                in_window = is_in_window(now_local, cfg.risk.trading_window)
+                eq = equity_from_state(state, price)
+                loss_breached = in_window and daily_loss_breached(eq, rs, cfg.risk.daily_max_loss_pct)
+
+            if not in_window:
+                metrics.inc("risk_paused", reason="outside_window")
                 logger.info("risk.pause_outside_window", now=str(now_local), window=cfg.risk.trading_window)
                 sleep_until_next_close(cfg.timeframe, grace_s=2)
-                set_last_candle_ts(conn, latest_ts); last_ts = latest_ts
+                state.set_last_candle_ts(latest_ts); state.flush(); last_ts = latest_ts
                 continue
 
-            eq = equity_from_state(conn, price)
-            if daily_loss_breached(eq, rs, cfg.risk.daily_max_loss_pct):
+            if loss_breached:
+                metrics.inc("risk_paused", reason="daily_loss")
                 logger.error("risk.halt_daily_loss", equity=eq, day_open=rs.day_open_equity, max_loss_pct=cfg.risk.daily_max_loss_pct)
                 time.sleep(60)  # park; we keep process alive but idle
-                set_last_candle_ts(conn, latest_ts); last_ts = latest_ts
+                state.set_last_candle_ts(latest_ts); state.flush(); last_ts = latest_ts
                 continue
 
-            from borgbot.core.context import MarketContext
-            context = MarketContext(closes)
+            higher_tf = None
+            if mtf is not None:
+                with metrics.time("mtf"):
+                    mtf.update(closed_bars(ohlcv, cfg.timeframe, int(time.time() * 1000)))
+                    higher_tf = mtf.latest()
+            context = MarketContext(candles, higher_tf=higher_tf)
             engine.on_new_candle(context, eq, price)
 
+            # one transaction per candle: fills + position + cursor
+            with metrics.time("persist"):
+                state.set_last_candle_ts(latest_ts); state.flush(); last_ts = latest_ts
+            metrics.observe("tick", time.perf_counter() - tick_t0)
+
         except Exception as e:
             msg = str(e); backoff = 65 if "429" in msg else min(60, cfg.poll_seconds * 2)
+            metrics.inc("rate_limited" if "429" in msg else "loop_errors")
             logger.error("loop.error", error=msg, backoff=backoff, tb=traceback.format_exc())
+            # unflushed fills of the failed candle would be replayed on top of themselves
+            state.discard(); last_ts = state.last_candle_ts
             time.sleep(backoff)
 
 if __name__ == "__main__":
@@ -1,4 +1,10 @@
-import pandas as pd
+import numpy as np
+
+from borgbot.core.risk import local_days, window_mask
+from borgbot.data.mtf import build_higher_tf
+from borgbot.data.timeframes import timestamps_ms
+from borgbot.backtest.segmented import segmented_signals
+from borgbot.strategies.base import WARMUP_BARS, signal_series
 
 
 class BacktestEngine:
@@ -10,33 +16,143 @@ class BacktestEngine:
         fees_bps: float = 10.0,
         slippage_pct: float = 0.0005,
         trailing_pct: float = 0.05,  # 5% trailing stop
+        higher_tf=None,  # extra {timeframe: [indicator, ...]} on top of the strategy's own
+        trading_window=None,  # "HH:MM-HH:MM" local time, as RISK_TRADING_WINDOW in the live bot
+        daily_max_loss_pct=None,  # halt for the rest of the local day below this loss, as live
+        tz="UTC",
     ):
         self.strategy = strategy
+        self.starting_cash = starting_cash
         self.cash = starting_cash
         self.position = 0.0
         self.fees_bps = fees_bps
         self.slippage_pct = slippage_pct
         self.trailing_pct = trailing_pct
+        self.higher_tf = higher_tf
+        self.trading_window = trading_window
+        self.daily_max_loss_pct = daily_max_loss_pct
+        self.tz = tz
 
         self.trades = []
+        self.paused_window = 0
+        self.paused_loss = 0
+
+        # daily loss rule: the local day being traded and its equity floor
+        self.day = None
+        self.floor = None
 
         # Position state
         self.entry_price = None
         self.peak_price = None
 
-    def run(self, candles):
+    def run(self, candles, workers=1):
         if len(candles) == 0:
             raise ValueError("No candles loaded for the requested time range")
 
-        for i in range(50, len(candles)):
-            window = candles.iloc[:i]
-            price = candles.iloc[i]["close"]
+        # bar i's signal only sees candles[:i]; computed up front so
+        # vectorized strategies pay once per run instead of once per bar
+        mtf = build_higher_tf(candles, getattr(self.strategy, "higher_tf", None), self.higher_tf)
+        if workers > 1 and mtf is None:
+            # independent segments in parallel; the state machine below stays sequential
+            signals = segmented_signals(self.strategy, candles, workers, start=WARMUP_BARS)
+        else:
+            signals = signal_series(self.strategy, candles, WARMUP_BARS, mtf)
+        closes = np.asarray(candles["close"], dtype=np.float64)
+
+        active, days = self.risk_masks(candles)
+        return self.run_signals(closes, signals, active, days)
+
+    def risk_masks(self, candles):
+        """
+        The live bot's risk rules over the whole timeline, computed once:
+        a bool array of bars inside the trading window and the local day of
+        every bar (where the daily loss baseline resets). None when unused.
+        """
+        if not self.trading_window and not self.daily_max_loss_pct:
+            return None, None
+        ts = timestamps_ms(candles)
+        active = window_mask(ts, self.trading_window, self.tz) if self.trading_window else None
+        days = local_days(ts, self.tz) if self.daily_max_loss_pct else None
+        return active, days
+
+    def run_chunks(self, chunks):
+        """
+        run() over consecutive CandleArray chunks (loader.iter_candles), for
+        histories that don't fit in memory. Only one chunk plus the
+        strategy's `lookback` bars before it are held at a time: those
+        carried bars give every indicator the history it has in one pass,
+        and position, trailing-stop and risk state simply continue on the
+        engine. Results equal run() on the concatenated candles without
+        an indicator cache.
+        """
+        from borgbot.data.candles import FIELDS, CandleArray
+
+        lookback = getattr(self.strategy, "lookback", None)
+        if lookback is None or getattr(self.strategy, "higher_tf", None) or self.higher_tf:
+            raise ValueError("Chunked backtests need a strategy with a lookback and no higher timeframes")
+
+        tail, offset, results = None, 0, None
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            window = chunk
+            if tail is not None and len(tail):
+                window = CandleArray(
+                    *(np.concatenate([tail[name], chunk[name]]) for name in ("timestamp", *FIELDS)),
+                    dtype=chunk.dtype,
+                )
+            carried = len(window) - len(chunk)
+
+            # bars before WARMUP_BARS of the whole series get no signal, as in run()
+            first = max(0, WARMUP_BARS - offset)
+            signals = signal_series(self.strategy, window, carried + first)[carried:]
+            active, days = self.risk_masks(chunk)
+            results = self.run_signals(np.asarray(chunk["close"], dtype=np.float64), signals, active, days, first)
+
+            tail = window[max(0, len(window) - lookback):].copy()
+            offset += len(chunk)
+
+        if results is None:
+            raise ValueError("No candles loaded for the requested time range")
+        return results
+
+    def run_signals(self, closes, signals, active=None, days=None, first=WARMUP_BARS):
+        """
+        Position / trailing-stop state machine over precomputed signals.
+
+        Bars where `active` is False are skipped entirely, like the live bot
+        outside its trading window. With `days`, equity at the first bar of
+        each day is the baseline; a bar whose equity has lost
+        daily_max_loss_pct of it is skipped too (no entries, exits or stops).
+        Bars before `first` are not traded; state carries over from earlier
+        calls, so consecutive slices of one timeline can be run in turn.
+        """
+        closes = closes.tolist()
+        signals = signals.tolist()
+        active = active.tolist() if active is not None else None
+        days = days.tolist() if days is not None else None
+        max_loss = abs(self.daily_max_loss_pct or 0.0)
+
+        for i in range(first, len(closes)):
+            price = closes[i]
+            signal = signals[i]
+
+            # -------------------
+            # RISK RULES
+            # -------------------
+            if days is not None:
+                if days[i] != self.day:
+                    self.day = days[i]
+                    open_equity = self.cash + self.position * price
+                    self.floor = open_equity * (1 - max_loss) if open_equity > 0 else None
 
-            context = {
-                "candles": window
-            }
+            if active is not None and not active[i]:
+                self.paused_window += 1
+                continue
 
-            signal = self.strategy.generate_signal(context)
+            if self.floor is not None and self.cash + self.position * price <= self.floor:
+                self.paused_loss += 1
+                continue
 
             # -------------------
             # BUY
@@ -102,13 +218,15 @@ class BacktestEngine:
         # -------------------
         # FINAL EQUITY
         # -------------------
-        final_price = candles.iloc[-1]["close"]
+        final_price = closes[-1]
         equity = self.cash + self.position * final_price
 
-        roi = (equity - 1000) / 1000 * 100
+        roi = (equity - self.starting_cash) / self.starting_cash * 100
 
         return {
             "trades": int(len(self.trades)),
             "roi_pct": float(round(roi, 2)),
-            "final_equity": float(round(equity, 2))
-        }
\ No newline at end of file
+            "final_equity": float(round(equity, 2)),
+            "paused_window": self.paused_window,
+            "paused_loss": self.paused_loss,
+        }
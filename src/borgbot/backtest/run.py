@@ -1,8 +1,4 @@
 import argparse
-from borgbot.data.loader import load_data
-from borgbot.backtest.engine import BacktestEngine
-from borgbot.strategies.sma import SMAStrategy
-from borgbot.data.indicator_cache import build_indicator_cache
 
 def main():
 
@@ -12,11 +8,31 @@ def main():
     parser.add_argument("--tf", required=True)
     parser.add_argument("--from_date", required=True)
     parser.add_argument("--to_date", required=True)
+    parser.add_argument("--trading_window", help="only trade inside HH:MM-HH:MM local time, as the live bot")
+    parser.add_argument("--daily_max_loss_pct", type=float, help="halt for the day after this loss, e.g. 0.05")
+    parser.add_argument("--tz", default="UTC", help="timezone of the trading window and risk days")
+    parser.add_argument("--workers", type=int, default=1, help="compute signals as this many parallel segments")
+    parser.add_argument("--stream", action="store_true", help="read the store chunk by chunk instead of into memory")
+    parser.add_argument("--chunk_rows", type=int, help="bars per chunk with --stream (default: base row group)")
+    # sweep mode: any of these evaluates the execution grid on one signal pass
+    parser.add_argument("--sweep_trailing", help="comma separated trailing stop fractions, e.g. 0.02,0.05,0.1")
+    parser.add_argument("--sweep_fees_bps", help="comma separated fees in bps, e.g. 0,5,10")
+    parser.add_argument("--sweep_slippage", help="comma separated slippage fractions, e.g. 0,0.0005")
 
     args = parser.parse_args()
 
+    # heavy imports after argument parsing so --help stays instant
+    from borgbot.data.loader import load_candles
+    from borgbot.backtest.engine import BacktestEngine
+    from borgbot.strategies.sma import SMAStrategy
+    from borgbot.data.indicator_cache import build_indicator_cache
+
+    if args.stream:
+        run_stream(args)
+        return
+
     # load historical candles
-    candles = load_data(
+    candles = load_candles(
         symbol=args.symbol,
         timeframe=args.tf,
         start=args.from_date,
@@ -31,14 +47,82 @@ def main():
         "slow": 21
     })
 
+    if args.sweep_trailing or args.sweep_fees_bps or args.sweep_slippage:
+        run_sweep(args, strategy, candles)
+        return
+
     # run backtest
-    engine = BacktestEngine(strategy=strategy)
+    engine = BacktestEngine(
+        strategy=strategy,
+        trading_window=args.trading_window,
+        daily_max_loss_pct=args.daily_max_loss_pct,
+        tz=args.tz,
+    )
+
+    results = engine.run(candles, workers=args.workers)
+
+    print("Backtest finished")
+    print(results)
+
+
+def run_stream(args):
+    from borgbot.backtest.engine import BacktestEngine
+    from borgbot.data.loader import BASE_ROW_GROUP, iter_candles, store_path
+    from borgbot.strategies.sma import SMAStrategy
+
+    if args.sweep_trailing or args.sweep_fees_bps or args.sweep_slippage:
+        raise SystemExit("--stream runs a single backtest; sweep mode needs the candles in memory")
+    if args.workers > 1:
+        raise SystemExit("--stream computes signals chunk by chunk in this process; drop --workers")
 
-    results = engine.run(candles)
+    # no indicator cache: the strategy computes what it needs on each chunk
+    engine = BacktestEngine(
+        strategy=SMAStrategy({"fast": 9, "slow": 21}),
+        trading_window=args.trading_window,
+        daily_max_loss_pct=args.daily_max_loss_pct,
+        tz=args.tz,
+    )
+    chunks = iter_candles(
+        store_path(args.symbol, args.tf), args.from_date, args.to_date, chunk_rows=args.chunk_rows or BASE_ROW_GROUP,
+    )
+    results = engine.run_chunks(chunks)
 
     print("Backtest finished")
     print(results)
 
 
+def _floats(text, default):
+    return [float(v) for v in text.split(",")] if text else [default]
+
+
+def run_sweep(args, strategy, candles):
+    import numpy as np
+
+    from borgbot.backtest.sweep import sweep_execution
+    from borgbot.backtest.segmented import segmented_signals
+    from borgbot.strategies.base import WARMUP_BARS
+
+    if args.trading_window or args.daily_max_loss_pct:
+        raise SystemExit("Sweep mode does not model --trading_window / --daily_max_loss_pct")
+
+    signals = segmented_signals(strategy, candles, args.workers, start=WARMUP_BARS)
+    closes = np.asarray(candles["close"], dtype=np.float64)
+    results = sweep_execution(
+        closes,
+        signals,
+        trailing=_floats(args.sweep_trailing, 0.05),
+        fees_bps=_floats(args.sweep_fees_bps, 10.0),
+        slippage=_floats(args.sweep_slippage, 0.0),
+    )
+
+    print(f"Execution sweep: {len(results)} settings over one signal pass\n")
+    print(f"{'trailing':>9} {'fees bps':>9} {'slippage':>9} {'trades':>7} {'roi %':>9} {'equity':>10}")
+    for r in sorted(results, key=lambda r: r["roi_pct"], reverse=True):
+        print(
+            f"{r['trailing_pct']:>9.4f} {r['fees_bps']:>9.1f} {r['slippage_pct']:>9.4f} "
+            f"{r['trades']:>7} {r['roi_pct']:>9.2f} {r['final_equity']:>10.2f}"
+        )
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
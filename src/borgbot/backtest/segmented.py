@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+
+from borgbot.strategies.base import WARMUP_BARS, signal_series
+
+# below this many bars per segment, shipping chunks to workers costs more than it saves
+MIN_SEGMENT_BARS = int(os.environ.get("MIN_SEGMENT_BARS", "50000"))
+
+
+def segment_bounds(n, segments, start=WARMUP_BARS):
+    """[(a, b), ...] splitting bars start..n into `segments` contiguous, near-equal ranges."""
+    if n <= start:
+        return []
+    edges = np.linspace(start, n, max(1, segments) + 1).round().astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def _chunk_signals(strategy, candles, start):
+    return signal_series(strategy, candles, start)[start:]
+
+
+def segmented_signals(strategy, candles, workers, segments=None, start=WARMUP_BARS):
+    """
+    signal_series(strategy, candles, start) computed as independent
+    segments in parallel.
+
+    A segment [a, b) is evaluated over candles[a - lookback: b], so every
+    indicator sees the same history it would in one pass; the overlap is
+    the strategy's `lookback` (bars before bar i its signal can depend on).
+    Strategies without one, or that need higher timeframes, run in one
+    pass. Only signals are split: the position / trailing-stop state
+    machine stays sequential in BacktestEngine.run_signals.
+    """
+    n = len(candles)
+    overlap = getattr(strategy, "lookback", None)
+    segments = segments or workers
+    if (
+        overlap is None
+        or getattr(strategy, "higher_tf", None)
+        or workers <= 1
+        or segments <= 1
+        or n - start < 2 * MIN_SEGMENT_BARS
+    ):
+        return signal_series(strategy, candles, start)
+
+    from borgbot.research.pool import worker_executor
+
+    bounds = segment_bounds(n, min(segments, (n - start) // MIN_SEGMENT_BARS), start)
+    out = np.zeros(n)
+    with worker_executor(min(workers, len(bounds))) as executor:
+        futures = []
+        for a, b in bounds:
+            lo = max(0, a - overlap)
+            futures.append(executor.submit(_chunk_signals, strategy, candles.iloc[lo:b], a - lo))
+        for (a, b), future in zip(bounds, futures):
+            out[a:b] = future.result()
+    return out
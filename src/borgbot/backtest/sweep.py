@@ -0,0 +1,90 @@
+import itertools
+
+import numpy as np
+
+from borgbot.strategies.base import WARMUP_BARS
+
+
+def _next_index(mask, n):
+    """out[i] = first k >= i with mask[k], else n (one reverse running minimum)."""
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
+
+def round_trips(closes, signals, trailing_pct):
+    """
+    Entry and exit bars of every position BacktestEngine.run_signals would
+    open, as int arrays; a position still open at the end exits at -1.
+
+    Entries and signal exits depend only on the signals, and a trailing stop
+    only on the closes since entry. So instead of stepping through every bar,
+    this jumps from entry to the next sell signal and looks for a stop hit in
+    between with one vectorized running maximum per trade.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    signals = np.asarray(signals)
+    n = len(closes)
+    next_buy = _next_index(signals > 0, n)
+    next_sell = _next_index(signals < 0, n)
+
+    entries, exits = [], []
+    i = next_buy[WARMUP_BARS] if WARMUP_BARS < n else n
+    while i < n:
+        # a sell signal on bar j wins over a stop on the same bar; either way it fills at closes[j]
+        end = next_sell[i + 1] if i + 1 < n else n
+        window = closes[i: min(end, n - 1) + 1]
+        peak = np.maximum.accumulate(window)
+        hit = np.flatnonzero(window[1:] < peak[1:] * (1 - trailing_pct))
+        j = i + 1 + int(hit[0]) if len(hit) and i + 1 + hit[0] < end else end
+
+        entries.append(i)
+        if j >= n:
+            exits.append(-1)
+            break
+        exits.append(j)
+        i = next_buy[j + 1] if j + 1 < n else n
+
+    return np.asarray(entries, dtype=np.int64), np.asarray(exits, dtype=np.int64)
+
+
+def sweep_execution(closes, signals, trailing=(0.05,), fees_bps=(10.0,), slippage=(0.0,), starting_cash=1000.0):
+    """
+    BacktestEngine results for every (trailing_pct, fees_bps, slippage_pct)
+    combination over one precomputed signal array.
+
+    Fees and slippage never change which trades happen, only what each round
+    trip returns, so the trade path is found once per trailing value and all
+    fee x slippage cells are priced at once as a (trades, fees, slippage)
+    array. Slippage fills buys at close * (1 + s) and sells at close * (1 - s)
+    like PortfolioBacktestEngine and the paper adapter; with s = 0 results
+    match BacktestEngine(trailing_pct=, fees_bps=).run_signals.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    fee = np.asarray(fees_bps, dtype=np.float64)[None, :, None] / 10000
+    slip = np.asarray(slippage, dtype=np.float64)[None, None, :]
+
+    results = []
+    for trail in trailing:
+        entries, exits = round_trips(closes, signals, trail)
+        open_end = len(exits) and exits[-1] < 0
+        closed = len(exits) - int(open_end)
+
+        # per round trip, the engine turns cash C into C * (exit_fill / entry_fill * (1 - fee) - fee)
+        ratio = (closes[exits[:closed]] / closes[entries[:closed]])[:, None, None]
+        growth = np.prod(ratio * (1 - slip) / (1 + slip) * (1 - fee) - fee, axis=0)
+        if open_end:
+            # still holding: equity is the position marked at the last close, less the entry fee
+            growth = growth * (closes[-1] / (closes[entries[-1]] * (1 + slip)) - fee)[0]
+
+        equity = starting_cash * growth
+        roi = (equity - starting_cash) / starting_cash * 100
+        for (a, f), (b, s) in itertools.product(enumerate(fees_bps), enumerate(slippage)):
+            results.append({
+                "trailing_pct": float(trail),
+                "fees_bps": float(f),
+                "slippage_pct": float(s),
+                "trades": int(len(entries) + closed),
+                "roi_pct": float(round(roi[a, b], 2)),
+                "final_equity": float(round(equity[a, b], 2)),
+            })
+    return results
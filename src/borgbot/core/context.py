@@ -1,4 +1,15 @@
 class MarketContext:
-    def __init__(self, candles, higher_tf=None):
+    def __init__(self, candles, higher_tf=None, atr=None):
         self.candles = candles
-        self.higher_tf = higher_tf
\ No newline at end of file
+        self.higher_tf = higher_tf  # {timeframe: {field: value}} of the last closed higher bars
+        self.atr = atr
+
+    # strategies read context["candles"] in backtests, where the context is a dict
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
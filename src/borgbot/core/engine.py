@@ -1,16 +1,27 @@
+from borgbot.infra.metrics import NULL_METRICS
+
+
 class TradingEngine:
-    def __init__(self, strategy_stack, risk_engine, execution):
+    def __init__(self, strategy_stack, risk_engine, execution, metrics=None):
         self.strategy_stack = strategy_stack
         self.risk_engine = risk_engine
         self.execution = execution
+        self.metrics = metrics or NULL_METRICS
 
     def on_new_candle(self, context, equity, price):
-        signal = self.strategy_stack.generate_signal(context)
+        m = self.metrics
+
+        with m.time("signal"):
+            signal = self.strategy_stack.generate_signal(context)
 
         if signal > 0:
-            qty = self.risk_engine.calculate_position_size(equity, price, context)
-            self.execution.execute_order("buy", qty, price)
+            with m.time("sizing"):
+                qty = self.risk_engine.calculate_position_size(equity, price, context)
+            with m.time("execute"):
+                self.execution.execute_order("buy", qty, price)
 
         elif signal < 0:
-            qty = self.risk_engine.calculate_position_size(equity, price, context)
-            self.execution.execute_order("sell", qty, price)
\ No newline at end of file
+            with m.time("sizing"):
+                qty = self.risk_engine.calculate_position_size(equity, price, context)
+            with m.time("execute"):
+                self.execution.execute_order("sell", qty, price)
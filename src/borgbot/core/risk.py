@@ -1,8 +1,12 @@
 from dataclasses import dataclass
 from datetime import datetime, time as dtime
+from functools import lru_cache
 from typing import Tuple
 import pytz
 
+DAY_MS = 86_400_000
+
+@lru_cache(maxsize=32)
 def parse_window(win: str) -> Tuple[dtime, dtime]:
     a,b = win.split("-")
     h1,m1 = map(int, a.split(":"))
@@ -23,3 +27,25 @@ def daily_loss_breached(equity: float, rs: RiskState, max_loss_pct: float) -> bo
     if rs.day_open_equity <= 0: return False
     dd = (equity - rs.day_open_equity) / rs.day_open_equity
     return dd <= -abs(max_loss_pct)
+
+def _local_ms(ts_ms, tz: str):
+    """Wall-clock ms since the epoch in `tz` for UTC ms timestamps (DST-aware)."""
+    import numpy as np
+    import pandas as pd  # backtests only; the live loop never calls this
+
+    utc = pd.DatetimeIndex(np.asarray(ts_ms, dtype="datetime64[ms]"), tz="UTC")
+    return utc.tz_convert(tz).tz_localize(None).as_unit("ms").asi8
+
+def window_mask(ts_ms, window: str, tz: str = "UTC"):
+    """is_in_window() for every timestamp at once: True where trading is allowed."""
+    start, end = parse_window(window)
+    start_ms = (start.hour * 60 + start.minute) * 60_000
+    end_ms = (end.hour * 60 + end.minute) * 60_000
+    t = _local_ms(ts_ms, tz) % DAY_MS
+    if start_ms <= end_ms:
+        return (t >= start_ms) & (t <= end_ms)
+    return (t >= start_ms) | (t <= end_ms)
+
+def local_days(ts_ms, tz: str = "UTC"):
+    """Local calendar day number of every timestamp; a change marks a new risk day."""
+    return _local_ms(ts_ms, tz) // DAY_MS
@@ -2,16 +2,20 @@ import os
 import pandas as pd
 
 
-DATA_DIR = "/app/data"
+DATA_DIR = os.environ.get("DATA_DIR", "/app/data")
 
 
 def _path(symbol: str, timeframe: str):
     sym = symbol.replace("/", "")
-    path = os.path.join(DATA_DIR, sym)
+    path = os.path.join(DATA_DIR, sym)  # derived timeframes (see loader.derived_candles)
     os.makedirs(path, exist_ok=True)
     return os.path.join(path, f"{timeframe}.parquet")
 
 
+def has_cache(symbol: str, timeframe: str):
+    return os.path.exists(os.path.join(DATA_DIR, symbol.replace("/", ""), f"{timeframe}.parquet"))
+
+
 def load_cache(symbol: str, timeframe: str):
     path = _path(symbol, timeframe)
     if os.path.exists(path):
@@ -0,0 +1,242 @@
+import numpy as np
+
+from borgbot.data.timeframes import timestamps_ms
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def _to_ms(t):
+    if isinstance(t, (int, np.integer)):
+        return int(t)
+    import pandas as pd  # only the DataFrame / research paths need it
+
+    return int(pd.Timestamp(t).value // 1_000_000)
+
+
+class CandleArray:
+    """
+    Candles as contiguous NumPy columns: int64 ms timestamps plus OHLCV in
+    `dtype` (float64, or float32 to halve large research datasets).
+
+    Reads like the DataFrames it replaces in hot paths: candles["close"],
+    len(), `"sma_50" in candles`, candles.iloc[:i], candles[col] = values.
+    Slices are zero-copy views. append()/merge_rows() write into a
+    growable buffer (amortized O(1)); a view that gets appended to copies
+    itself first, so the parent never changes underneath it.
+    """
+
+    def __init__(self, timestamp=(), open=(), high=(), low=(), close=(), volume=(), dtype=np.float64, **extra):
+        self.dtype = np.dtype(dtype)
+        ts = np.ascontiguousarray(timestamp, dtype=np.int64)
+        self._cols = {"timestamp": ts}
+        for name, values in zip(FIELDS, (open, high, low, close, volume)):
+            self._cols[name] = np.ascontiguousarray(values, dtype=self.dtype)
+        for name, values in extra.items():
+            self._cols[name] = np.ascontiguousarray(values, dtype=self.dtype)
+        self._n = len(ts)
+        self._owns = True
+
+    # ---------------------------
+    # construction / conversion
+    # ---------------------------
+    @classmethod
+    def _wrap(cls, cols, n, dtype, owns):
+        out = cls.__new__(cls)
+        out.dtype = dtype
+        out._cols = cols
+        out._n = n
+        out._owns = owns
+        return out
+
+    @classmethod
+    def from_frame(cls, df, dtype=np.float64):
+        extra = {c: df[c].to_numpy() for c in df.columns if c != "timestamp" and c not in FIELDS}
+        return cls(timestamps_ms(df), *(df[f].to_numpy() for f in FIELDS), dtype=dtype, **extra)
+
+    @classmethod
+    def from_rows(cls, rows, dtype=np.float64):
+        """From ccxt-style [ts, o, h, l, c, v] rows."""
+        a = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+        return cls(a[:, 0].astype(np.int64), *(a[:, i] for i in range(1, 6)), dtype=dtype)
+
+    @classmethod
+    def read_parquet(cls, path, dtype=np.float64, columns=None, filters=None):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, columns=columns, filters=filters)
+        cols = {}
+        for name in table.column_names:
+            col = table.column(name)
+            if name == "timestamp":
+                cols[name] = timestamps_ms({"timestamp": col.to_numpy()})
+            else:
+                cols[name] = col.to_numpy()
+        return cls(
+            cols.pop("timestamp"), *(cols.pop(f) for f in FIELDS), dtype=dtype,
+            **{k: v for k, v in cols.items() if not k.startswith("__")},
+        )
+
+    def to_frame(self):
+        import pandas as pd
+
+        df = pd.DataFrame({name: self[name] for name in self.columns})
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df
+
+    def to_parquet(self, path, row_group_size=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrays = {"timestamp": pa.array(self["timestamp"], type=pa.timestamp("ms"))}
+        arrays.update((name, pa.array(self[name])) for name in self.columns if name != "timestamp")
+        pq.write_table(pa.table(arrays), path, row_group_size=row_group_size)
+
+    def copy(self):
+        return self._wrap({k: v[: self._n].copy() for k, v in self._cols.items()}, self._n, self.dtype, True)
+
+    def __getstate__(self):
+        # pickle (multiprocessing) only the live rows, never the spare capacity
+        return {"dtype": self.dtype, "cols": {k: v[: self._n] for k, v in self._cols.items()}}
+
+    def __setstate__(self, state):
+        self.dtype = state["dtype"]
+        self._cols = state["cols"]
+        self._n = len(self._cols["timestamp"])
+        self._owns = True
+
+    # ---------------------------
+    # DataFrame-like access
+    # ---------------------------
+    @property
+    def columns(self):
+        return list(self._cols)
+
+    @property
+    def nbytes(self):
+        return sum(v[: self._n].nbytes for v in self._cols.values())
+
+    @property
+    def iloc(self):
+        return self
+
+    def __len__(self):
+        return self._n
+
+    def __contains__(self, name):
+        return name in self._cols
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._cols[key][: self._n]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._n)
+            if step == 1:
+                stop = max(start, stop)
+                return self._wrap({k: v[start:stop] for k, v in self._cols.items()}, stop - start, self.dtype, False)
+        if isinstance(key, (int, np.integer)):
+            return {k: v[: self._n][key] for k, v in self._cols.items()}
+        # boolean mask / fancy index: a copy, like DataFrame[mask]
+        cols = {k: v[: self._n][key] for k, v in self._cols.items()}
+        return self._wrap(cols, len(cols["timestamp"]), self.dtype, True)
+
+    def __setitem__(self, name, values):
+        col = np.empty(len(self._cols["timestamp"]), dtype=self.dtype)
+        col[: self._n] = np.asarray(values)  # scalars broadcast like DataFrame assignment
+        col[self._n:] = np.nan
+        self._cols[name] = col
+
+    # ---------------------------
+    # growable buffer
+    # ---------------------------
+    def _reserve(self, extra):
+        need = self._n + extra
+        cap = len(self._cols["timestamp"])
+        if self._owns and need <= cap:
+            return
+        cap = max(need, 2 * cap, 64)
+        for k, v in self._cols.items():
+            grown = np.empty(cap, dtype=v.dtype)
+            grown[: self._n] = v[: self._n]
+            self._cols[k] = grown
+        self._owns = True
+
+    def append(self, timestamp, open, high, low, close, volume):
+        self._reserve(1)
+        n = self._n
+        for k, v in self._cols.items():
+            v[n] = np.nan if v.dtype.kind == "f" else 0
+        self._cols["timestamp"][n] = timestamp
+        for name, value in zip(FIELDS, (open, high, low, close, volume)):
+            self._cols[name][n] = value
+        self._n = n + 1
+
+    def extend(self, other):
+        """Append another CandleArray (or anything from_rows takes); extra columns not in it get NaN."""
+        if not isinstance(other, CandleArray):
+            other = CandleArray.from_rows(other, self.dtype)
+        k = len(other)
+        if k == 0:
+            return self
+        self._reserve(k)
+        n = self._n
+        for name, v in self._cols.items():
+            v[n: n + k] = other[name] if name in other else np.nan
+        self._n = n + k
+        return self
+
+    def merge_rows(self, rows, max_len=None):
+        """
+        Fold a fresh exchange window into the buffer: rows older than the
+        last bar are ignored, the last bar is replaced (it may have been
+        still forming), newer rows are appended. With max_len the buffer
+        keeps only the newest max_len bars.
+        """
+        new = rows if isinstance(rows, CandleArray) else CandleArray.from_rows(rows, self.dtype)
+        if self._n and len(new):
+            ts = new["timestamp"]
+            last = self._cols["timestamp"][self._n - 1]
+            new = new[int(np.searchsorted(ts, last)):]
+            if len(new) and new["timestamp"][0] == last:
+                self._n -= 1
+        self.extend(new)
+
+        if max_len is not None and self._n > 2 * max_len:
+            # compact rarely so trimming stays amortized O(1) per bar
+            drop = self._n - max_len
+            if self._owns:
+                for k, v in self._cols.items():
+                    v[:max_len] = v[drop: self._n]
+            else:
+                # a view shares its parent's buffer: copy the kept rows out instead
+                self._cols = {k: v[drop: self._n].copy() for k, v in self._cols.items()}
+                self._owns = True
+            self._n = max_len
+        return self
+
+    def tail(self, n):
+        return self[max(0, self._n - n):]
+
+    def __repr__(self):
+        return f"CandleArray({self._n} bars, {self.dtype.name}, columns={self.columns})"
+
+
+def time_bounds(candles):
+    """First and last candle time as pandas Timestamps (DataFrame or CandleArray)."""
+    import pandas as pd
+
+    ts = timestamps_ms(candles)
+    return pd.Timestamp(int(ts[0]), unit="ms"), pd.Timestamp(int(ts[-1]), unit="ms")
+
+
+def time_range(candles, start=None, end=None):
+    """
+    Candles with start <= timestamp < end, for a time-sorted DataFrame or
+    CandleArray. Located by binary search; a CandleArray comes back as a view.
+    """
+    ts = timestamps_ms(candles)
+    lo = 0 if start is None else int(np.searchsorted(ts, _to_ms(start), side="left"))
+    hi = len(ts) if end is None else int(np.searchsorted(ts, _to_ms(end), side="left"))
+    hi = max(lo, hi)
+    if isinstance(candles, CandleArray):
+        return candles[lo:hi]
+    return candles.iloc[lo:hi]
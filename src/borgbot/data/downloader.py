@@ -1,15 +1,14 @@
 import argparse
-import ccxt
-import pandas as pd
 import os
 import time
 import datetime
 
-
-DATA_DIR = "/app/data"
+from .timeframes import BASE_TIMEFRAME
 
 
 def download(symbol, timeframe, start, end):
+    import ccxt
+    import pandas as pd
 
     exchange = ccxt.kucoin()
 
@@ -51,12 +50,13 @@ def download(symbol, timeframe, start, end):
 
 
 def save(symbol, timeframe, df):
+    import pandas as pd
+    from . import cache
+    from .loader import base_path, save_base
 
-    os.makedirs(DATA_DIR, exist_ok=True)
-
-    pair = symbol.replace("/", "")
+    os.makedirs(cache.DATA_DIR, exist_ok=True)
 
-    path = f"{DATA_DIR}/{pair}_{timeframe}.parquet"
+    path = base_path(symbol, timeframe)
 
     if os.path.exists(path):
 
@@ -68,7 +68,7 @@ def save(symbol, timeframe, df):
 
         df = df.sort_values("timestamp")
 
-    df.to_parquet(path)
+    save_base(df, path)
 
     print("Saved dataset:", path)
 
@@ -78,7 +78,8 @@ def main():
     parser = argparse.ArgumentParser()
 
     parser.add_argument("--symbol", required=True)
-    parser.add_argument("--tf", required=True)
+    # other timeframes are resampled from 1m by loader.load_data
+    parser.add_argument("--tf", default=BASE_TIMEFRAME)
     parser.add_argument("--start", required=True)
     parser.add_argument("--end", required=True)
 
@@ -1,8 +1,9 @@
-import ccxt
 import pandas as pd
 
 
 def fetch_ohlcv(symbol: str, timeframe: str, since=None, limit=1000, exchange_name="kucoin"):
+    import ccxt  # hundreds of exchange modules; only load it when we actually fetch
+
     exchange_class = getattr(ccxt, exchange_name)
     exchange = exchange_class()
 
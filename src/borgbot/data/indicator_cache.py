@@ -1,25 +1,26 @@
 import pandas as pd
 
-from borgbot.indicators.sma import sma
+from borgbot.indicators.sma import rolling_sma
 from borgbot.indicators.rsi import rsi
 from borgbot.indicators.atr import atr
 
+# fast/slow grids plus the RSI strategies' trend filters (trend_period 50 / 100)
+SMA_PERIODS = list(range(5, 60)) + [100]
+# the discovery grid's RSI periods
+RSI_PERIODS = list(range(10, 21))
+
 
 def build_indicator_cache(df):
 
     cache = df.copy()
 
     # Precompute SMAs
-    for period in range(5, 60):
-        cache[f"sma_{period}"] = sma(cache["close"], period)
-
-    for period in [50, 100]:
-        col = f"sma_{period}"
-        if col not in df:
-            df[col] = sma(df["close"], period)
+    for period in SMA_PERIODS:
+        cache[f"sma_{period}"] = rolling_sma(cache["close"], period)
 
     # Precompute RSI
-    cache["rsi_14"] = rsi(cache["close"], 14)
+    for period in RSI_PERIODS:
+        cache[f"rsi_{period}"] = rsi(cache["close"], period).to_numpy()
 
     # Precompute ATR
     cache["atr_14"] = atr(
@@ -27,6 +28,6 @@ def build_indicator_cache(df):
     cache["low"],
     cache["close"],
     14,
-    )
+    ).to_numpy()
 
-    return cache
\ No newline at end of file
+    return cache
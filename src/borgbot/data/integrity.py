@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import cache
+from .loader import BASE_TIMEFRAME, base_path, save_base
+from .timeframes import timeframe_ms, timestamps_ms
+
+DAY_MS = 86_400_000
+
+
+def scan(ts, timeframe: str):
+    """
+    Integrity report for raw candle timestamps (int64 ms, in stored order).
+
+    Counts rows out of order, duplicate and off-grid timestamps, and lists
+    every gap as [first_missing_ms, last_missing_ms, missing_bars]. `days`
+    holds one [day_ms, expected, actual] row per UTC day between the first
+    and last bar (the gap index load_data consults).
+    """
+    step = timeframe_ms(timeframe)
+    ts = np.asarray(ts, dtype=np.int64)
+    report = {
+        "timeframe": timeframe, "rows": int(len(ts)), "first": None, "last": None,
+        "out_of_order": int((np.diff(ts) < 0).sum()), "duplicates": 0, "misaligned": 0,
+        "missing": 0, "gaps": [], "days": [],
+    }
+    if len(ts) == 0:
+        return report
+
+    # stores are almost always sorted already; np.unique would hash/sort every time
+    srt = ts if report["out_of_order"] == 0 else np.sort(ts, kind="stable")
+    uniq = srt[np.r_[True, srt[1:] != srt[:-1]]]
+    report["duplicates"] = int(len(ts) - len(uniq))
+    report["misaligned"] = int((uniq % step != 0).sum())
+    report["first"], report["last"] = int(uniq[0]), int(uniq[-1])
+
+    d = np.diff(uniq)
+    at = np.flatnonzero(d > step)
+    missing = d[at] // step - 1
+    report["gaps"] = [[int(a + step), int(b - step), int(m)] for a, b, m in zip(uniq[at], uniq[at + 1], missing) if m > 0]
+    report["missing"] = int(sum(g[2] for g in report["gaps"]))
+
+    days = np.arange(uniq[0] // DAY_MS * DAY_MS, uniq[-1] + 1, DAY_MS)
+    lo = np.maximum(days, uniq[0])
+    hi = np.minimum(days + DAY_MS - 1, uniq[-1])
+    expected = (hi - (-(-lo // step) * step)) // step + 1   # grid bars in [lo, hi]
+    actual = np.bincount(((uniq - days[0]) // DAY_MS).astype(np.int64), minlength=len(days))
+    report["days"] = [[int(a), int(b), int(c)] for a, b, c in zip(days, expected, actual)]
+    return report
+
+
+def repair(candles):
+    """Sort by timestamp and keep the last copy of each bar (later fetches supersede forming candles)."""
+    return (
+        candles.drop_duplicates("timestamp", keep="last")
+        .sort_values("timestamp", kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def _index_path(symbol: str, timeframe: str):
+    path = os.path.join(cache.DATA_DIR, symbol.replace("/", ""))
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, f"integrity_{timeframe}.json")
+
+
+def gap_index(symbol: str, timeframe: str = BASE_TIMEFRAME, rebuild: bool = False):
+    """
+    scan() of the stored candles, cached until the parquet file changes.
+
+    Only the timestamp column is read on a rebuild. Gaps that a refetch
+    already confirmed the exchange has no data for are kept in `confirmed`.
+    """
+    src = base_path(symbol, timeframe)
+    st = os.stat(src)
+    source = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    path = _index_path(symbol, timeframe)
+
+    old = None
+    if os.path.exists(path):
+        with open(path) as f:
+            old = json.load(f)
+        if old.get("source") == source and not rebuild:
+            return old
+
+    ts = pd.read_parquet(src, columns=["timestamp"])["timestamp"]
+    if np.issubdtype(ts.dtype, np.datetime64):
+        ts = ts.to_numpy().astype("datetime64[ms]").astype(np.int64)
+    report = scan(ts, timeframe)
+    report["source"] = source
+
+    confirmed = {tuple(g) for g in (old or {}).get("confirmed", [])}
+    report["confirmed"] = [g for g in report["gaps"] if tuple(g[:2]) in confirmed]
+
+    with open(path, "w") as f:
+        json.dump(report, f)
+    return report
+
+
+def range_complete(report, start_ms: int, end_ms: int):
+    """(complete, missing_bars) for [start_ms, end_ms] from a gap index, without touching the candles."""
+    if report["first"] is None:
+        return False, None
+    step = timeframe_ms(report["timeframe"])
+    missing = 0
+    # bars before the first / after the last stored one count as missing too
+    if start_ms < report["first"]:
+        missing += (report["first"] - start_ms) // step
+    if end_ms > report["last"]:
+        missing += (end_ms - report["last"]) // step
+    for a, b, _ in report["gaps"]:
+        lo, hi = max(a, start_ms), min(b, end_ms)
+        if lo <= hi:
+            missing += (hi - lo) // step + 1
+    return missing == 0, int(missing)
+
+
+def refetch_plan(report, limit: int = 1000):
+    """[(since_ms, n_bars)] exchange requests covering each unconfirmed gap, at most `limit` bars each."""
+    step = timeframe_ms(report["timeframe"])
+    confirmed = {tuple(g[:2]) for g in report.get("confirmed", [])}
+    plan = []
+    for a, b, m in report["gaps"]:
+        if (a, b) in confirmed:
+            continue
+        for since in range(a, b + 1, limit * step):
+            plan.append((since, int(min(limit, (b - since) // step + 1))))
+    return plan
+
+
+def fill_gaps(exchange, symbol: str, timeframe: str = BASE_TIMEFRAME, limit: int = 1000):
+    """
+    Refetch only the missing ranges of the stored candles and merge them in.
+
+    Gaps the exchange returns nothing for are marked confirmed so later
+    syncs don't ask again. Returns (bars added, ms timestamp of the earliest
+    added bar or None); derived timeframes must be rebuilt from there.
+    """
+    report = gap_index(symbol, timeframe)
+    plan = refetch_plan(report, limit)
+    if not plan:
+        return 0, None
+
+    rows = []
+    for since, n in plan:
+        rows += exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=n)
+
+    path = base_path(symbol, timeframe)
+    df = pd.read_parquet(path)
+    added, first = 0, None
+    if rows:
+        new = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
+        new["timestamp"] = pd.to_datetime(new["timestamp"], unit="ms")
+        merged = repair(pd.concat([df, new]))
+        added = len(merged) - len(repair(df))
+        fresh = np.setdiff1d(timestamps_ms(new), timestamps_ms(df))
+        first = int(fresh[0]) if len(fresh) else None
+        save_base(merged, path)
+
+    # whatever is still missing from the ranges we asked for doesn't exist upstream
+    after = gap_index(symbol, timeframe, rebuild=True)
+    asked = [(a, b) for a, b, _ in report["gaps"]]
+    confirmed = [g for g in after["gaps"] if any(a <= g[0] and g[1] <= b for a, b in asked)]
+    after["confirmed"] = confirmed
+    with open(_index_path(symbol, timeframe), "w") as f:
+        json.dump(after, f)
+    return added, first
+
+
+def _iso(ts_ms):
+    return pd.Timestamp(ts_ms, unit="ms").strftime("%Y-%m-%d %H:%M") if ts_ms is not None else "n/a"
+
+
+def print_report(symbol, report):
+    print(f"{symbol} {report['timeframe']}: {report['rows']} rows {_iso(report['first'])} .. {_iso(report['last'])}")
+    print(
+        f"  out_of_order={report['out_of_order']} duplicates={report['duplicates']} "
+        f"misaligned={report['misaligned']} missing={report['missing']} in {len(report['gaps'])} gaps "
+        f"({len(report.get('confirmed', []))} confirmed upstream)"
+    )
+    for a, b, m in sorted(report["gaps"], key=lambda g: -g[2])[:10]:
+        print(f"  gap {_iso(a)} .. {_iso(b)}  {m} bars")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Check a candle store for gaps, duplicates and ordering")
+    parser.add_argument("--symbol", required=True)
+    parser.add_argument("--tf", default=BASE_TIMEFRAME)
+    parser.add_argument("--repair", action="store_true", help="rewrite the store sorted and de-duplicated")
+    parser.add_argument("--fill", action="store_true", help="refetch missing ranges from the exchange")
+
+    args = parser.parse_args()
+
+    report = gap_index(args.symbol, args.tf)
+    print_report(args.symbol, report)
+
+    if args.repair and (report["duplicates"] or report["out_of_order"]):
+        path = base_path(args.symbol, args.tf)
+        save_base(repair(pd.read_parquet(path)), path)
+        print("Repaired", path)
+
+    if args.fill:
+        import ccxt
+
+        from .sync import refresh_derived  # sync imports this module
+
+        added, first = fill_gaps(ccxt.kucoin(), args.symbol, args.tf)
+        print(f"Filled {added} bars")
+        if first is not None and args.tf == BASE_TIMEFRAME:
+            refresh_derived(args.symbol, since=first)
+        print_report(args.symbol, gap_index(args.symbol, args.tf))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,129 @@
 import os
+import numpy as np
 import pandas as pd
+from . import cache
+from .candles import FIELDS, CandleArray
 from .fetcher import fetch_ohlcv
+from .resample import resample
+from .timeframes import BASE_TIMEFRAME, TF_MS
+# small row groups let derived_candles read only the tail of a large base store
+BASE_ROW_GROUP = 50_000
+# float64 keeps backtests bit-identical to the DataFrame path
+CANDLE_DTYPE = np.dtype(os.environ.get("CANDLE_DTYPE", "float64"))
+# research sweeps hold a dataset per worker; float32 halves it
+RESEARCH_DTYPE = np.dtype(os.environ.get("RESEARCH_DTYPE", "float32"))
 
 
-def load_data(symbol: str, timeframe: str, start: str, end: str):
-
+def base_path(symbol: str, timeframe: str = BASE_TIMEFRAME):
     symbol_clean = symbol.replace("/", "")
-    path = f"/app/data/{symbol_clean}_{timeframe}.parquet"
+    return os.path.join(cache.DATA_DIR, f"{symbol_clean}_{timeframe}.parquet")
+
+
+def save_base(df, path):
+    df.to_parquet(path, row_group_size=BASE_ROW_GROUP)
+
+
+def first_timestamp(path):
+    import pyarrow.parquet as pq
 
-    os.makedirs("/app/data", exist_ok=True)
+    meta = pq.ParquetFile(path).metadata
+    if meta.num_row_groups:
+        col = meta.schema.to_arrow_schema().get_field_index("timestamp")
+        stats = meta.row_group(0).column(col).statistics
+        if stats is not None and stats.has_min_max:
+            return pd.Timestamp(stats.min)
+    return pd.read_parquet(path, columns=["timestamp"])["timestamp"].min()
+
+
+def load_base(symbol: str, timeframe: str = BASE_TIMEFRAME, since=None):
+    path = base_path(symbol, timeframe)
+
+    os.makedirs(cache.DATA_DIR, exist_ok=True)
 
     if not os.path.exists(path):
         print(f"Downloading {symbol} {timeframe} candles...")
         df = fetch_ohlcv(symbol, timeframe)
-        df.to_parquet(path)
+        save_base(df, path)
         print(f"Saved to {path}")
+        if since is not None:
+            df = df[df["timestamp"] >= since]
+        return df.reset_index(drop=True)
 
-    else:
+    if since is None:
         df = pd.read_parquet(path)
-    
+    else:
+        # row groups entirely before `since` are skipped
+        df = pd.read_parquet(path, filters=[("timestamp", ">=", pd.Timestamp(since))]).reset_index(drop=True)
+
+    if not (df["timestamp"].is_monotonic_increasing and df["timestamp"].is_unique):
+        from .integrity import repair  # integrity imports this module
+
+        df = repair(df)
+    return df
+
+
+def derived_candles(symbol: str, timeframe: str, since=None):
+    """
+    `timeframe` candles resampled from the base store and cached (cache.py layout).
+
+    Each call re-aggregates only the base candles from the last cached bar
+    on (that bar may have been incomplete), so the cache follows the base
+    store as sync appends to it. `since` (ms) moves that point back to the
+    bar containing it, for base candles filled in mid-store. A base store
+    that now starts earlier than the cache (history backfilled) triggers a
+    full rebuild.
+    """
+    cached = cache.load_cache(symbol, timeframe)
+
+    if cached is not None and len(cached) and os.path.exists(base_path(symbol)):
+        if first_timestamp(base_path(symbol)) < cached["timestamp"].iloc[0]:
+            cached = None
+
+    if cached is None or cached.empty:
+        bars = resample(load_base(symbol), timeframe)
+    else:
+        cut = cached["timestamp"].iloc[-1]
+        if since is not None:
+            step = TF_MS[timeframe]
+            cut = min(cut, pd.Timestamp(int(since) // step * step, unit="ms"))
+        tail = resample(load_base(symbol, since=cut), timeframe)
+        if tail.empty or (len(tail) == 1 and tail.iloc[0].equals(cached.iloc[-1])):
+            return cached
+        bars = pd.concat([cached[cached["timestamp"] < cut], tail], ignore_index=True)
+
+    cache.save_cache(symbol, timeframe, bars)
+    return bars
+
+
+def warn_if_incomplete(symbol: str, timeframe: str, start, end):
+    """Check [start, end] against the cached gap index of the store the candles came from."""
+    from .integrity import gap_index, range_complete
+
+    tf = BASE_TIMEFRAME if os.path.exists(base_path(symbol)) else timeframe
+    if not os.path.exists(base_path(symbol, tf)):
+        return
+    report = gap_index(symbol, tf)
+    complete, missing = range_complete(report, int(start.value // 1_000_000), int(end.value // 1_000_000))
+    if not complete:
+        print(
+            f"WARNING: {symbol} {tf} is missing {missing} bars between {start} and {end} "
+            f"(python -m borgbot.data.integrity --symbol {symbol} --fill)"
+        )
+
+
+def _is_derived(symbol: str, timeframe: str):
+    return timeframe != BASE_TIMEFRAME and timeframe in TF_MS and (
+        os.path.exists(base_path(symbol)) or not os.path.exists(base_path(symbol, timeframe))
+    )
+
+
+def load_data(symbol: str, timeframe: str, start: str, end: str):
+
+    if _is_derived(symbol, timeframe):
+        df = derived_candles(symbol, timeframe)
+    else:
+        # the base timeframe, or a legacy per-timeframe download with no 1m store next to it
+        df = load_base(symbol, timeframe)
 
     df["timestamp"] = pd.to_datetime(df["timestamp"])
 
@@ -29,7 +134,121 @@ def load_data(symbol: str, timeframe: str, start: str, end: str):
 
     # fallback if range empty
     if filtered.empty:
-        print("WARNING: Requested range has no candles. Using full dataset instead.")
+        print(
+            f"WARNING: Requested range {start} .. {end} has no candles "
+            f"(store covers {df['timestamp'].min()} .. {df['timestamp'].max()}). Using full dataset instead."
+        )
         filtered = df
+    else:
+        warn_if_incomplete(symbol, timeframe, filtered["timestamp"].iloc[0], filtered["timestamp"].iloc[-1])
+
+    return filtered.reset_index(drop=True)
+
+
+def load_candles(symbol: str, timeframe: str, start: str, end: str, dtype=None):
+    """load_data() as a CandleArray (CANDLE_DTYPE unless `dtype` is given)."""
+    return CandleArray.from_frame(load_data(symbol, timeframe, start, end), dtype or CANDLE_DTYPE)
+
+
+def build_derived(symbol: str, timeframe: str, chunk_rows=None):
+    """
+    Write the derived_candles() cache from the base store one chunk at a
+    time. The base bars of each chunk's last (maybe unfinished) bucket are
+    carried into the next chunk, so the file equals a resample of the whole
+    store while memory stays at one chunk.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = cache._path(symbol, timeframe)
+    tmp = path + ".tmp"
+    step = TF_MS[timeframe]
+    writer, carry = None, None
+
+    def write(bars):
+        nonlocal writer
+        table = pa.Table.from_pandas(bars.to_frame(), preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(tmp, table.schema)
+        writer.write_table(table)
+
+    try:
+        for chunk in iter_candles(base_path(symbol), chunk_rows=chunk_rows or BASE_ROW_GROUP, dtype=np.float64):
+            if carry is not None:
+                chunk = CandleArray(*(np.concatenate([carry[c], chunk[c]]) for c in ("timestamp", *FIELDS)))
+            ts = chunk["timestamp"]
+            cut = int(np.searchsorted(ts, ts[-1] // step * step, side="left"))
+            if cut:
+                write(resample(chunk[:cut], timeframe))
+            carry = chunk[cut:].copy()
+        if carry is not None:
+            write(resample(carry, timeframe))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise FileNotFoundError(f"{base_path(symbol)} has no candles to resample")
+    os.replace(tmp, path)
+    return path
+
+
+def store_path(symbol: str, timeframe: str):
+    """
+    The parquet file load_data() reads `timeframe` candles from, for
+    streaming. The store must exist already (downloads happen in memory).
+    A missing or outdated derived cache is rebuilt chunk by chunk;
+    otherwise only its tail is brought up to date.
+    """
+    if _is_derived(symbol, timeframe):
+        base, path = base_path(symbol), cache._path(symbol, timeframe)
+        if not os.path.exists(base):
+            raise FileNotFoundError(f"No {symbol} {BASE_TIMEFRAME} store at {base}; sync it first")
+        if not os.path.exists(path) or first_timestamp(base) < first_timestamp(path):
+            build_derived(symbol, timeframe)
+        else:
+            derived_candles(symbol, timeframe)
+        return path
+    path = base_path(symbol, timeframe)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No {symbol} {timeframe} store at {path}; sync it first")
+    return path
+
+
+def iter_candles(path, start=None, end=None, chunk_rows=BASE_ROW_GROUP, dtype=None):
+    """
+    Candles of a parquet store with start <= timestamp <= end as consecutive
+    CandleArrays of at most `chunk_rows` bars, read one batch at a time so
+    memory stays bounded whatever the store's size. Row groups outside the
+    range are skipped by their statistics; only timestamp and OHLCV are read.
+    """
+    import pyarrow.parquet as pq
+
+    from .candles import _to_ms
+    from .timeframes import timestamps_ms
+
+    lo = None if start is None else _to_ms(start)
+    hi = None if end is None else _to_ms(end)
+
+    f = pq.ParquetFile(path)
+    col = f.schema_arrow.get_field_index("timestamp")
+    groups = []
+    for g in range(f.metadata.num_row_groups):
+        stats = f.metadata.row_group(g).column(col).statistics
+        if stats is not None and stats.has_min_max:
+            if (lo is not None and _to_ms(stats.max) < lo) or (hi is not None and _to_ms(stats.min) > hi):
+                continue
+        groups.append(g)
 
-    return filtered.reset_index(drop=True)
\ No newline at end of file
+    last = None
+    for batch in f.iter_batches(batch_size=chunk_rows, row_groups=groups, columns=["timestamp", *FIELDS]):
+        ts = timestamps_ms({"timestamp": batch.column("timestamp").to_numpy()})
+        a = 0 if lo is None else int(np.searchsorted(ts, lo, side="left"))
+        b = len(ts) if hi is None else int(np.searchsorted(ts, hi, side="right"))
+        if a >= b:
+            continue
+        if (last is not None and ts[a] <= last) or (np.diff(ts[a:b]) <= 0).any():
+            raise ValueError(f"{path} is not sorted / de-duplicated (python -m borgbot.data.integrity --repair)")
+        last = ts[b - 1]
+        yield CandleArray(
+            ts[a:b], *(batch.column(name).to_numpy()[a:b] for name in FIELDS), dtype=dtype or CANDLE_DTYPE,
+        )
@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+from borgbot.data.resample import OHLCV, ohlcv_arrays, resample_arrays
+from borgbot.data.timeframes import merge_specs, timeframe_ms
+from borgbot.indicators.atr import atr
+from borgbot.indicators.rsi import rsi
+
+# name -> fn(bars, period); value at bar j uses bars[:j + 1]
+INDICATORS = {
+    "sma": lambda bars, p: pd.Series(bars["close"]).rolling(p).mean().to_numpy(),
+    "rsi": lambda bars, p: rsi(pd.Series(bars["close"]), p).to_numpy(),
+    "atr": lambda bars, p: atr(bars["high"], bars["low"], bars["close"], p).to_numpy(),
+}
+
+
+def parse_indicator(name: str):
+    """"sma_50" -> ("sma", 50)."""
+    kind, _, period = name.rpartition("_")
+    if kind not in INDICATORS or not period.isdigit():
+        raise ValueError(f"Unknown indicator {name!r} (expected one of {sorted(INDICATORS)} + _<period>)")
+    return kind, int(period)
+
+
+def build_higher_tf(candles, *specs):
+    """MultiTimeframe over `candles` for the merged specs, or None when nothing asks for one."""
+    spec = merge_specs(*specs)
+    return MultiTimeframe(spec).update(candles) if spec else None
+
+
+class _Frame:
+    """One higher timeframe: its bars and indicator arrays, extended in place."""
+
+    def __init__(self, timeframe, indicators):
+        self.timeframe = timeframe
+        self.step = timeframe_ms(timeframe)
+        self.indicators = {name: parse_indicator(name) for name in indicators}
+        # bars an indicator needs behind the one being recomputed (+1 for diff / prev close)
+        self.lookback = max((p + 1 for _, p in self.indicators.values()), default=1)
+
+        self.ts = np.empty(0, np.int64)
+        self.bars = {f: np.empty(0) for f in OHLCV}
+        self.values = {name: np.empty(0) for name in self.indicators}
+        self.last_base_ts = None  # newest base bar already folded in
+
+    def column(self, name):
+        return self.bars[name] if name in self.bars else self.values[name]
+
+    def replace_from(self, k, ts, bars):
+        """Swap bars[k:] for the given ones and recompute only the indicator tail."""
+        self.ts = np.concatenate([self.ts[:k], ts])
+        for f in OHLCV:
+            self.bars[f] = np.concatenate([self.bars[f][:k], bars[f]])
+
+        lo = max(0, k - self.lookback)
+        window = {f: self.bars[f][lo:] for f in OHLCV}
+        for name, (kind, period) in self.indicators.items():
+            tail = INDICATORS[kind](window, period)[k - lo:]
+            self.values[name] = np.concatenate([self.values[name][:k], tail])
+
+    def add(self, ts, fields):
+        if self.last_base_ts is not None:
+            keep = ts > self.last_base_ts
+            ts, fields = ts[keep], {f: v[keep] for f, v in fields.items()}
+        if len(ts) == 0:
+            return
+
+        bucket_ts, new = resample_arrays(ts, fields, self.step)
+        k = len(self.ts)
+        if k and bucket_ts[0] == self.ts[-1]:
+            # the first new base bars finish the last (still forming) bar
+            k -= 1
+            new["open"][0] = self.bars["open"][k]
+            new["high"][0] = max(new["high"][0], self.bars["high"][k])
+            new["low"][0] = min(new["low"][0], self.bars["low"][k])
+            new["volume"][0] += self.bars["volume"][k]
+
+        self.replace_from(k, bucket_ts, new)
+        self.last_base_ts = int(ts[-1])
+
+
+class MultiTimeframe:
+    """
+    Higher-timeframe bars and indicators built from base candles.
+
+    spec maps timeframe -> indicator names, e.g. {"1h": ["sma_50", "rsi_14"]};
+    OHLCV fields of the higher bars are always available too. A higher bar
+    becomes visible once it has closed: at base bar i (which, like the
+    backtest, only knows candles[:i]) that is the last bar ending at or
+    before candles[i].timestamp. update() only folds in new base bars and
+    recomputes the indicator tail, so the same object serves backtests and
+    the live loop.
+    """
+
+    def __init__(self, spec, base_timeframe=None):
+        self.frames = {tf: _Frame(tf, names) for tf, names in spec.items()}
+        self.base_ms = timeframe_ms(base_timeframe) if base_timeframe else None
+        self.base_ts = np.empty(0, np.int64)
+        self._index = {}
+
+    @property
+    def timeframes(self):
+        return list(self.frames)
+
+    def lookback(self, timeframe):
+        return self.frames[timeframe].lookback
+
+    def seed(self, timeframe, candles, now_ms):
+        """Warm a timeframe up from native exchange bars; bars not closed by now_ms are dropped."""
+        frame = self.frames[timeframe]
+        ts, bars = ohlcv_arrays(candles)
+        keep = ts + frame.step <= now_ms
+        ts, bars = ts[keep], {f: v[keep] for f, v in bars.items()}
+        frame.replace_from(0, ts, bars)
+        if len(ts):
+            frame.last_base_ts = int(ts[-1]) + frame.step - 1
+        return self
+
+    def update(self, candles):
+        """Fold in base candles; anything not newer than the last update is ignored."""
+        ts, fields = ohlcv_arrays(candles)
+        if len(self.base_ts):
+            keep = ts > self.base_ts[-1]
+            ts, fields = ts[keep], {f: v[keep] for f, v in fields.items()}
+        if len(ts) == 0:
+            return self
+
+        self.base_ts = np.concatenate([self.base_ts, ts])
+        if self.base_ms is None and len(self.base_ts) > 1:
+            self.base_ms = int(np.diff(self.base_ts).min())
+        for frame in self.frames.values():
+            frame.add(ts, fields)
+        self._index.clear()
+        return self
+
+    def index(self, timeframe):
+        """For every base bar, the position of the last closed higher bar (-1: none yet)."""
+        idx = self._index.get(timeframe)
+        if idx is None:
+            frame = self.frames[timeframe]
+            idx = np.searchsorted(frame.ts + frame.step, self.base_ts, side="right") - 1
+            self._index[timeframe] = idx
+        return idx
+
+    def aligned(self, timeframe, name):
+        """`name` of the higher timeframe as seen from each base bar (NaN before the first close)."""
+        idx = self.index(timeframe)
+        col = self.frames[timeframe].column(name)
+        if len(col) == 0:
+            return np.full(len(idx), np.nan)
+        return np.where(idx >= 0, col[np.maximum(idx, 0)], np.nan)
+
+    def _row(self, frame, j):
+        if j < 0:
+            return {}
+        row = {"timestamp": int(frame.ts[j])}
+        row.update((f, float(frame.bars[f][j])) for f in OHLCV)
+        row.update((n, float(v[j])) for n, v in frame.values.items())
+        return row
+
+    def at(self, i):
+        """{timeframe: {field: value}} as seen from base bar i."""
+        return {tf: self._row(frame, int(self.index(tf)[i])) for tf, frame in self.frames.items()}
+
+    def latest(self):
+        """Same as at() for the bar after the newest base bar, i.e. what the live loop trades on."""
+        out = {}
+        for tf, frame in self.frames.items():
+            now = frame.last_base_ts + 1 if frame.last_base_ts is not None else -1
+            if len(self.base_ts):
+                now = int(self.base_ts[-1]) + (self.base_ms or 0)
+            j = int(np.searchsorted(frame.ts + frame.step, now, side="right")) - 1
+            out[tf] = self._row(frame, j)
+        return out
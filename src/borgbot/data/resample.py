@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from borgbot.data.candles import CandleArray
+from borgbot.data.timeframes import timeframe_ms, timestamps_ms
+
+OHLCV = ("open", "high", "low", "close", "volume")
+
+
+def ohlcv_arrays(candles):
+    """(ts int64 ms, {field: float64 array}) from a DataFrame, CandleArray or ccxt-style rows."""
+    if hasattr(candles, "columns"):
+        return timestamps_ms(candles), {f: np.asarray(candles[f], dtype=np.float64) for f in OHLCV}
+    rows = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+    return rows[:, 0].astype(np.int64), {f: rows[:, i + 1] for i, f in enumerate(OHLCV)}
+
+
+def resample_arrays(ts, fields, step_ms):
+    """
+    Aggregate sorted bars into `step_ms` buckets (bucket timestamp = bar open).
+
+    Returns the bucket timestamps and OHLCV arrays, one entry per non-empty bucket.
+    """
+    bucket = ts // step_ms * step_ms
+    if len(ts) == 0:
+        return bucket, {f: np.empty(0) for f in OHLCV}
+
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    return bucket[starts], {
+        "open": fields["open"][starts],
+        "high": np.maximum.reduceat(fields["high"], starts),
+        "low": np.minimum.reduceat(fields["low"], starts),
+        "close": fields["close"][ends],
+        "volume": np.add.reduceat(fields["volume"], starts),
+    }
+
+
+def resample(candles, timeframe: str):
+    """Higher-timeframe OHLCV candles built from finer, time-sorted candles."""
+    ts, fields = ohlcv_arrays(candles)
+    bucket_ts, bars = resample_arrays(ts, fields, timeframe_ms(timeframe))
+
+    if isinstance(candles, CandleArray):
+        return CandleArray(bucket_ts, *(bars[f] for f in OHLCV), dtype=candles.dtype)
+
+    out = pd.DataFrame({"timestamp": bucket_ts, **bars})
+    if hasattr(candles, "columns") and np.issubdtype(np.asarray(candles["timestamp"]).dtype, np.datetime64):
+        out["timestamp"] = pd.to_datetime(out["timestamp"], unit="ms")
+    return out
@@ -1,19 +1,62 @@
-import ccxt
 import pandas as pd
 import os
 import time
 
+from . import cache
+from .downloader import download
+from .integrity import fill_gaps, repair
+from .loader import BASE_TIMEFRAME, base_path, first_timestamp, save_base, derived_candles
+from .timeframes import TF_MS
+
+
+def refresh_derived(symbol, since=None):
+    """
+    Extend every derived timeframe that already has a cache file; with
+    `since` (ms, e.g. the first bar a gap fill added) bars from there on
+    are re-resampled too.
+    """
+    for tf in TF_MS:
+        if tf != BASE_TIMEFRAME and cache.has_cache(symbol, tf):
+            derived_candles(symbol, tf, since=since)
+
+
+def bootstrap(symbol):
+    """
+    Create a missing 1m store. Deployments from before the base store only
+    have a per-timeframe download (e.g. BTCUSDT_5m.parquet), so the 1m
+    history is fetched from that file's first bar; with neither, exit and
+    say which downloader command seeds it.
+    """
+    path = base_path(symbol)
+    if os.path.exists(path):
+        return
+    legacy = [base_path(symbol, tf) for tf in TF_MS if tf != BASE_TIMEFRAME and os.path.exists(base_path(symbol, tf))]
+    if not legacy:
+        raise SystemExit(
+            f"No {BASE_TIMEFRAME} store at {path}. Seed it with: python -m borgbot.data.downloader "
+            f"--symbol {symbol} --start YYYY-MM-DD --end {pd.Timestamp.now():%Y-%m-%d}"
+        )
 
-DATA_DIR = "/app/data"
+    # the downloader reads dates as local time; a day early covers any UTC offset
+    start = min(first_timestamp(p) for p in legacy) - pd.Timedelta(days=1)
+    print(f"No {BASE_TIMEFRAME} store for {symbol}; downloading from {start} ({', '.join(legacy)})")
+    df = download(symbol, BASE_TIMEFRAME, start.isoformat(), pd.Timestamp.now().isoformat())
+    if df.empty:
+        raise SystemExit(f"The exchange returned no {symbol} {BASE_TIMEFRAME} candles since {start}")
+    save_base(repair(df), path)
 
 
-def sync(symbol, timeframe):
+def sync(symbol, timeframe=BASE_TIMEFRAME):
+
+    if timeframe == BASE_TIMEFRAME:
+        bootstrap(symbol)
 
-    exchange = ccxt.kucoin()
 
-    pair = symbol.replace("/", "")
+    import ccxt
+
+    exchange = ccxt.kucoin()
 
-    path = f"{DATA_DIR}/{pair}_{timeframe}.parquet"
+    path = base_path(symbol, timeframe)
 
     df = pd.read_parquet(path)
 
@@ -27,7 +70,7 @@ def sync(symbol, timeframe):
     )
 
     if not candles:
-        return
+        return None
 
     new = pd.DataFrame(
         candles,
@@ -36,22 +79,25 @@ def sync(symbol, timeframe):
 
     new["timestamp"] = pd.to_datetime(new["timestamp"], unit="ms")
 
-    df = pd.concat([df, new])
-
-    df = df.drop_duplicates("timestamp")
+    # since=last_ts refetches the last stored bar; the new copy is the closed one
+    df = repair(pd.concat([df, new]))
 
-    df = df.sort_values("timestamp")
-
-    df.to_parquet(path)
+    save_base(df, path)
 
     print("Dataset updated")
 
+    filled, first = fill_gaps(exchange, symbol, timeframe)
+    if filled:
+        print("Filled", filled, "missing candles")
+    return first
+
 
 def main():
 
     while True:
 
-        sync("BTC/USDT", "5m")
+        first = sync("BTC/USDT")
+        refresh_derived("BTC/USDT", since=first)
 
         time.sleep(3600)
 
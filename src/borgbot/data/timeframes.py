@@ -0,0 +1,47 @@
+import re
+
+# the only timeframe fetched from the exchange; everything else is resampled from it
+BASE_TIMEFRAME = "1m"
+
+TF_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "12h": 43_200_000, "1d": 86_400_000,
+}
+UNIT_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def timeframe_ms(timeframe: str) -> int:
+    if timeframe in TF_MS:
+        return TF_MS[timeframe]
+    m = re.fullmatch(r"(\d+)([mhdw])", timeframe)
+    if not m:
+        raise ValueError(f"Unknown timeframe {timeframe!r}")
+    return int(m.group(1)) * UNIT_MS[m.group(2)]
+
+
+def parse_spec(spec: str):
+    """"1h:sma_50,rsi_14;4h:atr_14" -> {"1h": ["sma_50", "rsi_14"], "4h": ["atr_14"]}."""
+    out = {}
+    for part in filter(None, (p.strip() for p in spec.split(";"))):
+        tf, _, names = part.partition(":")
+        out[tf.strip()] = [n.strip() for n in names.split(",") if n.strip()]
+    return out
+
+
+def merge_specs(*specs):
+    out = {}
+    for spec in specs:
+        for tf, names in (spec or {}).items():
+            out.setdefault(tf, [])
+            out[tf] += [n for n in names if n not in out[tf]]
+    return out
+
+
+def timestamps_ms(candles):
+    import numpy as np  # keeps this module cheap for CLI argument defaults
+
+    ts = np.asarray(candles["timestamp"])
+    if np.issubdtype(ts.dtype, np.datetime64):
+        return ts.astype("datetime64[ms]").view(np.int64)
+    return ts.astype(np.int64, copy=False)
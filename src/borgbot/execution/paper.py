@@ -1,12 +1,14 @@
 import time
 from borgbot.execution.base import ExecutionAdapter
-from borgbot.state.store import get_position, set_position, add_trade
+from borgbot.infra.metrics import NULL_METRICS
 
 
 class PaperExecutionAdapter(ExecutionAdapter):
-    def __init__(self, conn, logger, fees_bps: float, slippage_pct: float):
-        self.conn = conn
+    def __init__(self, state, logger, fees_bps: float, slippage_pct: float, metrics=None):
+        # state is a borgbot.state.store.StateStore; fills are persisted on its next flush()
+        self.state = state
         self.logger = logger
+        self.metrics = metrics or NULL_METRICS
         self.fee_rate = fees_bps / 10_000.0
         self.slippage_pct = slippage_pct
 
@@ -18,11 +20,12 @@ class PaperExecutionAdapter(ExecutionAdapter):
 
     def execute_order(self, side: str, qty: float, price: float):
         if qty <= 0:
+            self.metrics.inc("orders_skipped", reason="invalid_qty")
             self.logger.info("paper.skip_invalid_qty", qty=qty)
             return
 
         ts = int(time.time() * 1000)
-        base_qty, cash, avg_price = get_position(self.conn)
+        base_qty, cash, avg_price = self.state.get_position()
 
         px = self._apply_slippage(price, side)
         notional = qty * px
@@ -30,6 +33,7 @@ class PaperExecutionAdapter(ExecutionAdapter):
 
         if side == "buy":
             if cash < notional:
+                self.metrics.inc("orders_skipped", reason="no_cash")
                 self.logger.info("paper.skip_no_cash", cash=cash)
                 return
 
@@ -41,6 +45,7 @@ class PaperExecutionAdapter(ExecutionAdapter):
 
         elif side == "sell":
             if base_qty < qty:
+                self.metrics.inc("orders_skipped", reason="no_position")
                 self.logger.info("paper.skip_no_position", base_qty=base_qty)
                 return
 
@@ -52,8 +57,9 @@ class PaperExecutionAdapter(ExecutionAdapter):
         else:
             return
 
-        set_position(self.conn, base_after, cash_after, avg_price)
-        add_trade(self.conn, ts, side, qty, px, fee, cash_after, base_after)
+        self.state.set_position(base_after, cash_after, avg_price)
+        self.state.add_trade(ts, side, qty, px, fee, cash_after, base_after)
+        self.metrics.inc("orders_filled", side=side)
 
         self.logger.info(
             f"paper.{side}",
@@ -3,6 +3,8 @@ import pandas as pd
 
 def rsi(series, period=14):
 
+    series = pd.Series(series)  # CandleArray columns are plain arrays
+
     delta = series.diff()
 
     gain = delta.clip(lower=0)
@@ -1,7 +1,34 @@
 from typing import List
 
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
 def sma(values: List[float], period: int) -> float:
     if len(values) < period:
         return 0.0
 
-    return sum(values[-period:]) / period
\ No newline at end of file
+    return sum(values[-period:]) / period
+
+def trailing_sma(values, period: int) -> np.ndarray:
+    """
+    sma(values[:i], period) for every i, in one pass.
+
+    Agrees with the per-bar sma() to float rounding, not bit for bit: NumPy
+    sums each window pairwise, sma() left to right. Each window is summed on
+    its own (no running sum), so the difference stays at rounding level on
+    long series instead of accumulating.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.zeros(len(values))
+    if len(values) >= period:
+        out[period:] = sliding_window_view(values, period)[:-1].sum(axis=1) / period
+    return out
+
+def rolling_sma(values, period: int) -> np.ndarray:
+    """
+    Mean of each bar and the period - 1 before it, NaN until there are
+    enough bars: the sma_N columns build_indicator_cache stores.
+    """
+    import pandas as pd
+
+    return pd.Series(np.asarray(values, dtype=np.float64)).rolling(period).mean().to_numpy()
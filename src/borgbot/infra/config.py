@@ -1,8 +1,9 @@
 # src/borgbot/infra/config.py
 import os
 import yaml
-from typing import Any, Dict
+from typing import Any, Dict, List
 from pydantic import BaseModel, Field
+from borgbot.data.timeframes import parse_spec
 
 class RiskConfig(BaseModel):
     daily_max_loss_pct: float = 0.05
@@ -21,6 +22,7 @@ class Settings(BaseModel):
     fees_bps: float = 10.0
     slippage_pct: float = 0.0005
     starting_cash: float = 1000.0
+    higher_tf: Dict[str, List[str]] = Field(default_factory=dict)  # {"1h": ["sma_50"]}
     risk: RiskConfig = Field(default_factory=RiskConfig)
 
 def _to_int(v, default): 
@@ -41,6 +43,8 @@ def _apply_env_overrides(cfg: Dict[str, Any]) -> Dict[str, Any]:
     cfg['fees_bps']      = _to_float(os.environ.get('FEES_BPS'),      cfg.get('fees_bps', 10.0))
     cfg['slippage_pct']  = _to_float(os.environ.get('SLIPPAGE_PCT'),  cfg.get('slippage_pct', 0.0005))
     cfg['starting_cash'] = _to_float(os.environ.get('STARTING_CASH'), cfg.get('starting_cash', 1000.0))
+    if os.environ.get('HIGHER_TF'):
+        cfg['higher_tf'] = parse_spec(os.environ['HIGHER_TF'])  # "1h:sma_50,rsi_14;4h:atr_14"
 
     risk = cfg.get('risk', {}) or {}
     risk['daily_max_loss_pct'] = _to_float(os.environ.get('RISK_DAILY_MAX_LOSS_PCT'), risk.get('daily_max_loss_pct', 0.05))
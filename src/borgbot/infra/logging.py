@@ -1,25 +1,143 @@
-import logging, sys, os
-from logging.handlers import RotatingFileHandler
+import atexit, fnmatch, logging, os, queue, sys, time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import structlog
 
 LOG_PATH = os.environ.get("LOG_PATH", "/app/logs/borg.jsonl")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# "event=N": keep 1 in N lines of that event, e.g. "paper.skip_*=10"
+LOG_SAMPLE = os.environ.get("LOG_SAMPLE", "")
+# "event=seconds": at most one line per window, e.g. "risk.pause_outside_window=60"
+LOG_RATE_LIMIT = os.environ.get("LOG_RATE_LIMIT", "risk.pause_outside_window=60,paper.skip_*=60")
+
+_listener = None
+
+
+def _parse_rules(spec: str, cast):
+    rules = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        key, _, value = part.partition("=")
+        rules[key.strip()] = cast(value)
+    return rules
+
+
+class EventThrottle:
+    """
+    structlog processor: per-event sampling and rate limiting.
+
+    Runs first in the chain so dropped events cost a dict lookup. Warnings
+    and errors always pass. The next line that does go out for a throttled
+    event carries `suppressed=<n>`.
+    """
+
+    def __init__(self, sample=None, rate_limit=None, clock=time.monotonic):
+        self.sample = sample or {}
+        self.rate_limit = rate_limit or {}
+        self.clock = clock
+        self._rules = {}     # event -> (every_n, window_s), resolved once per event name
+        self._seen = {}
+        self._last = {}
+        self._suppressed = {}
+
+    def _rule(self, event):
+        rule = self._rules.get(event)
+        if rule is None:
+            every = next((n for pat, n in self.sample.items() if fnmatch.fnmatchcase(event, pat)), 1)
+            window = next((s for pat, s in self.rate_limit.items() if fnmatch.fnmatchcase(event, pat)), 0.0)
+            rule = self._rules[event] = (max(1, int(every)), float(window))
+        return rule
+
+    def __call__(self, logger, method_name, event_dict):
+        if method_name not in ("debug", "info"):
+            return event_dict
+
+        event = event_dict.get("event")
+        every, window = self._rule(event)
+        if every == 1 and window == 0.0:
+            return event_dict
+
+        seen = self._seen[event] = self._seen.get(event, 0) + 1
+        keep = (seen - 1) % every == 0
+        if keep and window:
+            now = self.clock()
+            last = self._last.get(event)
+            keep = last is None or now - last >= window
+            if keep:
+                self._last[event] = now
+
+        if not keep:
+            self._suppressed[event] = self._suppressed.get(event, 0) + 1
+            raise structlog.DropEvent
+
+        dropped = self._suppressed.pop(event, 0)
+        if dropped:
+            event_dict["suppressed"] = dropped
+        return event_dict
+
+
+class _DeferredQueueHandler(QueueHandler):
+    # the stock prepare() formats on the caller's thread; leave that to the listener
+    def prepare(self, record):
+        return record
+
+
+class _JSONFormatter(structlog.stdlib.ProcessorFormatter):
+    # render once per record even though stdout and the file both format it
+    def format(self, record):
+        line = getattr(record, "_borg_line", None)
+        if line is None:
+            line = record._borg_line = super().format(record)
+        return line
+
+
+def shutdown_logging():
+    """Drain the queue and stop the listener thread; registered with atexit."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
 def configure_logging(run_id: str | None = None):
-    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    global _listener
+    shutdown_logging()
+
+    level = logging.getLevelName(LOG_LEVEL)
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    formatter = _JSONFormatter(
+        processor=structlog.processors.JSONRenderer(),
+        foreign_pre_chain=[structlog.processors.add_log_level, structlog.processors.TimeStamper(fmt="iso")],
+    )
+    sh = logging.StreamHandler(sys.stdout)
     fh = RotatingFileHandler(LOG_PATH, maxBytes=5_000_000, backupCount=3)
-    fh.setLevel(logging.INFO); fh.setFormatter(logging.Formatter("%(message)s"))
-    root = logging.getLogger(); root.addHandler(fh)
+    for h in (sh, fh):
+        h.setLevel(level); h.setFormatter(formatter)
+
+    # callers only enqueue; rendering and I/O happen on the listener thread
+    q = queue.SimpleQueue()
+    _listener = QueueListener(q, sh, fh, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers = [_DeferredQueueHandler(q)]
+    root.setLevel(level)
 
     structlog.configure(
-        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+        wrapper_class=structlog.make_filtering_bound_logger(level),
         processors=[
+            EventThrottle(_parse_rules(LOG_SAMPLE, int), _parse_rules(LOG_RATE_LIMIT, float)),
             structlog.processors.add_log_level,
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
-            structlog.processors.JSONRenderer(),
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
         logger_factory=structlog.stdlib.LoggerFactory(),
+        cache_logger_on_first_use=True,
     )
     log = structlog.get_logger("borg")
     return log.bind(run_id=run_id) if run_id else log
+
+
+atexit.register(shutdown_logging)
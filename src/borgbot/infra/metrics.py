@@ -0,0 +1,195 @@
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# seconds; covers a sub-ms signal up to a slow exchange fetch
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float, counts=None):
+        """Bucket-interpolated quantile (Prometheus histogram_quantile semantics)."""
+        counts = counts or self.counts
+        total = sum(counts)
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lo = self.buckets[i - 1] if i else 0.0
+                return lo + (self.buckets[i] - lo) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+
+class _Timer:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0)
+        return False
+
+
+class Metrics:
+    """
+    Per-bot stage latency histograms and event counters.
+
+    Exposed as Prometheus text (render_prometheus / serve_metrics) and as a
+    windowed summary for the periodic `metrics.stats` log event (stats()).
+    The runner adds stages and counters while the HTTP thread renders them,
+    so both dicts change under _lock and readers iterate a copy.
+    """
+
+    def __init__(self, bot: str, buckets=DEFAULT_BUCKETS):
+        self.bot = bot
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = {}
+        self._window = {}
+        self._lock = threading.Lock()
+
+    def _hist(self, stage):
+        h = self.histograms.get(stage)
+        if h is None:
+            with self._lock:
+                h = self.histograms.setdefault(stage, Histogram(self.buckets))
+        return h
+
+    def time(self, stage: str):
+        return _Timer(self._hist(stage))
+
+    def observe(self, stage: str, seconds: float):
+        self._hist(stage).observe(seconds)
+
+    def inc(self, name: str, n: int = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def _snapshot(self):
+        with self._lock:
+            return list(self.histograms.items()), list(self.counters.items())
+
+    def stats(self):
+        """p50/p99 per stage since the previous call, plus cumulative counters."""
+        histograms, counter_items = self._snapshot()
+        stages = {}
+        for stage, h in histograms:
+            now = list(h.counts)
+            prev = self._window.get(stage) or [0] * len(now)
+            counts = [c - p for c, p in zip(now, prev)]
+            self._window[stage] = now
+            n = sum(counts)
+            if n:
+                stages[stage] = {
+                    "n": n,
+                    "p50_ms": round(h.quantile(0.5, counts) * 1000, 3),
+                    "p99_ms": round(h.quantile(0.99, counts) * 1000, 3),
+                }
+        counters = {}
+        for (name, labels), v in counter_items:
+            key = name + "".join(f".{lv}" for _, lv in labels)
+            counters[key] = v
+        return {"stages": stages, "counters": counters}
+
+    def render_prometheus(self) -> str:
+        bot = self.bot
+        histograms, counter_items = self._snapshot()
+        lines = [
+            "# HELP borg_stage_seconds Latency of one trading-loop stage.",
+            "# TYPE borg_stage_seconds histogram",
+        ]
+        for stage, h in sorted(histograms, key=lambda kv: kv[0]):
+            labels = f'bot="{bot}",stage="{stage}"'
+            cum = 0
+            for le, c in zip(h.buckets, h.counts):
+                cum += c
+                lines.append(f'borg_stage_seconds_bucket{{{labels},le="{le}"}} {cum}')
+            lines.append(f'borg_stage_seconds_bucket{{{labels},le="+Inf"}} {h.count}')
+            lines.append(f"borg_stage_seconds_sum{{{labels}}} {h.sum}")
+            lines.append(f"borg_stage_seconds_count{{{labels}}} {h.count}")
+
+        seen = set()
+        for (name, labels), v in sorted(counter_items):
+            if name not in seen:
+                lines.append(f"# TYPE borg_{name}_total counter")
+                seen.add(name)
+            extra = "".join(f',{k}="{lv}"' for k, lv in labels)
+            lines.append(f'borg_{name}_total{{bot="{bot}"{extra}}} {v}')
+        return "\n".join(lines) + "\n"
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullMetrics:
+    """Drop-in for Metrics when instrumentation is off."""
+
+    _timer = _NullTimer()
+
+    def time(self, stage):
+        return self._timer
+
+    def observe(self, stage, seconds):
+        pass
+
+    def inc(self, name, n=1, **labels):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def serve_metrics(metrics: Metrics, port: int, host: str = "127.0.0.1"):
+    """Serve GET /metrics in a daemon thread; returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
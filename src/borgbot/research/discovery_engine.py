@@ -1,44 +1,30 @@
 import argparse
-import sqlite3
 import uuid
 import datetime
-import os
-from multiprocessing import Pool
 
-from borgbot.data.loader import load_data
-from borgbot.data.indicator_cache import build_indicator_cache
-from borgbot.backtest.engine import BacktestEngine
-from borgbot.strategies.sma import SMAStrategy
-from borgbot.strategies.rsi import RSIStrategy
-from borgbot.strategies.stack import StrategyStack
-from borgbot.research.walkforward_core import run_walkforward
+from borgbot.research import profiling, resources
+from borgbot.research.pool import worker_executor
+from borgbot.research.store import (
+    get_conn,
+    create_job,
+    load_job,
+    pending_tasks,
+    task_results,
+    mark_task_done,
+    complete_job,
+)
 
 SCORING_MODE = "balanced"
 
-DB_PATH = "/app/research/research.db"
+DATA_START, DATA_END = "2022-01-01", "2026-01-01"
+
+# job arguments restored by --resume
+JOB_ARGS = ("symbol", "tf", "scoring", "timestamp")
 
 # Shared across workers
 GLOBAL_CANDLES = None
 
 
-# ---------------------------
-# RESOURCE CONTROL
-# ---------------------------
-def resolve_workers(mode: str) -> int:
-    cpu = os.cpu_count() or 1
-
-    if mode == "low":
-        return 1
-    elif mode == "medium":
-        return min(4, cpu)
-    elif mode == "high":
-        return max(1, int(cpu * 0.7))
-    elif mode == "max":
-        return max(1, cpu - 1)
-    else:
-        return 1
-
-
 # ---------------------------
 # INIT WORKER (memory fix)
 # ---------------------------
@@ -47,33 +33,6 @@ def init_worker(candles):
     GLOBAL_CANDLES = candles
 
 
-# ---------------------------
-# STRATEGY FACTORY
-# ---------------------------
-def build_strategy(config):
-    strategies = []
-
-    if config["type"] == "sma":
-        strategies.append(
-            (SMAStrategy({"fast": config["fast"], "slow": config["slow"]}), 1.0)
-        )
-
-    elif config["type"] == "rsi":
-        strategies.append(
-            (RSIStrategy({"period": config["period"]}), 1.0)
-        )
-
-    elif config["type"] == "sma_rsi":
-        strategies.append(
-            (SMAStrategy({"fast": config["fast"], "slow": config["slow"]}), 0.5)
-        )
-        strategies.append(
-            (RSIStrategy({"period": config["period"]}), 0.5)
-        )
-
-    return StrategyStack(strategies)
-
-
 # ---------------------------
 # SCORING FUNCTION
 # ---------------------------
@@ -106,12 +65,24 @@ def score_walkforward(metrics, mode="balanced"):
 
 
 def run_task(config):
+    return evaluate(config, GLOBAL_CANDLES, SCORING_MODE)
+
+
+def evaluate(config, candles, scoring=SCORING_MODE):
+    """
+    Walk-forward score of one config; None without enough history for a
+    fold. Configs too unstable to deploy come back with "filtered" set:
+    they are not ranked, but their score still counts in their neighbors'
+    stability.
+    """
+    from borgbot.research.robustness import confidence
+    from borgbot.research.walkforward_core import run_walkforward
+
     print(f"Running config: {config}")
-    global GLOBAL_CANDLES
 
     wf = run_walkforward(
         config=config,
-        candles=GLOBAL_CANDLES,
+        candles=candles,
         train_months=12,
         test_months=3,
     )
@@ -120,13 +91,9 @@ def run_task(config):
         return None
 
     metrics = wf["metrics"]
-    # 🚨 FILTER BAD STRATEGIES
-    if metrics["roi_std"] > 10:
-        return None
+    score = score_walkforward(metrics, mode=scoring)
 
-    score = score_walkforward(metrics, mode=SCORING_MODE)
-
-    return {
+    result = {
         "config": config,
         "roi": metrics["roi_median"],
         "drawdown": metrics["drawdown_max"],
@@ -134,13 +101,43 @@ def run_task(config):
         "roi_std": metrics["roi_std"],
     }
 
+    # 🚨 FILTER BAD STRATEGIES
+    if metrics["roi_std"] > 10:
+        result["filtered"] = "roi_std"
+        return result
+
+    # ROI / drawdown intervals from resampling the out-of-sample trades
+    mc = confidence(wf["returns"])
+    if mc is not None:
+        result.update(mc)
+
+    return result
+
+
+def print_result(r):
+    line = (
+        f"{r['config']} ROI {r['roi']:.2f}% "
+        f"DD {r['drawdown']:.2f} "
+        f"STD {r['roi_std']:.2f} "
+        f"Score {r['score']:.2f}"
+    )
+    if "stable_score" in r:
+        line += f" Stable {r['stable_score']:.2f}"
+    if "mc_roi_lo" in r:
+        line += (
+            f" | MC ROI [{r['mc_roi_lo']:.2f}, {r['mc_roi_hi']:.2f}]% "
+            f"DD {r['mc_dd_hi']:.2f} P(loss) {r['mc_p_loss']:.0%}"
+        )
+    print(line)
+
 
 # ---------------------------
 # SAVE RESULTS
 # ---------------------------
-def save_results(rows, symbol, timeframe):
+def save_result(experiment_id, timestamp, symbol, timeframe, task, r):
+    """One finished task: its result row (if it passed the filter) and done mark, in one commit."""
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_conn()
     cur = conn.cursor()
 
     cur.execute(
@@ -159,10 +156,7 @@ def save_results(rows, symbol, timeframe):
     """
     )
 
-    experiment_id = str(uuid.uuid4())[:8]
-    timestamp = datetime.datetime.utcnow().isoformat()
-
-    for r in rows:
+    if r is not None and not r.get("filtered"):
         cur.execute(
             "INSERT INTO discovery_results VALUES (?,?,?,?,?,?,?,?,?)",
             (
@@ -173,42 +167,21 @@ def save_results(rows, symbol, timeframe):
                 str(r["config"]),
                 r["roi"],
                 r["drawdown"],
-                r["roi_std"],
                 r["score"],
+                r["roi_std"],
             ),
         )
 
+    mark_task_done(cur, experiment_id, task, r)
+
     conn.commit()
     conn.close()
 
 
 # ---------------------------
-# MAIN
+# PARAMETER SPACE
 # ---------------------------
-def main():
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--scoring", default="balanced")
-    parser.add_argument("--symbol", required=True)
-    parser.add_argument("--tf", required=True)
-    parser.add_argument("--resources", default="low")
-
-    args = parser.parse_args()
-
-    global SCORING_MODE
-    SCORING_MODE = args.scoring
-
-    # LOAD DATA ONCE
-    candles = load_data(
-        symbol=args.symbol,
-        timeframe=args.tf,
-        start="2022-01-01",
-        end="2026-01-01",
-    )
-
-    candles = build_indicator_cache(candles)
-
-    # PARAMETER SPACE
+def parameter_space():
     configs = []
 
     # SMA
@@ -224,14 +197,14 @@ def main():
     # RSI
     for period in range(10, 21):
         for ob in [65, 70, 75]:
-            for os in [25, 30, 35]:
+            for oversold in [25, 30, 35]:
                 for trend in [50, 100]:
-                    if os < ob:
+                    if oversold < ob:
                         configs.append({
                             "type": "rsi",
                             "period": period,
                             "overbought": ob,
-                            "oversold": os,
+                            "oversold": oversold,
                             "trend_period": trend,
                         })
 
@@ -246,25 +219,104 @@ def main():
                         "slow": slow,
                         "period": period,
                     })
-    
+
     # LIMIT CONFIGS FOR TESTING
-    configs = [c for c in configs if c["type"] != "sma"][:10]
-    
-    workers = resolve_workers(args.resources)
+    return [c for c in configs if c["type"] != "sma"][:10]
+
+
+# ---------------------------
+# MAIN
+# ---------------------------
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scoring", default="balanced")
+    parser.add_argument("--symbol")
+    parser.add_argument("--tf")
+    parser.add_argument("--resources", default="low")
+    parser.add_argument("--resume", metavar="EXPERIMENT_ID", help="finish an interrupted sweep")
+    parser.add_argument("--queue", action="store_true", help="hand tasks to research workers via the job queue")
+    profiling.add_arguments(parser)
+
+    args = parser.parse_args()
 
-    print(f"\nRunning {len(configs)} strategies with {workers} workers\n")
+    if args.resume:
+        job = load_job(args.resume)
+        if job is None or job[0] != "discovery":
+            parser.error(f"no discovery sweep stored for experiment {args.resume}")
+        vars(args).update(job[1])
+        experiment_id = args.resume
+    elif not (args.symbol and args.tf):
+        parser.error("--symbol and --tf are required unless resuming")
+
+    global SCORING_MODE
+    SCORING_MODE = args.scoring
 
-    # SINGLE THREAD
-    if workers == 1:
-        init_worker(candles)
-        results = [run_task(cfg) for cfg in configs]
+    from borgbot.data.loader import RESEARCH_DTYPE, load_candles
+    from borgbot.data.indicator_cache import build_indicator_cache
 
-    # MULTIPROCESS
-    else:
-        with Pool(workers, initializer=init_worker, initargs=(candles,)) as pool:
-            results = pool.map(run_task, configs)
+    prof = profiling.from_args(args, "discovery")
 
-    results = [r for r in results if r is not None]
+    if not args.resume:
+        experiment_id = str(uuid.uuid4())[:8]
+        args.timestamp = datetime.datetime.utcnow().isoformat()
+        create_job(experiment_id, "discovery", {k: getattr(args, k) for k in JOB_ARGS}, parameter_space())
+
+    pending = pending_tasks(experiment_id)
+
+    if pending and args.queue:
+        print(f"\nExperiment {experiment_id}: queueing {len(pending)} strategies for research workers\n")
+        _run_on_queue(prof, experiment_id, args, pending)
+
+    elif pending:
+        # LOAD DATA ONCE
+        with prof.stage("load"):
+            candles = load_candles(
+                symbol=args.symbol,
+                timeframe=args.tf,
+                start=DATA_START,
+                end=DATA_END,
+                dtype=RESEARCH_DTYPE,
+            )
+
+            candles = build_indicator_cache(candles)
+
+        plan = resources.plan(args.resources, candles, len(pending))
+        print(f"\nExperiment {experiment_id}: running {len(pending)} strategies on {plan}\n")
+
+        task = prof.wrap(run_task)
+        configs = [cfg for _, cfg in pending]
+
+        try:
+            # SINGLE THREAD
+            if plan.workers == 1:
+                init_worker(candles)
+                results = enumerate(task(cfg) for cfg in configs)
+                _save_as_completed(prof, experiment_id, args, pending, results)
+
+            # MULTIPROCESS
+            else:
+                prof.measure_pickle(candles, plan.workers)
+                with worker_executor(plan.workers, initializer=init_worker, initargs=(candles,)) as executor:
+                    results = resources.run_adaptive(executor, task, configs, plan)
+                    _save_as_completed(prof, experiment_id, args, pending, results)
+        except BaseException:
+            print(f"\nSweep interrupted; continue with --resume {experiment_id}")
+            raise
+
+    if not pending_tasks(experiment_id):
+        complete_job(experiment_id)
+
+    scored = [r for r in task_results(experiment_id) if r is not None]
+
+    # NEIGHBORHOOD STABILITY (a lucky config among bad neighbors scores low);
+    # filtered configs stay in the cube so a spike among rejects isn't "stable"
+    from borgbot.research.stability import HEATMAP_DIR, annotate, write_heatmaps
+
+    cubes = annotate(scored)
+    results = [r for r in scored if not r.get("filtered")]
+    heatmaps = write_heatmaps(cubes, f"discovery_{experiment_id}")
+    print(f"\n{len(heatmaps)} parameter heatmaps written to {HEATMAP_DIR}")
 
     # SORT RESULTS
     results.sort(key=lambda x: x["score"], reverse=True)
@@ -275,12 +327,7 @@ def main():
     print("\nDeployable strategies:\n")
 
     for r in selected:
-        print(
-            f"{r['config']} ROI {r['roi']:.2f}% "
-            f"DD {r['drawdown']:.2f} "
-            f"STD {r['roi_std']:.2f} "
-            f"Score {r['score']:.2f}"
-        )
+        print_result(r)
 
     import json
 
@@ -290,15 +337,49 @@ def main():
     print("\nTop strategies:\n")
 
     for r in results[:10]:
-        print(
-            f"{r['config']} ROI {r['roi']:.2f}% "
-            f"DD {r['drawdown']:.2f} "
-            f"STD {r['roi_std']:.2f} "
-            f"Score {r['score']:.2f}"
-        )
+        print_result(r)
+
+    prof.finish(experiment_id)
+
+
+def _run_on_queue(prof, experiment_id, args, pending):
+    from borgbot.research import jobqueue
+
+    conn = jobqueue.connect()
+    dataset = {"symbol": args.symbol, "timeframe": args.tf, "start": DATA_START, "end": DATA_END}
+    jobqueue.enqueue(
+        conn, experiment_id, "discovery",
+        [(task_id, {"config": cfg, "dataset": dataset, "scoring": args.scoring}) for task_id, cfg in pending],
+    )
+
+    waiting = {task_id for task_id, _ in pending}
+
+    def on_result(task_id, status, value):
+        if task_id not in waiting:
+            return  # stored by an earlier run that stopped before acknowledging it
+        if status != "done":
+            print(f"Task {task_id} failed on every attempt; --resume {experiment_id} queues it again")
+            return
+        with prof.stage("db"):
+            save_result(experiment_id, args.timestamp, args.symbol, args.tf, task_id, value)
+
+    try:
+        jobqueue.drain(conn, experiment_id, on_result)
+    except BaseException:
+        print(f"\nStopped waiting; workers keep going, collect with --resume {experiment_id}")
+        raise
+    finally:
+        conn.close()
+
 
-    save_results(results, args.symbol, args.tf)
+def _save_as_completed(prof, experiment_id, args, pending, results):
+    # (index into pending, result) pairs, saved as soon as each is ready
+    for i, r in results:
+        task_id = pending[i][0]
+        r = prof.take(r)
+        with prof.stage("db"):
+            save_result(experiment_id, args.timestamp, args.symbol, args.tf, task_id, r)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
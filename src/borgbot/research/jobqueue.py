@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+# On the shared research volume so workers on other hosts see the same queue
+QUEUE_DB = os.environ.get("QUEUE_DB", "/app/research/queue.db")
+# a leased task that isn't finished or extended within this long goes back to the queue
+LEASE_SECONDS = float(os.environ.get("LEASE_SECONDS", "600"))
+# runs per task (first try included) before it is marked failed
+MAX_ATTEMPTS = int(os.environ.get("MAX_ATTEMPTS", "3"))
+
+DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS job_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        experiment_id TEXT NOT NULL,
+        task INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        lease_owner TEXT,
+        lease_expires REAL,
+        result TEXT,
+        error TEXT,
+        collected INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL,
+        UNIQUE (experiment_id, task)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_queue_status ON job_queue(status, id)",
+]
+
+
+def connect(path=None):
+    """
+    Queue connection. Rollback journal rather than WAL: WAL's shared memory
+    only works between processes on one host, and workers may be on several.
+    """
+    path = path or QUEUE_DB
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    for ddl in DDL:
+        conn.execute(ddl)
+    return conn
+
+
+def enqueue(conn, experiment_id, kind, tasks):
+    """
+    Add [(task, payload)] for an experiment. Tasks already queued are left
+    alone, except failed ones, which get a fresh set of attempts, and done
+    ones, which are handed to the coordinator again: it only lists tasks
+    whose result it hasn't stored.
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany(
+        "INSERT OR IGNORE INTO job_queue(experiment_id, task, kind, payload, updated_at) VALUES (?,?,?,?,?)",
+        [(str(experiment_id), task, kind, json.dumps(payload), now) for task, payload in tasks],
+    )
+    conn.executemany(
+        "UPDATE job_queue SET collected=0 WHERE experiment_id=? AND task=? AND status='done'",
+        [(str(experiment_id), task) for task, _ in tasks],
+    )
+    conn.execute(
+        "UPDATE job_queue SET status='pending', attempts=0, error=NULL, collected=0, updated_at=? "
+        "WHERE experiment_id=? AND status='failed'",
+        (now, str(experiment_id)),
+    )
+    conn.execute("COMMIT")
+
+
+def lease(conn, worker, lease_s=None, max_attempts=None):
+    """
+    Claim the oldest runnable task for `worker`: pending, or leased by a
+    worker whose lease ran out. Returns a dict or None when nothing is runnable.
+    """
+    lease_s = LEASE_SECONDS if lease_s is None else lease_s
+    max_attempts = max_attempts or MAX_ATTEMPTS
+    now = time.time()
+
+    conn.execute("BEGIN IMMEDIATE")  # one writer at a time, so two workers never claim the same row
+    try:
+        # expired leases that already used every attempt are given up on
+        conn.execute(
+            "UPDATE job_queue SET status='failed', error=COALESCE(error, 'lease expired'), updated_at=? "
+            "WHERE status='leased' AND lease_expires < ? AND attempts >= ?",
+            (now, now, max_attempts),
+        )
+        row = conn.execute(
+            "SELECT id, experiment_id, task, kind, payload, attempts FROM job_queue "
+            "WHERE status='pending' OR (status='leased' AND lease_expires < ?) ORDER BY id LIMIT 1",
+            (now,),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE job_queue SET status='leased', lease_owner=?, lease_expires=?, attempts=attempts+1, "
+            "updated_at=? WHERE id=?",
+            (worker, now + lease_s, now, row[0]),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+    return {
+        "id": row[0], "experiment_id": row[1], "task": row[2], "kind": row[3],
+        "payload": json.loads(row[4]), "attempt": row[5] + 1,
+    }
+
+
+def extend(conn, job_id, worker, lease_s=None):
+    """Push the lease out again; False if the task no longer belongs to `worker`."""
+    lease_s = LEASE_SECONDS if lease_s is None else lease_s
+    now = time.time()
+    cur = conn.execute(
+        "UPDATE job_queue SET lease_expires=?, updated_at=? WHERE id=? AND lease_owner=? AND status='leased'",
+        (now + lease_s, now, job_id, worker),
+    )
+    return cur.rowcount == 1
+
+
+def complete(conn, job_id, worker, result):
+    """
+    Store a result. Only the current lease holder may: a worker whose lease
+    expired and was handed to someone else gets False and its result is dropped.
+    """
+    cur = conn.execute(
+        "UPDATE job_queue SET status='done', result=?, lease_expires=NULL, updated_at=? "
+        "WHERE id=? AND lease_owner=? AND status='leased'",
+        (json.dumps(result), time.time(), job_id, worker),
+    )
+    return cur.rowcount == 1
+
+
+def fail(conn, job_id, worker, error, max_attempts=None):
+    """Hand a task back for a retry, or mark it failed once it used all its attempts."""
+    max_attempts = max_attempts or MAX_ATTEMPTS
+    cur = conn.execute(
+        "UPDATE job_queue SET status=CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+        "error=?, lease_owner=NULL, lease_expires=NULL, updated_at=? "
+        "WHERE id=? AND lease_owner=? AND status='leased'",
+        (max_attempts, error, time.time(), job_id, worker),
+    )
+    return cur.rowcount == 1
+
+
+def collect(conn, experiment_id):
+    """
+    Finished tasks the coordinator hasn't acknowledged, as
+    [(job_id, task, status, result_or_error)]. They are returned again
+    until ack()'d, so a coordinator that dies before storing one loses nothing.
+    """
+    rows = conn.execute(
+        "SELECT id, task, status, result, error FROM job_queue "
+        "WHERE experiment_id=? AND status IN ('done', 'failed') AND collected=0 ORDER BY task",
+        (str(experiment_id),),
+    ).fetchall()
+    return [
+        (job_id, task, status, json.loads(result) if status == "done" and result is not None else error)
+        for job_id, task, status, result, error in rows
+    ]
+
+
+def ack(conn, job_ids):
+    """Mark collected results as stored by the coordinator."""
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany("UPDATE job_queue SET collected=1 WHERE id=?", [(i,) for i in job_ids])
+    conn.execute("COMMIT")
+
+
+def counts(conn, experiment_id=None):
+    query = "SELECT status, COUNT(*) FROM job_queue"
+    params = ()
+    if experiment_id is not None:
+        query += " WHERE experiment_id=?"
+        params = (str(experiment_id),)
+    return dict(conn.execute(query + " GROUP BY status", params).fetchall())
+
+
+def drain(conn, experiment_id, on_result, poll_s=2.0):
+    """
+    Coordinator side: call on_result(task, status, value) for every task of
+    the experiment as workers finish it, until none is pending or leased.
+    Each result is acknowledged only after on_result returns.
+    """
+    while True:
+        for job_id, task, status, value in collect(conn, experiment_id):
+            on_result(task, status, value)
+            ack(conn, [job_id])
+        c = counts(conn, experiment_id)
+        if not c.get("pending") and not c.get("leased"):
+            for job_id, task, status, value in collect(conn, experiment_id):
+                on_result(task, status, value)
+                ack(conn, [job_id])
+            return
+        time.sleep(poll_s)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Inspect the research job queue")
+    parser.add_argument("--db", default=QUEUE_DB)
+    parser.add_argument("--experiment")
+    parser.add_argument("--errors", action="store_true", help="show the last error of failed tasks")
+
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    print(counts(conn, args.experiment))
+
+    if args.errors:
+        query = "SELECT experiment_id, task, attempts, error FROM job_queue WHERE status='failed'"
+        params = ()
+        if args.experiment:
+            query += " AND experiment_id=?"
+            params = (args.experiment,)
+        for exp, task, attempts, error in conn.execute(query, params):
+            print(f"{exp} task {task} after {attempts} attempts: {(error or '').strip().splitlines()[-1:]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,37 @@
 import argparse
-import os
-from concurrent.futures import ProcessPoolExecutor
-from borgbot.data.indicator_cache import build_indicator_cache
-from borgbot.data.loader import load_data
-from borgbot.backtest.engine import BacktestEngine
-from borgbot.strategies.sma import SMAStrategy
 
+from . import profiling, resources
 from .grid import generate_sma_grid
+from .pool import worker_executor
 from .store import (
     init_db,
     create_experiment,
-    insert_result,
     complete_experiment,
+    create_job,
+    load_job,
+    pending_tasks,
+    task_results,
+    insert_task_result,
+    complete_job,
 )
 from .ranking import compute_score
 
 
-def resolve_workers(resource_mode, explicit_workers):
+# set once per worker by init_worker instead of pickled with every task
+WORKER_CANDLES = None
 
-    if explicit_workers:
-        return explicit_workers
 
-    cpu = os.cpu_count()
+def init_worker(candles):
+    global WORKER_CANDLES
+    WORKER_CANDLES = candles
 
-    mapping = {
-        "low": 1,
-        "medium": min(2, cpu),
-        "high": min(4, cpu),
-        "max": max(1, cpu - 1),
-    }
-
-    return mapping.get(resource_mode, 1)
 
+def run_single(combo, candles=None):
+    from borgbot.backtest.engine import BacktestEngine
+    from borgbot.strategies.sma import SMAStrategy
 
-def run_single(combo, candles):
+    if candles is None:
+        candles = WORKER_CANDLES
 
     strategy = SMAStrategy({
         "fast": combo["fast"],
@@ -62,12 +60,18 @@ def run_single(combo, candles):
     }
 
 
+# job arguments restored by --resume (the rest describe how to run, not what)
+JOB_ARGS = ("symbol", "tf", "from_date", "to_date", "strategy", "fast", "slow")
+
+
 def main():
 
     parser = argparse.ArgumentParser()
 
-    parser.add_argument("--symbol", required=True)
-    parser.add_argument("--tf", required=True)
+    parser.add_argument("--symbol")
+    parser.add_argument("--tf")
+    parser.add_argument("--from_date", default="2022-01-01")
+    parser.add_argument("--to_date", default="2026-01-01")
 
     parser.add_argument("--strategy", default="sma")
     parser.add_argument("--fast", default="5:20")
@@ -75,47 +79,68 @@ def main():
 
     parser.add_argument("--resources", default="low")
     parser.add_argument("--workers", type=int)
+    parser.add_argument("--resume", type=int, metavar="EXPERIMENT_ID", help="finish an interrupted sweep")
+    profiling.add_arguments(parser)
 
     args = parser.parse_args()
 
     init_db()
 
-    candles = load_data(...)
-    candles = build_indicator_cache(candles)
+    if args.resume is not None:
+        job = load_job(args.resume)
+        if job is None or job[0] != "optimizer":
+            parser.error(f"no optimizer sweep stored for experiment {args.resume}")
+        vars(args).update(job[1])
+        exp_id = args.resume
+    elif not (args.symbol and args.tf):
+        parser.error("--symbol and --tf are required unless resuming")
 
-    combos = generate_sma_grid(args.fast, args.slow)
+    from borgbot.data.indicator_cache import build_indicator_cache
+    from borgbot.data.loader import RESEARCH_DTYPE, load_candles
 
-    workers = resolve_workers(args.resources, args.workers)
+    prof = profiling.from_args(args, "optimizer")
 
-    print(f"Running {len(combos)} strategies with {workers} workers")
+    if args.resume is None:
+        exp_id = create_experiment(args.symbol, args.tf, args.strategy)
+        create_job(exp_id, "optimizer", {k: getattr(args, k) for k in JOB_ARGS}, generate_sma_grid(args.fast, args.slow))
 
-    exp_id = create_experiment(args.symbol, args.tf, args.strategy)
+    pending = pending_tasks(exp_id)
 
-    results = []
+    if pending:
+        with prof.stage("load"):
+            candles = load_candles(args.symbol, args.tf, args.from_date, args.to_date, dtype=RESEARCH_DTYPE)
+            candles = build_indicator_cache(candles)
 
-    with ProcessPoolExecutor(max_workers=workers) as executor:
+        plan = resources.plan(args.resources, candles, len(pending), args.workers)
+        print(f"Experiment {exp_id}: running {len(pending)} strategies on {plan}")
 
-        futures = [
-            executor.submit(run_single, combo, candles)
-            for combo in combos
-        ]
+        prof.measure_pickle(candles, plan.workers)
+        task = prof.wrap(run_single, key=args.strategy)
 
-        for f in futures:
-            r = f.result()
+        try:
+            with worker_executor(plan.workers, initializer=init_worker, initargs=(candles,)) as executor:
 
-            insert_result(
-                exp_id,
-                r["fast"],
-                r["slow"],
-                r["roi"],
-                r["drawdown"],
-                r["trades"],
-                r["score"],
-            )
+                # committed as they finish, so an interrupted sweep resumes from here
+                for i, r in resources.run_adaptive(executor, task, [combo for _, combo in pending], plan):
+                    r = prof.take(r)
 
-            results.append(r)
+                    with prof.stage("db"):
+                        insert_task_result(exp_id, pending[i][0], r)
+        except BaseException:
+            print(f"\nSweep interrupted; continue with --resume {exp_id}")
+            raise
 
     complete_experiment(exp_id)
+    complete_job(exp_id)
+    prof.finish(exp_id)
+
+    results = [r for r in task_results(exp_id) if r is not None]
+
+    from .stability import HEATMAP_DIR, annotate, write_heatmaps
+
+    cubes = annotate(results, config=lambda r: {"fast": r["fast"], "slow": r["slow"]})
+    heatmaps = write_heatmaps(cubes, f"optimizer_{exp_id}")
+    print(f"\n{len(heatmaps)} parameter heatmaps written to {HEATMAP_DIR}")
 
     top = sorted(results, key=lambda x: x["score"], reverse=True)[:10]
 
@@ -124,9 +149,9 @@ def main():
     for r in top:
         print(
             f"FAST {r['fast']}  SLOW {r['slow']} "
-            f"ROI {r['roi']}%  DD {r['drawdown']}  Score {r['score']}"
+            f"ROI {r['roi']}%  DD {r['drawdown']}  Score {r['score']}  Stable {r['stable_score']:.2f}"
         )
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
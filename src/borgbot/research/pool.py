@@ -0,0 +1,38 @@
+import multiprocessing
+import os
+
+# imported once by the fork server; every worker forks from it with these loaded
+WORKER_PRELOAD = [
+    "numpy",
+    "pandas",
+    "borgbot.backtest.engine",
+    "borgbot.data.indicator_cache",
+    "borgbot.strategies.sma",
+    "borgbot.strategies.rsi",
+    "borgbot.strategies.stack",
+    "borgbot.research.walkforward_core",
+]
+
+# "fork" also works (no preload needed) but isn't safe once threads exist
+POOL_START_METHOD = os.environ.get("POOL_START_METHOD", "forkserver")
+
+
+def pool_context(preload=None):
+    ctx = multiprocessing.get_context(POOL_START_METHOD)
+    if POOL_START_METHOD == "forkserver":
+        ctx.set_forkserver_preload(list(preload or WORKER_PRELOAD))
+    return ctx
+
+
+def worker_pool(workers, initializer=None, initargs=()):
+    """multiprocessing.Pool whose workers start from the preloaded template."""
+    return pool_context().Pool(workers, initializer=initializer, initargs=initargs)
+
+
+def worker_executor(workers, initializer=None, initargs=()):
+    """ProcessPoolExecutor counterpart of worker_pool."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=pool_context(), initializer=initializer, initargs=initargs,
+    )
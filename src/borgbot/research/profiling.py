@@ -0,0 +1,343 @@
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import time
+from collections import defaultdict
+
+DB_PATH = "/app/research/research.db"
+
+# every Nth task per strategy key a worker runs is also run under cProfile (the first one always is)
+PROFILE_EVERY = int(os.environ.get("PROFILE_EVERY", "10"))
+
+# A sampled call path belongs to the first stage (in this order) whose
+# pattern matches any frame on it; everything else is the backtest loop.
+# Patterns match "path/to/file.py:function" (builtins: "~:<built-in ...>").
+STAGE_RULES = (
+    ("db", ("sqlite3",)),
+    ("pickle", ("pickle", "copyreg")),
+    ("indicators", ("borgbot/indicators/", "indicator_cache.py:", "data/mtf.py:", "data/resample.py:")),
+    (
+        "slicing",
+        (
+            "pandas/core/indexing.py:", "pandas/core/frame.py:__getitem__",
+            "pandas/core/series.py:__getitem__", "data/candles.py:__getitem__",
+        ),
+    ),
+    ("signals", (":generate_signal", ":signal_series")),
+)
+OTHER_STAGE = "backtest"
+
+# worker-local task counts per strategy key, used for sampling
+_calls = defaultdict(int)
+
+
+def _frame_name(func):
+    filename, _, name = func
+    filename = filename.replace(os.sep, "/")
+    for root in ("site-packages/", "/src/"):
+        filename = filename.rsplit(root, 1)[-1]
+    return f"{filename}:{name}"
+
+
+def classify(path):
+    """Stage of one call path (a list of "file:function" frames, root first)."""
+    for stage, patterns in STAGE_RULES:
+        if any(p in frame for frame in path for p in patterns):
+            return stage
+    return OTHER_STAGE
+
+
+def collapsed_stacks(stats, max_depth=64):
+    """
+    cProfile stats as {"root;caller;callee": microseconds} (flamegraph.pl /
+    speedscope "collapsed" format).
+
+    cProfile only records caller -> callee edges, so a function's time is
+    split across the paths leading to it in proportion to each caller's
+    share of its cumulative time.
+    """
+    callees = defaultdict(list)
+    roots = []
+    for func, (_, _, _, ct, callers) in stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            callees[caller].append((func, edge[3]))
+
+    out = defaultdict(float)
+
+    def walk(func, funcs, names, scale):
+        own = stats[func][2] * scale
+        if own > 0:
+            out[";".join(names)] += own * 1e6
+        if len(names) >= max_depth:
+            return
+        for callee, edge_ct in callees.get(func, ()):
+            total = stats[callee][3]
+            if total <= 0 or callee in funcs:  # recursion: time is already on this path
+                continue
+            walk(callee, funcs + (callee,), names + [_frame_name(callee)], scale * edge_ct / total)
+
+    for root in roots:
+        walk(root, (root,), [_frame_name(root)], 1.0)
+
+    return {k: int(v) for k, v in out.items() if int(v) > 0}
+
+
+def task_key(arg):
+    """Strategy label for a research task argument (config dict, strategy tuple, ...)."""
+    if isinstance(arg, dict):
+        return str(arg.get("type", "sma"))
+    if isinstance(arg, (list, tuple)):
+        return "+".join(type(s).__name__ for s in arg)
+    return type(arg).__name__
+
+
+class ProfiledTask:
+    """
+    Picklable wrapper around a module-level research task: calls fn(arg)
+    and returns (result, record) with its wall and CPU time. Sampled calls
+    also carry their collapsed cProfile stacks.
+    """
+
+    def __init__(self, fn, key=None, every=PROFILE_EVERY):
+        self.fn = fn
+        self.key = key
+        self.every = max(1, every)
+
+    def __call__(self, arg, *args):
+        key = self.key or task_key(arg)
+        sample = _calls[key] % self.every == 0
+        _calls[key] += 1
+
+        profiler = None
+        if sample:
+            import cProfile
+
+            profiler = cProfile.Profile()
+
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            result = self.fn(arg, *args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+        record = {
+            "key": key,
+            "wall": time.perf_counter() - wall0,
+            "cpu": time.process_time() - cpu0,
+            "pid": os.getpid(),
+            "stacks": None,
+        }
+        if profiler is not None:
+            profiler.create_stats()
+            record["stacks"] = collapsed_stacks(profiler.stats)
+        return result, record
+
+
+class Profile:
+    """
+    Aggregate of ProfiledTask records plus stages the parent process times
+    itself (loading, pickling candles to workers, SQLite writes).
+
+    Per-stage time inside tasks comes from the sampled cProfile stacks: each
+    strategy key's measured wall time is split in the proportions its
+    samples show.
+    """
+
+    def __init__(self, tool, every=PROFILE_EVERY):
+        self.tool = tool
+        self.every = every
+        self.tasks = defaultdict(lambda: {"tasks": 0, "sampled": 0, "wall": 0.0, "cpu": 0.0})
+        self.samples = defaultdict(lambda: defaultdict(float))
+        self.stacks = defaultdict(int)
+        self.main = defaultdict(lambda: {"wall": 0.0, "cpu": 0.0})
+        self.workers = set()
+
+    def wrap(self, fn, key=None):
+        return ProfiledTask(fn, key=key, every=self.every)
+
+    def add(self, record):
+        t = self.tasks[record["key"]]
+        t["tasks"] += 1
+        t["wall"] += record["wall"]
+        t["cpu"] += record["cpu"]
+        self.workers.add(record["pid"])
+        if record["stacks"]:
+            t["sampled"] += 1
+            for path, us in record["stacks"].items():
+                self.samples[record["key"]][classify(path.split(";"))] += us
+                self.stacks[f"{record['key']};{path}"] += us
+
+    def take(self, pair):
+        """Record one (result, record) pair from a wrapped task and return the bare result."""
+        result, record = pair
+        self.add(record)
+        return result
+
+    def unwrap(self, pairs):
+        return [self.take(pair) for pair in pairs]
+
+    def stage(self, name):
+        return _StageTimer(self.main[name])
+
+    def measure_pickle(self, obj, copies=1):
+        """Time shipping `obj` to `copies` workers (one dumps, a loads per worker)."""
+        import pickle
+
+        with self.stage("pickle"):
+            blob = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+            for _ in range(copies):
+                pickle.loads(blob)
+        return len(blob)
+
+    def summary(self):
+        rows = []
+        for key, t in sorted(self.tasks.items()):
+            sampled = self.samples.get(key) or {OTHER_STAGE: 1.0}
+            total = sum(sampled.values())
+            for stage, us in sorted(sampled.items(), key=lambda kv: -kv[1]):
+                share = us / total
+                rows.append({
+                    "key": key, "stage": stage, "tasks": t["tasks"], "sampled": t["sampled"],
+                    "wall": t["wall"] * share, "cpu": t["cpu"] * share, "share": share,
+                })
+        for stage, m in sorted(self.main.items()):
+            rows.append({
+                "key": "(main)", "stage": stage, "tasks": 1, "sampled": 0,
+                "wall": m["wall"], "cpu": m["cpu"], "share": 1.0,
+            })
+        return rows
+
+    def collapsed(self):
+        return "\n".join(f"{path} {us}" for path, us in sorted(self.stacks.items()))
+
+    def print_summary(self):
+        print(f"\nProfile ({self.tool}, {len(self.workers)} worker processes)\n")
+        print(f"{'strategy':14} {'stage':11} {'tasks':>6} {'sampled':>7} {'wall s':>9} {'cpu s':>9} {'share':>6}")
+        for r in self.summary():
+            print(
+                f"{r['key']:14} {r['stage']:11} {r['tasks']:>6} {r['sampled']:>7} "
+                f"{r['wall']:>9.3f} {r['cpu']:>9.3f} {r['share']:>6.0%}"
+            )
+
+    def finish(self, experiment_id, db_path=None):
+        self.print_summary()
+        self.save(experiment_id, db_path)
+
+    def save(self, experiment_id, db_path=None):
+        conn = sqlite3.connect(db_path or DB_PATH)
+        cur = conn.cursor()
+
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS profiles (
+                experiment_id TEXT,
+                tool TEXT,
+                timestamp TEXT,
+                summary TEXT,
+                collapsed TEXT
+            )
+        """
+        )
+        cur.execute(
+            "INSERT INTO profiles VALUES (?,?,?,?,?)",
+            (
+                str(experiment_id),
+                self.tool,
+                datetime.datetime.utcnow().isoformat(),
+                json.dumps(self.summary()),
+                self.collapsed(),
+            ),
+        )
+
+        conn.commit()
+        conn.close()
+
+
+class _StageTimer:
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def __enter__(self):
+        self.wall0, self.cpu0 = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.bucket["wall"] += time.perf_counter() - self.wall0
+        self.bucket["cpu"] += time.process_time() - self.cpu0
+        return False
+
+
+class _NoProfile:
+    """Stands in for Profile when profiling is off so call sites stay unconditional."""
+
+    def stage(self, name):
+        return _StageTimer({"wall": 0.0, "cpu": 0.0})
+
+    def measure_pickle(self, obj, copies=1):
+        return None
+
+    def wrap(self, fn, key=None):
+        return fn
+
+    def take(self, result):
+        return result
+
+    def unwrap(self, results):
+        return list(results)
+
+    def finish(self, experiment_id, db_path=None):
+        pass
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", action="store_true", help="time tasks per strategy/stage and store a profile")
+    parser.add_argument("--profile_every", type=int, default=PROFILE_EVERY, help="cProfile every Nth task per worker")
+
+
+def from_args(args, tool):
+    if not getattr(args, "profile", False):
+        return _NoProfile()
+    return Profile(tool, every=args.profile_every)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Show or export a stored research profile")
+    parser.add_argument("--experiment", required=True)
+    parser.add_argument("--tool", help="optimizer, discovery, stack_optimizer or walkforward")
+    parser.add_argument("--folded", help="write collapsed stacks here (flamegraph.pl, speedscope)")
+
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    query = "SELECT tool, timestamp, summary, collapsed FROM profiles WHERE experiment_id=?"
+    params = [args.experiment]
+    if args.tool:
+        query += " AND tool=?"
+        params.append(args.tool)
+    row = conn.execute(query + " ORDER BY timestamp DESC LIMIT 1", params).fetchone()
+    conn.close()
+
+    if row is None:
+        raise SystemExit(f"No profile stored for experiment {args.experiment}")
+
+    tool, timestamp, summary, collapsed = row
+    print(f"{tool} profile from {timestamp}\n")
+    print(f"{'strategy':14} {'stage':11} {'tasks':>6} {'wall s':>9} {'cpu s':>9} {'share':>6}")
+    for r in json.loads(summary):
+        print(f"{r['key']:14} {r['stage']:11} {r['tasks']:>6} {r['wall']:>9.3f} {r['cpu']:>9.3f} {r['share']:>6.0%}")
+
+    if args.folded:
+        with open(args.folded, "w") as f:
+            f.write(collapsed + "\n")
+        print(f"\nCollapsed stacks written to {args.folded}")
+
+
+if __name__ == "__main__":
+    main()
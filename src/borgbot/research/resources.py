@@ -0,0 +1,205 @@
+import math
+import os
+
+CGROUP_ROOT = os.environ.get("CGROUP_ROOT", "/sys/fs/cgroup")
+
+# share of the usable CPUs each --resources mode may take
+CPU_SHARE = {"low": 0.0, "medium": 0.5, "high": 0.75, "max": 1.0}
+# memory a worker costs before it holds any data (interpreter, numpy, pandas)
+WORKER_BASE_MB = float(os.environ.get("WORKER_BASE_MB", "180"))
+# per-bar float64 arrays a backtest task allocates on top of its candle copy
+TASK_ARRAYS = int(os.environ.get("TASK_ARRAYS", "8"))
+# fraction of the memory limit left free for the parent and the page cache
+MEMORY_HEADROOM = float(os.environ.get("MEMORY_HEADROOM", "0.15"))
+# tasks per submission: bounds what a crash loses and how slowly throttling reacts
+MAX_CHUNK = int(os.environ.get("MAX_CHUNK", "16"))
+# throttle above, release below these fractions of the memory limit
+HIGH_WATER = float(os.environ.get("MEMORY_HIGH_WATER", "0.85"))
+LOW_WATER = float(os.environ.get("MEMORY_LOW_WATER", "0.70"))
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_limit(root=None):
+    """
+    CPUs this process may really use: its affinity mask, capped by a cgroup
+    CPU quota (v2 cpu.max or v1 cfs_quota_us / cfs_period_us) rounded up.
+    """
+    root = root or CGROUP_ROOT
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+    quota = period = None
+    v2 = _read(os.path.join(root, "cpu.max"))
+    if v2:
+        q, p = v2.split()
+        if q != "max":
+            quota, period = int(q), int(p)
+    else:
+        q = _read(os.path.join(root, "cpu", "cpu.cfs_quota_us"))
+        p = _read(os.path.join(root, "cpu", "cpu.cfs_period_us"))
+        if q and p and int(q) > 0:
+            quota, period = int(q), int(p)
+
+    if quota:
+        cpus = min(cpus, max(1, math.ceil(quota / period)))
+    return max(1, cpus)
+
+
+def _meminfo():
+    out = {}
+    for line in (_read("/proc/meminfo") or "").splitlines():
+        key, _, value = line.partition(":")
+        out[key] = int(value.split()[0]) * 1024
+    return out
+
+
+def memory_limit(root=None):
+    """Bytes available to this cgroup: its memory limit, or physical RAM when there is none."""
+    root = root or CGROUP_ROOT
+    total = _meminfo().get("MemTotal") or os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    for path in (os.path.join(root, "memory.max"), os.path.join(root, "memory", "memory.limit_in_bytes")):
+        value = _read(path)
+        if value and value != "max":
+            return min(total, int(value))  # v1 reports "unlimited" as a huge number
+    return total
+
+
+def memory_used(root=None):
+    """Bytes in use against memory_limit(): the cgroup's usage, else the whole machine's."""
+    root = root or CGROUP_ROOT
+    for path in (os.path.join(root, "memory.current"), os.path.join(root, "memory", "memory.usage_in_bytes")):
+        value = _read(path)
+        if value:
+            return int(value)
+    info = _meminfo()
+    return info.get("MemTotal", 0) - info.get("MemAvailable", 0)
+
+
+def dataset_bytes(data):
+    """Size of what each worker receives: a DataFrame, CandleArray or ndarray."""
+    if data is None:
+        return 0
+    if hasattr(data, "memory_usage"):
+        return int(data.memory_usage(index=True, deep=False).sum())
+    return int(data.nbytes)
+
+
+def worker_bytes(candles, arrays=TASK_ARRAYS):
+    """
+    Estimated peak memory of one worker: its own copy of the dataset (every
+    indicator column included), `arrays` float64 working arrays per bar and
+    the interpreter itself.
+    """
+    bars = len(candles) if candles is not None else 0
+    return int(WORKER_BASE_MB * 2**20 + dataset_bytes(candles) + bars * 8 * arrays)
+
+
+class Plan:
+    def __init__(self, workers, chunksize, cpus, limit, per_worker, reason):
+        self.workers = workers
+        self.chunksize = chunksize
+        self.cpus = cpus
+        self.limit = limit
+        self.per_worker = per_worker
+        self.reason = reason
+
+    def __repr__(self):
+        return (
+            f"{self.workers} workers x chunk {self.chunksize} ({self.reason}; {self.cpus} cpus, "
+            f"{self.limit / 2**30:.1f} GiB limit, ~{self.per_worker / 2**20:.0f} MiB per worker)"
+        )
+
+
+def plan(mode="low", candles=None, n_tasks=None, explicit=None, arrays=TASK_ARRAYS, root=None):
+    """
+    Worker count and task chunk size for a research pool.
+
+    --resources picks a share of the CPUs the cgroup really grants; the
+    count is then capped so every worker's estimated peak memory fits under
+    the memory limit (minus what is already in use and some headroom), and
+    never exceeds the number of tasks. `explicit` (--workers) skips the CPU
+    step but is still capped by memory.
+    """
+    cpus = cpu_limit(root)
+    limit = memory_limit(root)
+    per_worker = worker_bytes(candles, arrays)
+
+    if explicit:
+        workers, reason = explicit, "explicit"
+    else:
+        share = CPU_SHARE.get(mode, 0.0)
+        workers = max(1, int(cpus * share)) if mode != "max" else max(1, cpus - 1)
+        reason = f"{mode} cpu share"
+
+    free = limit * (1 - MEMORY_HEADROOM) - memory_used(root)
+    by_memory = max(1, int(free // per_worker))
+    if by_memory < workers:
+        workers, reason = by_memory, "memory bound"
+
+    if n_tasks is not None and n_tasks < workers:
+        workers, reason = max(1, n_tasks), "task bound"
+
+    # a few chunks per worker keeps them busy to the end without per-task overhead
+    chunksize = min(MAX_CHUNK, max(1, (n_tasks or 0) // (workers * 4)))
+    return Plan(workers, chunksize, cpus, limit, per_worker, reason)
+
+
+class MemoryGuard:
+    """
+    How many tasks may run at once right now: drops by one each check above
+    HIGH_WATER of the memory limit, grows back one at a time below LOW_WATER.
+    """
+
+    def __init__(self, workers, root=None):
+        self.max_workers = workers
+        self.allowed = workers
+        self.root = root
+        self.limit = memory_limit(root)
+
+    def pressure(self):
+        return memory_used(self.root) / self.limit
+
+    def check(self):
+        p = self.pressure()
+        if p > HIGH_WATER and self.allowed > 1:
+            self.allowed -= 1
+            print(f"Memory at {p:.0%} of limit: running at most {self.allowed} tasks at once")
+        elif p < LOW_WATER and self.allowed < self.max_workers:
+            self.allowed += 1
+        return self.allowed
+
+
+def _call_chunk(fn, chunk):
+    return [fn(item) for item in chunk]
+
+
+def run_adaptive(executor, fn, items, plan, guard=None):
+    """
+    Submit fn(item) to a ProcessPoolExecutor in chunks of plan.chunksize and
+    yield (index, result) as chunks finish. Never more than guard.allowed
+    chunks are in flight, so memory pressure throttles the sweep instead of
+    getting it OOM-killed.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    guard = guard or MemoryGuard(plan.workers)
+    items = list(items)
+    running = {}
+    nxt = 0
+    while nxt < len(items) or running:
+        allowed = guard.check()
+        while nxt < len(items) and len(running) < allowed:
+            chunk = items[nxt: nxt + plan.chunksize]
+            running[executor.submit(_call_chunk, fn, chunk)] = nxt
+            nxt += len(chunk)
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for f in done:
+            start = running.pop(f)
+            for offset, result in enumerate(f.result()):
+                yield start + offset, result
@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+
+# resamples per strategy; 0 turns the Monte Carlo check off
+MC_SIMS = int(os.environ.get("MC_SIMS", "10000"))
+# two-sided confidence level of the reported intervals
+MC_CONFIDENCE = float(os.environ.get("MC_CONFIDENCE", "0.90"))
+# trades per block in block resampling (keeps streaks of wins and losses together)
+MC_BLOCK = int(os.environ.get("MC_BLOCK", "10"))
+# resampling used by discovery sweeps (see simulate)
+MC_METHOD = os.environ.get("MC_METHOD", "block")
+# trades x sims cells per shuffle batch; each costs 12 bytes (sort key + order)
+BATCH_CELLS = int(os.environ.get("MC_BATCH_CELLS", "4000000"))
+
+METHODS = ("bootstrap", "shuffle", "block")
+
+
+def trade_returns(trades, fees_bps=0.0):
+    """
+    Net return of every round trip in a BacktestEngine trade list
+    [("buy", price), ("sell" | "trailing_stop", price), ...], fees charged on
+    both legs. A position still open at the end is left out.
+    """
+    fee = fees_bps / 10000
+    out = []
+    entry = None
+    for side, price in trades:
+        if side == "buy":
+            entry = price
+        elif entry is not None:
+            out.append(price / entry * (1 - fee) / (1 + fee) - 1)
+            entry = None
+    return np.asarray(out, dtype=np.float64)
+
+
+def _draws(rng, method, n, sims, block):
+    """Trade drawn by every simulation at each of the n steps, as arrays of length `sims`."""
+    if method == "bootstrap":
+        for _ in range(n):
+            yield rng.integers(0, n, size=sims)
+
+    elif method == "shuffle":
+        # a random permutation per simulation: the order that sorts random keys
+        keys = rng.random((sims, n), dtype=np.float32)
+        yield from np.ascontiguousarray(np.argsort(keys, axis=1).T)
+
+    elif method == "block":
+        # circular block bootstrap: a new random start every `block` trades
+        block = max(1, min(block, n))
+        for t in range(n):
+            if t % block == 0:
+                start = rng.integers(0, n, size=sims)
+            yield (start + t % block) % n
+
+    else:
+        raise ValueError(f"Unknown resampling method {method!r}; use one of {METHODS}")
+
+
+def simulate(returns, sims=MC_SIMS, method="bootstrap", block=MC_BLOCK, seed=None):
+    """
+    ROI (%) and max drawdown (fraction) of `sims` resampled sequences of a
+    strategy's per-trade returns, compounding from 1. "bootstrap" draws
+    trades with replacement, "shuffle" permutes them (same ROI, different
+    path) and "block" draws runs of `block` consecutive trades.
+
+    All simulations step through the trades together, so the cost is a few
+    vector ops per trade and memory is O(sims). Shuffle also sorts random
+    keys for each simulation, which makes it about three times slower; its
+    (trades x sims) order table is built in batches of at most BATCH_CELLS.
+    """
+    log_r = np.log1p(np.asarray(returns, dtype=np.float64))
+    n = len(log_r)
+    if n == 0 or sims <= 0:
+        return np.zeros(0), np.zeros(0)
+
+    rng = np.random.default_rng(seed)
+    batch = max(1, BATCH_CELLS // n) if method == "shuffle" else sims
+    roi = np.empty(sims)
+    dd = np.empty(sims)
+
+    for lo in range(0, sims, batch):
+        b = min(batch, sims - lo)
+        equity = np.zeros(b)  # log equity
+        peak = np.zeros(b)
+        worst = np.zeros(b)
+        step = np.empty(b)
+        for idx in _draws(rng, method, n, b, block):
+            np.take(log_r, idx, out=step)
+            np.add(equity, step, out=equity)
+            np.maximum(peak, equity, out=peak)
+            np.subtract(equity, peak, out=step)
+            np.minimum(worst, step, out=worst)
+        roi[lo: lo + b] = np.expm1(equity) * 100
+        dd[lo: lo + b] = -np.expm1(worst)
+
+    return roi, dd
+
+
+def confidence(returns, sims=MC_SIMS, method=MC_METHOD, level=MC_CONFIDENCE, block=MC_BLOCK, seed=None):
+    """
+    Monte Carlo summary of one strategy's trades: ROI interval and median,
+    drawdown median and upper bound, and the share of resamples that lose
+    money. None with fewer than two trades.
+    """
+    if len(returns) < 2 or sims <= 0:
+        return None
+
+    roi, dd = simulate(returns, sims, method, block, seed)
+    tail = (1 - level) / 2 * 100
+    roi_lo, roi_mid, roi_hi = np.percentile(roi, [tail, 50, 100 - tail])
+    dd_mid, dd_hi = np.percentile(dd, [50, 100 - tail])
+
+    return {
+        "mc_method": method,
+        "mc_sims": int(sims),
+        "mc_trades": int(len(returns)),
+        "mc_roi_lo": float(roi_lo),
+        "mc_roi_median": float(roi_mid),
+        "mc_roi_hi": float(roi_hi),
+        "mc_dd_median": float(dd_mid),
+        "mc_dd_hi": float(dd_hi),
+        "mc_p_loss": float((roi < 0).mean()),
+    }
@@ -1,6 +1,11 @@
-def select_strategies(results, top_n=3, min_roi=0, max_std=25, max_dd=0.3):
+def select_strategies(results, top_n=3, min_roi=0, max_std=25, max_dd=0.3, max_p_loss=0.2, min_neighbor_score=0.0):
     """
     Select only robust strategies
+
+    Results carrying a Monte Carlo summary (research.robustness) must also
+    lose money in at most `max_p_loss` of the resampled trade sequences.
+    Results annotated by research.stability must have neighboring configs
+    that average at least `min_neighbor_score`.
     """
 
     filtered = []
@@ -15,6 +20,12 @@ def select_strategies(results, top_n=3, min_roi=0, max_std=25, max_dd=0.3):
         if r["drawdown"] > max_dd:
             continue
 
+        if r.get("mc_p_loss", 0.0) > max_p_loss:
+            continue
+
+        if r.get("neighbor_score") is not None and r["neighbor_score"] < min_neighbor_score:
+            continue
+
         filtered.append(r)
 
     # sort by score
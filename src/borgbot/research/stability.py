@@ -0,0 +1,157 @@
+import importlib.util
+import os
+
+import numpy as np
+
+# grid steps on each side of a config, along every parameter axis, that count as its neighborhood
+STABILITY_RADIUS = int(os.environ.get("STABILITY_RADIUS", "1"))
+HEATMAP_DIR = "/app/research/heatmaps"
+
+
+def param_names(configs):
+    """Numeric parameters of a family of configs, in first-seen order ("type" and flags excluded)."""
+    names = []
+    for cfg in configs:
+        for k, v in cfg.items():
+            if k not in names and isinstance(v, (int, float)) and not isinstance(v, bool):
+                names.append(k)
+    return names
+
+
+def build_cube(configs, values, params):
+    """
+    Results as an N-dimensional array with one axis per parameter (its
+    sorted distinct values). Grid points without a result are NaN.
+    Returns (axes, cube, positions), positions[i] being configs[i]'s cell.
+    """
+    axes = [sorted({cfg[p] for cfg in configs}) for p in params]
+    lookup = [{v: i for i, v in enumerate(axis)} for axis in axes]
+    positions = [tuple(lookup[d][cfg[p]] for d, p in enumerate(params)) for cfg in configs]
+
+    cube = np.full([len(a) for a in axes], np.nan)
+    for pos, value in zip(positions, values):
+        cube[pos] = value
+    return axes, cube, positions
+
+
+def box_sum(a, radius):
+    """Sum over the (2r+1)^N box around every cell, zero outside: one cumulative sum per axis."""
+    for axis in range(a.ndim):
+        n = a.shape[axis]
+        pad = [(0, 0)] * a.ndim
+        pad[axis] = (radius + 1, radius)
+        c = np.cumsum(np.pad(a, pad), axis=axis)
+        a = np.take(c, np.arange(2 * radius + 1, 2 * radius + 1 + n), axis=axis) - np.take(c, np.arange(n), axis=axis)
+    return a
+
+
+def neighborhood(cube, radius=STABILITY_RADIUS):
+    """
+    (smoothed, neighbors, count) cubes: the mean over each cell's box
+    including itself, the mean over the box without it, and how many
+    neighbors had a result. Empty cells are left out of both means.
+    """
+    have = ~np.isnan(cube)
+    total = box_sum(np.where(have, cube, 0.0), radius)
+    count = box_sum(have.astype(np.float64), radius)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        smoothed = np.where(have, total / count, np.nan)
+        others = np.where(have & (count > 1), (total - np.where(have, cube, 0.0)) / (count - 1), np.nan)
+    return smoothed, others, np.where(have, count - 1, 0)
+
+
+def annotate(results, config=lambda r: r["config"], key="score", radius=STABILITY_RADIUS):
+    """
+    Add "stable_score" (neighborhood mean of `key`), "neighbor_score" (the
+    same without the config itself; None when it has no scored neighbor)
+    and "neighbors" to each result, in place. Configs are grouped by their
+    "type" so each strategy family gets its own cube.
+
+    Returns {type: (params, axes, smoothed cube)} for heatmaps.
+    """
+    families = {}
+    for r in results:
+        families.setdefault(config(r).get("type", ""), []).append(r)
+
+    cubes = {}
+    for family, members in families.items():
+        configs = [config(r) for r in members]
+        params = param_names(configs)
+        if not params:
+            continue
+        axes, cube, positions = build_cube(configs, [r[key] for r in members], params)
+        smoothed, others, count = neighborhood(cube, radius)
+
+        for r, pos in zip(members, positions):
+            r["stable_score"] = float(smoothed[pos])
+            r["neighbor_score"] = float(others[pos]) if count[pos] else None
+            r["neighbors"] = int(count[pos])
+        cubes[family] = (params, axes, smoothed)
+    return cubes
+
+
+def projections(params, axes, cube):
+    """
+    Every 2D view of a cube as (row param, column param, rows, columns,
+    grid), each cell the best value over the remaining axes. A single
+    parameter gives one view with a lone "value" column.
+    """
+    if len(params) == 1:
+        return [(params[0], "value", axes[0], [""], cube[:, None])]
+
+    out = []
+    for a in range(len(params)):
+        for b in range(a + 1, len(params)):
+            rest = tuple(d for d in range(len(params)) if d not in (a, b))
+            with np.errstate(invalid="ignore"):
+                grid = np.fmax.reduce(cube, axis=rest) if rest else cube
+            out.append((params[a], params[b], axes[a], axes[b], grid))
+    return out
+
+
+def _plot(path, title, row, col, rows, cols, grid):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(max(4, 0.3 * len(cols) + 2), max(3, 0.3 * len(rows) + 1.5)))
+    image = ax.imshow(np.ma.masked_invalid(grid), origin="lower", aspect="auto", cmap="RdYlGn")
+    ax.set_xticks(range(len(cols)), [str(c) for c in cols], rotation=90, fontsize=7)
+    ax.set_yticks(range(len(rows)), [str(r) for r in rows], fontsize=7)
+    ax.set_xlabel(col)
+    ax.set_ylabel(row)
+    ax.set_title(title, fontsize=9)
+    fig.colorbar(image, ax=ax, label="stable score")
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+
+
+def write_heatmaps(cubes, prefix, directory=None):
+    """
+    One CSV per family and parameter pair (rows x columns of stable
+    scores), plus a PNG of it when matplotlib is installed. Returns the paths.
+    """
+    directory = directory or HEATMAP_DIR
+    os.makedirs(directory, exist_ok=True)
+
+    # matplotlib is in the image but optional elsewhere
+    plots = importlib.util.find_spec("matplotlib") is not None
+
+    paths = []
+    for family, (params, axes, cube) in cubes.items():
+        for row, col, rows, cols, grid in projections(params, axes, cube):
+            name = "_".join(str(p) for p in (prefix, family, row, col) if p != "")
+            path = os.path.join(directory, f"{name}.csv")
+            with open(path, "w") as f:
+                f.write(f"{row}\\{col}," + ",".join(str(c) for c in cols) + "\n")
+                for value, line in zip(rows, grid):
+                    f.write(f"{value}," + ",".join("" if np.isnan(v) else f"{v:.4f}" for v in line) + "\n")
+            paths.append(path)
+            if plots:
+                png = os.path.join(directory, f"{name}.png")
+                _plot(png, f"{prefix} {family}", row, col, rows, cols, grid)
+                paths.append(png)
+    return paths
@@ -1,17 +1,12 @@
 import argparse
 import itertools
-import multiprocessing
 import sqlite3
 import uuid
 import datetime
 from pathlib import Path
 
-from borgbot.backtest.engine import BacktestEngine
-from borgbot.data.loader import load_data
-from borgbot.data.indicator_cache import build_indicator_cache
-from borgbot.strategies.sma import SMAStrategy
-from borgbot.strategies.rsi import RSIStrategy
-from borgbot.strategies.stack import StrategyStack
+from borgbot.research import profiling, resources
+from borgbot.research.pool import worker_executor
 
 
 DB_PATH = "/app/research/research.db"
@@ -26,8 +21,24 @@ def score_strategy(roi, drawdown):
     return (roi * 100) - (drawdown * 50)
 
 
-def run_backtest(args):
-    strategies, candles = args
+# member signal matrix and closes, set once per worker by init_worker
+WORKER_SIGNALS = None
+WORKER_CLOSES = None
+
+# weight columns evaluated per task; bounds the (bars x columns) stacked signal block
+BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def init_worker(signals, closes):
+    global WORKER_SIGNALS, WORKER_CLOSES
+    WORKER_SIGNALS = signals
+    WORKER_CLOSES = closes
+
+
+def run_backtest(strategies, candles):
+    """One stack as a full backtest; the reference run_weights has to match."""
+    from borgbot.backtest.engine import BacktestEngine
+    from borgbot.strategies.stack import StrategyStack
 
     stack = StrategyStack([(s, 1.0) for s in strategies])
     engine = BacktestEngine(strategy=stack)
@@ -45,19 +56,60 @@ def run_backtest(args):
     }
 
 
-def resource_workers(level):
-    cpu = multiprocessing.cpu_count()
+def weight_grid(n_members, values=(1.0,)):
+    """
+    Weight vectors over every non-empty subset of the members, each member
+    taking one of `values` when included. Vectors that only differ by a
+    common factor give the same stack signal and are kept once.
+    """
+    seen = set()
+    grid = []
+    for w in itertools.product([0.0, *values], repeat=n_members):
+        total = sum(w)
+        if total <= 0:
+            continue
+        key = tuple(round(x / total, 9) for x in w)
+        if key not in seen:
+            seen.add(key)
+            grid.append(w)
+    return grid
+
+
+def stack_label(names, weights):
+    used = [(n, w) for n, w in zip(names, weights) if w]
+    if len({w for _, w in used}) == 1:
+        return ",".join(n for n, _ in used)
+    return ",".join(f"{n}*{w:g}" for n, w in used)
+
+
+def run_weights(weights, signals=None, closes=None):
+    """
+    Backtest stacks given as weight vectors over the member signal matrix.
+
+    Each stack's signal is signals @ weights; the sum over weights is left
+    out because only the sign reaches the engine. A block of vectors is
+    one matrix product, so member signals are never recomputed.
+    """
+    import numpy as np
+    from borgbot.backtest.engine import BacktestEngine
+
+    if signals is None:
+        signals, closes = WORKER_SIGNALS, WORKER_CLOSES
+
+    stacked = np.asarray(weights, dtype=np.float64) @ signals.T  # one row per stack
+    out = []
+    for j in range(len(stacked)):
+        result = BacktestEngine(strategy=None).run_signals(closes, stacked[j])
+        roi = float(result["roi_pct"])
+        dd = float(result.get("max_drawdown", 0.0))
+        out.append({"weights": list(weights[j]), "roi": roi, "drawdown": dd, "score": score_strategy(roi, dd)})
+    return out
 
-    if level == "low":
-        return 1
-    if level == "medium":
-        return max(1, cpu // 2)
-    if level == "high":
-        return max(1, int(cpu * 0.75))
-    if level == "max":
-        return max(1, cpu - 1)
 
-    return 1
+def weight_blocks(grid, n_bars, workers):
+    per_block = max(1, BLOCK_BYTES // (8 * max(1, n_bars)))
+    per_block = min(per_block, max(1, -(-len(grid) // (4 * workers))))
+    return [grid[i: i + per_block] for i in range(0, len(grid), per_block)]
 
 
 def save_results(results, experiment_id, timestamp, symbol, timeframe, dataset):
@@ -112,9 +164,20 @@ def main():
     parser.add_argument("--from_date", required=True)
     parser.add_argument("--to_date", required=True)
     parser.add_argument("--resources", default="low")
+    parser.add_argument("--weights", default="1", help="comma separated weights each member can take, e.g. 0.5,1,2")
+    profiling.add_arguments(parser)
 
     args = parser.parse_args()
 
+    import numpy as np
+    from borgbot.data.loader import RESEARCH_DTYPE, load_candles
+    from borgbot.data.indicator_cache import build_indicator_cache
+    from borgbot.data.mtf import build_higher_tf
+    from borgbot.strategies.base import WARMUP_BARS
+    from borgbot.strategies.sma import SMAStrategy
+    from borgbot.strategies.stack import StrategyStack, signal_matrix
+    from borgbot.strategies.rsi import RSIStrategy
+
     experiment_id = str(uuid.uuid4())[:8]
     timestamp = datetime.datetime.utcnow().isoformat()
     dataset = f"{args.from_date}:{args.to_date}"
@@ -122,47 +185,62 @@ def main():
     symbol = args.symbol
     timeframe = args.tf
 
-    candles = load_data(
-    args.symbol,
-    args.tf,
-    args.from_date,
-    args.to_date,
-    )
+    prof = profiling.from_args(args, "stack_optimizer")
+
+    with prof.stage("load"):
+        candles = load_candles(
+        args.symbol,
+        args.tf,
+        args.from_date,
+        args.to_date,
+        dtype=RESEARCH_DTYPE,
+        )
 
-    candles = load_data(...)
-    candles = build_indicator_cache(candles)
+        candles = build_indicator_cache(candles)
 
     strategies = [
         SMAStrategy({"fast": 9, "slow": 21}),
         RSIStrategy({"period": 14, "overbought": 70, "oversold": 30}),
     ]
 
-    combinations = []
-
-    for r in range(1, len(strategies) + 1):
-        combinations.extend(itertools.combinations(strategies, r))
+    names = [s.__class__.__name__ for s in strategies]
 
-    workers = resource_workers(args.resources)
+    # every member's signals once; each stack is then a weighted sum of columns
+    with prof.stage("signals"):
+        mtf = build_higher_tf(candles, StrategyStack([(s, 1.0) for s in strategies]).higher_tf)
+        signals = signal_matrix(strategies, candles, WARMUP_BARS, mtf)
+    closes = np.asarray(candles["close"], dtype=np.float64)
 
-    print(f"\nTesting {len(combinations)} strategy combinations")
-    print(f"Workers: {workers}\n")
+    grid = weight_grid(len(strategies), [float(w) for w in args.weights.split(",")])
+    # workers hold the signal matrix, and each block stacks (bars x block) more
+    plan = resources.plan(args.resources, signals, len(grid), arrays=2)
+    blocks = weight_blocks(grid, len(closes), plan.workers)
+    plan.chunksize = 1  # a block already is a chunk
 
-    pool = multiprocessing.Pool(workers)
+    print(f"\nTesting {len(grid)} strategy combinations")
+    print(f"Workers: {plan}\n")
 
-    tasks = [(combo, candles) for combo in combinations]
+    prof.measure_pickle((signals, closes), plan.workers)
+    with worker_executor(plan.workers, initializer=init_worker, initargs=(signals, closes)) as executor:
+        done = resources.run_adaptive(executor, prof.wrap(run_weights, key="stack"), blocks, plan)
+        blocks = prof.unwrap(r for _, r in sorted(done, key=lambda pair: pair[0]))
 
-    results = pool.map(run_backtest, tasks)
+    results = [r for block in blocks for r in block]
+    for r in results:
+        r["strategies"] = stack_label(names, r.pop("weights"))
 
     results = sorted(results, key=lambda x: x["score"], reverse=True)
 
-    save_results(
-    results,
-    experiment_id,
-    timestamp,
-    symbol,
-    timeframe,
-    dataset,
-    )
+    with prof.stage("db"):
+        save_results(
+        results,
+        experiment_id,
+        timestamp,
+        symbol,
+        timeframe,
+        dataset,
+        )
+    prof.finish(experiment_id)
 
     print("Top strategies\n")
 
@@ -1,3 +1,4 @@
+import json
 import sqlite3
 import os
 from datetime import datetime
@@ -7,7 +8,7 @@ DB_PATH = "/app/research/research.db"
 
 
 def get_conn():
-    os.makedirs("/app/research", exist_ok=True)
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     return sqlite3.connect(DB_PATH)
 
 
@@ -85,4 +86,127 @@ def insert_result(exp_id, fast, slow, roi, drawdown, trades, score):
     )
 
     conn.commit()
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+# ---------------------------
+# RESUMABLE SWEEPS
+# ---------------------------
+def _init_jobs(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS sweep_jobs (
+        experiment_id TEXT PRIMARY KEY,
+        tool TEXT,
+        args TEXT,
+        started_at TEXT,
+        completed_at TEXT
+    )
+    """)
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS sweep_tasks (
+        experiment_id TEXT,
+        task INTEGER,
+        config TEXT,
+        status TEXT,
+        result TEXT,
+        updated_at TEXT,
+        PRIMARY KEY (experiment_id, task)
+    )
+    """)
+
+
+def create_job(exp_id, tool, args, configs):
+    """Persist a sweep's arguments and task list before any task runs."""
+    conn = get_conn()
+    cur = conn.cursor()
+    _init_jobs(cur)
+
+    now = datetime.utcnow().isoformat()
+
+    cur.execute(
+        "INSERT INTO sweep_jobs(experiment_id,tool,args,started_at) VALUES (?,?,?,?)",
+        (str(exp_id), tool, json.dumps(args), now),
+    )
+    cur.executemany(
+        "INSERT INTO sweep_tasks VALUES (?,?,?,?,?,?)",
+        [(str(exp_id), i, json.dumps(c), "pending", None, now) for i, c in enumerate(configs)],
+    )
+
+    conn.commit()
+    conn.close()
+
+
+def load_job(exp_id):
+    """(tool, args, completed_at) of a stored sweep, or None."""
+    conn = get_conn()
+    cur = conn.cursor()
+    _init_jobs(cur)
+
+    row = cur.execute(
+        "SELECT tool, args, completed_at FROM sweep_jobs WHERE experiment_id=?", (str(exp_id),)
+    ).fetchone()
+    conn.close()
+
+    if row is None:
+        return None
+    return row[0], json.loads(row[1]), row[2]
+
+
+def pending_tasks(exp_id):
+    """[(task, config)] not finished yet, in task order."""
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT task, config FROM sweep_tasks WHERE experiment_id=? AND status!='done' ORDER BY task",
+        (str(exp_id),),
+    ).fetchall()
+    conn.close()
+    return [(task, json.loads(config)) for task, config in rows]
+
+
+def task_results(exp_id):
+    """Results of every finished task (None for tasks that produced none)."""
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT result FROM sweep_tasks WHERE experiment_id=? AND status='done' ORDER BY task",
+        (str(exp_id),),
+    ).fetchall()
+    conn.close()
+    return [json.loads(r[0]) if r[0] is not None else None for r in rows]
+
+
+def mark_task_done(cur, exp_id, task, result):
+    """Part of the caller's transaction, so a result row and its task status commit together."""
+    cur.execute(
+        "UPDATE sweep_tasks SET status='done', result=?, updated_at=? WHERE experiment_id=? AND task=?",
+        (
+            json.dumps(result) if result is not None else None,
+            datetime.utcnow().isoformat(),
+            str(exp_id),
+            task,
+        ),
+    )
+
+
+def complete_job(exp_id):
+    conn = get_conn()
+    conn.execute(
+        "UPDATE sweep_jobs SET completed_at=? WHERE experiment_id=?",
+        (datetime.utcnow().isoformat(), str(exp_id)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def insert_task_result(exp_id, task, r):
+    """insert_result plus the task's done mark in one commit."""
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute(
+        "INSERT INTO results VALUES (?,?,?,?,?,?,?)",
+        (exp_id, r["fast"], r["slow"], r["roi"], r["drawdown"], r["trades"], r["score"]),
+    )
+    mark_task_done(cur, exp_id, task, r)
+
+    conn.commit()
+    conn.close()
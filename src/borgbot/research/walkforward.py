@@ -3,12 +3,8 @@ import datetime
 import sqlite3
 import uuid
 from dateutil.relativedelta import relativedelta
-from borgbot.data.loader import load_data
-from borgbot.data.indicator_cache import build_indicator_cache
-from borgbot.backtest.engine import BacktestEngine
-from borgbot.strategies.sma import SMAStrategy
-from borgbot.strategies.rsi import RSIStrategy
-from borgbot.strategies.stack import StrategyStack
+
+from borgbot.research import profiling
 
 
 DB_PATH = "/app/research/research.db"
@@ -22,6 +18,7 @@ def month_range(start, end, step):
 
 
 def run_backtest(strategy, candles):
+    from borgbot.backtest.engine import BacktestEngine
 
     engine = BacktestEngine(strategy=strategy)
     result = engine.run(candles)
@@ -83,9 +80,17 @@ def main():
     parser.add_argument("--end", required=True)
     parser.add_argument("--train_months", type=int, default=12)
     parser.add_argument("--test_months", type=int, default=3)
+    profiling.add_arguments(parser)
 
     args = parser.parse_args()
 
+    from borgbot.data.candles import time_range
+    from borgbot.data.loader import RESEARCH_DTYPE, load_candles
+    from borgbot.data.indicator_cache import build_indicator_cache
+    from borgbot.strategies.sma import SMAStrategy
+    from borgbot.strategies.rsi import RSIStrategy
+    from borgbot.strategies.stack import StrategyStack
+
     start = datetime.datetime.fromisoformat(args.start)
     end = datetime.datetime.fromisoformat(args.end)
 
@@ -97,6 +102,9 @@ def main():
         (RSIStrategy({"period": 14, "overbought": 70, "oversold": 30}), 1.0)
     ])
 
+    prof = profiling.from_args(args, "walkforward")
+    test_fold = prof.wrap(run_backtest, key="SMA+RSI")
+
     rows = []
 
     for train_start in month_range(start, end, args.test_months):
@@ -107,18 +115,20 @@ def main():
         if test_end > end:
             break
 
-        candles = load_data(
-            symbol=args.symbol,
-            timeframe=args.tf,
-            start=train_start.isoformat(),
-            end=test_end.isoformat(),
-        )
+        with prof.stage("load"):
+            candles = load_candles(
+                symbol=args.symbol,
+                timeframe=args.tf,
+                start=train_start.isoformat(),
+                end=test_end.isoformat(),
+                dtype=RESEARCH_DTYPE,
+            )
 
-        candles = build_indicator_cache(candles)
+            candles = build_indicator_cache(candles)
 
-        train_candles = candles[candles["timestamp"] < train_end]
-        test_candles = candles[candles["timestamp"] >= train_end]
-        test_result = run_backtest(strategies, test_candles)
+        train_candles = time_range(candles, end=train_end)
+        test_candles = time_range(candles, start=train_end)
+        test_result = prof.take(test_fold(strategies, test_candles))
         
         rows.append(
             {
@@ -139,7 +149,9 @@ def main():
             f"Test ROI {test_result['roi']:.2f}%"
         )
 
-    save_results(rows)
+    with prof.stage("db"):
+        save_results(rows)
+    prof.finish(experiment_id)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,16 @@
 import numpy as np
 from dateutil.relativedelta import relativedelta
 from borgbot.backtest.engine import BacktestEngine
+from borgbot.data.candles import time_bounds, time_range
+from borgbot.research.robustness import trade_returns
+from borgbot.strategies.expr import ExprStrategy
 from borgbot.strategies.sma import SMAStrategy
 from borgbot.strategies.rsi import RSIStrategy
 from borgbot.strategies.stack import StrategyStack
 
 
 def build_strategy(config):
+    """Strategy for a research config; "expr" configs carry their own expressions (strategies.expr)."""
     strategies = []
 
     if config["type"] == "sma":
@@ -32,6 +36,9 @@ def build_strategy(config):
             (RSIStrategy({"period": config["period"]}), 0.5)
         )
 
+    elif config["type"] == "expr":
+        strategies.append((ExprStrategy(config), 1.0))
+
     return StrategyStack(strategies)
 
 
@@ -78,6 +85,7 @@ def run_backtest(config, candles):
     return {
         "roi": float(result["roi_pct"]),
         "drawdown": float(result.get("max_drawdown", 0.0)),
+        "returns": trade_returns(engine.trades, engine.fees_bps).tolist(),
     }
 
 
@@ -102,10 +110,9 @@ def optimize_on_train(config, train_data):
 
 def run_walkforward(config, candles, train_months, test_months):
 
-    start = candles["timestamp"].min()
-    end = candles["timestamp"].max()
+    start, end = time_bounds(candles)
 
-    print(candles["timestamp"].head())
+    print(f"Walkforward over {start} .. {end} ({len(candles)} candles)")
 
     current = start
 
@@ -124,11 +131,8 @@ def run_walkforward(config, candles, train_months, test_months):
         if test_end > end:
             break
 
-        train = candles[candles["timestamp"] < train_end]
-        test = candles[
-            (candles["timestamp"] >= train_end) &
-            (candles["timestamp"] < test_end)
-        ]
+        train = time_range(candles, end=train_end)
+        test = time_range(candles, train_end, test_end)
         print(
             f"DEBUG SPLIT → Train: {len(train)} | Test: {len(test)} | "
             f"TrainEnd: {train_end} | TestEnd: {test_end}"
@@ -152,6 +156,8 @@ def run_walkforward(config, candles, train_months, test_months):
 
     return {
         "folds": folds,
+        # every out-of-sample round trip, in order, for the Monte Carlo check
+        "returns": [r for f in folds for r in f["returns"]],
         "metrics": {
             "roi_mean": float(np.mean(rois)),
             "roi_median": float(np.median(rois)),
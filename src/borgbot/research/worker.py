@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+
+from borgbot.research import jobqueue
+
+# seconds between polls of an empty queue
+POLL_SECONDS = float(os.environ.get("WORKER_POLL_SECONDS", "5"))
+
+# datasets kept in memory; consecutive tasks of a sweep share one
+_datasets = {}
+
+
+def load_dataset(ref):
+    """
+    Candles for a dataset ref {"symbol", "timeframe", "start", "end"} from the
+    shared data volume, with the indicator cache built. The last one is kept.
+    """
+    key = json.dumps(ref, sort_keys=True)
+    if key not in _datasets:
+        from borgbot.data.indicator_cache import build_indicator_cache
+        from borgbot.data.loader import RESEARCH_DTYPE, load_candles
+
+        _datasets.clear()
+        candles = load_candles(ref["symbol"], ref["timeframe"], ref.get("start"), ref.get("end"), dtype=RESEARCH_DTYPE)
+        _datasets[key] = build_indicator_cache(candles)
+    return _datasets[key]
+
+
+def _discovery(payload, candles):
+    from borgbot.research.discovery_engine import evaluate
+
+    return evaluate(payload["config"], candles, payload.get("scoring", "balanced"))
+
+
+def _backtest(payload, candles):
+    from borgbot.data.candles import time_range
+    from borgbot.research.walkforward_core import run_backtest
+
+    if payload.get("fold"):
+        candles = time_range(candles, *payload["fold"])
+    return run_backtest(payload["config"], candles)
+
+
+# task kind -> fn(payload, candles); payload always carries "dataset" and "config"
+KINDS = {
+    "discovery": _discovery,
+    "backtest": _backtest,
+}
+
+
+def run_job(job):
+    return KINDS[job["kind"]](job["payload"], load_dataset(job["payload"]["dataset"]))
+
+
+class _Heartbeat(threading.Thread):
+    """Keeps extending a lease while its task runs, on its own connection."""
+
+    def __init__(self, db, job_id, worker, lease_s):
+        super().__init__(daemon=True)
+        self.db, self.job_id, self.worker, self.lease_s = db, job_id, worker, lease_s
+        self.stopped = threading.Event()
+
+    def run(self):
+        conn = jobqueue.connect(self.db)
+        while not self.stopped.wait(self.lease_s / 3):
+            if not jobqueue.extend(conn, self.job_id, self.worker, self.lease_s):
+                break
+        conn.close()
+
+
+def work(db=None, worker=None, lease_s=None, poll_s=POLL_SECONDS, idle_exit=None, max_tasks=None):
+    """
+    Lease, run and report tasks until `max_tasks` ran or the queue stayed
+    empty for `idle_exit` seconds (None: forever). Returns tasks completed.
+    """
+    db = db or jobqueue.QUEUE_DB
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    lease_s = jobqueue.LEASE_SECONDS if lease_s is None else lease_s
+    conn = jobqueue.connect(db)
+
+    done = 0
+    idle_since = time.monotonic()
+    while max_tasks is None or done < max_tasks:
+        job = jobqueue.lease(conn, worker, lease_s)
+        if job is None:
+            if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                break
+            time.sleep(poll_s)
+            continue
+
+        heartbeat = _Heartbeat(db, job["id"], worker, lease_s)
+        heartbeat.start()
+        try:
+            result = run_job(job)
+        except Exception:
+            heartbeat.stopped.set()
+            jobqueue.fail(conn, job["id"], worker, traceback.format_exc())
+            print(f"{worker}: task {job['experiment_id']}/{job['task']} failed (attempt {job['attempt']})")
+        else:
+            heartbeat.stopped.set()
+            if jobqueue.complete(conn, job["id"], worker, result):
+                done += 1
+        heartbeat.join()
+        idle_since = time.monotonic()
+
+    conn.close()
+    return done
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Research worker: runs tasks from the shared job queue")
+    parser.add_argument("--db", default=jobqueue.QUEUE_DB)
+    parser.add_argument("--lease", type=float, default=jobqueue.LEASE_SECONDS, help="lease length in seconds")
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS)
+    parser.add_argument("--idle_exit", type=float, help="stop after the queue was empty this many seconds")
+    parser.add_argument("--max_tasks", type=int)
+
+    args = parser.parse_args()
+
+    done = work(args.db, lease_s=args.lease, poll_s=args.poll, idle_exit=args.idle_exit, max_tasks=args.max_tasks)
+    print(f"Worker finished {done} tasks")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from borgbot.risk.base import RiskEngine
+
+
 class ATRSizing(RiskEngine):
     def __init__(self, atr_period=14, risk_per_trade=0.01):
         self.atr_period = atr_period
@@ -7,7 +10,7 @@ class ATRSizing(RiskEngine):
         atr = context.atr  # will inject later
         risk_amount = equity * self.risk_per_trade
         stop_distance = atr
-        if stop_distance == 0:
+        if not stop_distance or stop_distance != stop_distance:  # 0 / None / NaN
             return 0.0
         qty = risk_amount / stop_distance
-        return qty
\ No newline at end of file
+        return qty
@@ -7,7 +7,7 @@ class FixedFractionSizing(RiskEngine):
         self.max_position_frac = config.get("max_position_frac", 0.1)
         self.min_cash_buffer_frac = config.get("min_cash_buffer_frac", 0.1)
 
-    def calculate_position_size(self, equity: float, price: float) -> float:
+    def calculate_position_size(self, equity: float, price: float, context=None) -> float:
         """
         Returns quantity to buy/sell.
         """
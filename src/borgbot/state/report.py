@@ -0,0 +1,60 @@
+import argparse
+import datetime
+
+from borgbot.state.store import DB_PATH, connect, get_snapshots, list_bots, merge_db, trade_summary
+
+
+def _iso(ts_ms):
+    if ts_ms is None:
+        return "?"
+    return datetime.datetime.utcfromtimestamp(ts_ms / 1000).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _fmt(v, spec):
+    return format(v, spec) if v is not None else "n/a"
+
+
+def print_status(conn):
+    trades = trade_summary(conn)
+    snaps = {s["bot"]: s for s in get_snapshots(conn)}
+
+    print(f"{'bot':16} {'trades':>7} {'last_trade':>20} {'price':>10} {'equity':>10} {'pnl':>9} {'roi%':>7}")
+
+    for bot in sorted(set(list_bots(conn)) | set(trades)):
+        n, last_ts = trades.get(bot, (0, None))
+        s = snaps.get(bot, {})
+        print(
+            f"{bot:16} {n:>7} {_iso(last_ts):>20} "
+            f"{_fmt(s.get('price'), '.2f'):>10} {_fmt(s.get('equity'), '.2f'):>10} "
+            f"{_fmt(s.get('pnl'), '.2f'):>9} {_fmt(s.get('roi_pct'), '.2f'):>7}"
+        )
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Status of every bot in a state db")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument(
+        "--merge",
+        nargs="*",
+        default=[],
+        help="per-bot state dbs to fold into --db first (bot id = file name, e.g. btcusdt_1m)",
+    )
+
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+
+    for path in args.merge:
+        try:
+            bots = merge_db(conn, path)
+        except ValueError as e:
+            print(f"Skipped {e}")
+            continue
+        print(f"Merged {path}: {', '.join(bots)}")
+
+    print_status(conn)
+
+
+if __name__ == "__main__":
+    main()
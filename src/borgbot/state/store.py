@@ -1,44 +1,326 @@
 import sqlite3, os
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 DB_PATH = os.environ.get("DB_PATH", "/app/state/borg.db")
+# WAL + NORMAL never corrupts the db on a crash; FULL also fsyncs every commit
+DB_SYNCHRONOUS = os.environ.get("DB_SYNCHRONOUS", "NORMAL").upper()
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+def default_bot_id(path: Optional[str] = None) -> str:
+    # BOT_ID wins; otherwise a per-bot db like btcusdt_1m.db names its bot "btcusdt_1m"
+    return os.environ.get("BOT_ID") or os.path.splitext(os.path.basename(path or DB_PATH))[0]
+
+BOT_ID = default_bot_id()
+
+# Every table is keyed by bot so several bots can share one db file.
 DDL = [
-    "CREATE TABLE IF NOT EXISTS kv (k TEXT PRIMARY KEY, v TEXT)",
-    "CREATE TABLE IF NOT EXISTS position (id INTEGER PRIMARY KEY CHECK (id=1), base_qty REAL NOT NULL DEFAULT 0.0, cash REAL NOT NULL DEFAULT 0.0, avg_price REAL NOT NULL DEFAULT 0.0)",
-    "CREATE TABLE IF NOT EXISTS trades (id INTEGER PRIMARY KEY AUTOINCREMENT, ts INTEGER NOT NULL, side TEXT NOT NULL, qty REAL NOT NULL, price REAL NOT NULL, fee REAL NOT NULL, cash_after REAL NOT NULL, base_after REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS bot_kv (bot TEXT NOT NULL, k TEXT NOT NULL, v TEXT, PRIMARY KEY (bot, k))",
+    "CREATE TABLE IF NOT EXISTS positions (bot TEXT PRIMARY KEY, base_qty REAL NOT NULL DEFAULT 0.0, cash REAL NOT NULL DEFAULT 0.0, avg_price REAL NOT NULL DEFAULT 0.0, starting_cash REAL)",
+    "CREATE TABLE IF NOT EXISTS trades (id INTEGER PRIMARY KEY AUTOINCREMENT, bot TEXT NOT NULL DEFAULT '', ts INTEGER NOT NULL, side TEXT NOT NULL, qty REAL NOT NULL, price REAL NOT NULL, fee REAL NOT NULL, cash_after REAL NOT NULL, base_after REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS snapshots (bot TEXT PRIMARY KEY, ts INTEGER, price REAL, cash REAL, base_qty REAL, equity REAL, starting_cash REAL, pnl REAL, trades INTEGER NOT NULL DEFAULT 0, last_trade_ts INTEGER)",
 ]
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_trades_bot_ts ON trades(bot, ts)",
+    # the PnL report seeks each bot's trades after its checkpoint id
+    "CREATE INDEX IF NOT EXISTS idx_trades_bot_id ON trades(bot, id)",
+]
+INSERT_TRADE = "INSERT INTO trades(bot, ts, side, qty, price, fee, cash_after, base_after) VALUES (?,?,?,?,?,?,?,?)"
+UPSERT_POSITION = (
+    "INSERT INTO positions(bot, base_qty, cash, avg_price) VALUES (?,?,?,?) "
+    "ON CONFLICT(bot) DO UPDATE SET base_qty=excluded.base_qty, cash=excluded.cash, avg_price=excluded.avg_price"
+)
+UPSERT_SNAPSHOT = (
+    "INSERT INTO snapshots(bot, ts, price, cash, base_qty, equity, starting_cash, pnl, trades, last_trade_ts) "
+    "VALUES (?,?,?,?,?,?,?,?,?,?) "
+    "ON CONFLICT(bot) DO UPDATE SET ts=excluded.ts, price=excluded.price, cash=excluded.cash, "
+    "base_qty=excluded.base_qty, equity=excluded.equity, starting_cash=excluded.starting_cash, "
+    "pnl=excluded.pnl, trades=excluded.trades, last_trade_ts=excluded.last_trade_ts"
+)
+SNAPSHOT_COLUMNS = ("bot", "ts", "price", "cash", "base_qty", "equity", "starting_cash", "pnl", "trades", "last_trade_ts")
 
-def connect():
-    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+def connect(path: Optional[str] = None, synchronous: Optional[str] = None, bot: Optional[str] = None):
+    synchronous = (synchronous or DB_SYNCHRONOUS).upper()
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"DB_SYNCHRONOUS must be one of {SYNCHRONOUS_MODES}, got {synchronous!r}")
+    # opening the db replays any committed transactions left in the WAL by a crash
+    conn = sqlite3.connect(path or DB_PATH, timeout=30, isolation_level=None)
     conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute(f"PRAGMA synchronous={synchronous};")
     for ddl in DDL:
         conn.execute(ddl)
-    cur = conn.execute("SELECT COUNT(*) FROM position")
-    (n,) = cur.fetchone()
-    if n == 0:
-        conn.execute("INSERT INTO position(id, base_qty, cash, avg_price) VALUES (1, 0.0, 0.0, 0.0)")
+    _migrate_single_bot(conn, bot or default_bot_id(path))
+    for ddl in INDEXES:
+        conn.execute(ddl)
     return conn
 
-def get_last_candle_ts(conn) -> Optional[int]:
-    cur = conn.execute("SELECT v FROM kv WHERE k='last_candle_ts'")
+def connect_readonly(path: Optional[str] = None):
+    """Reader for reports: never writes (schema, migrations, checkpoints) to the bots' db."""
+    return sqlite3.connect(f"file:{path or DB_PATH}?mode=ro", uri=True, timeout=30, isolation_level=None)
+
+def _infer_starting_cash(conn, bot: str, cash: float) -> Optional[float]:
+    # undo the first fill the same way PaperExecutionAdapter applied it
+    row = conn.execute(
+        "SELECT side, qty, price, fee, cash_after FROM trades WHERE bot=? ORDER BY ts, id LIMIT 1", (bot,)
+    ).fetchone()
+    if row is None:
+        return cash if cash > 0 else None
+    side, qty, price, fee, cash_after = row
+    if side == "buy":
+        return cash_after + qty * price + fee
+    return cash_after - qty * price + fee
+
+def _migrate_single_bot(conn, bot: str):
+    """Move a pre-namespacing db (singleton position row, global kv, trades without bot) under `bot`."""
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    trade_cols = {r[1] for r in conn.execute("PRAGMA table_info(trades)")}
+    if "position" not in tables and "kv" not in tables and "bot" in trade_cols:
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if "bot" not in trade_cols:
+            conn.execute("ALTER TABLE trades ADD COLUMN bot TEXT NOT NULL DEFAULT ''")
+        conn.execute("UPDATE trades SET bot=? WHERE bot=''", (bot,))
+        if "position" in tables:
+            row = conn.execute("SELECT base_qty, cash, avg_price FROM position WHERE id=1").fetchone()
+            if row is not None:
+                base_qty, cash, avg_price = row
+                conn.execute(
+                    "INSERT OR IGNORE INTO positions(bot, base_qty, cash, avg_price, starting_cash) VALUES (?,?,?,?,?)",
+                    (bot, base_qty, cash, avg_price, _infer_starting_cash(conn, bot, cash)),
+                )
+            conn.execute("DROP TABLE position")
+        if "kv" in tables:
+            conn.execute("INSERT OR IGNORE INTO bot_kv(bot, k, v) SELECT ?, k, v FROM kv", (bot,))
+            conn.execute("DROP TABLE kv")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def _bots(conn, schema: str = "main") -> set:
+    """Every bot with any state (position, kv, trades or snapshot) in `schema`."""
+    return {r[0] for r in conn.execute(
+        f"SELECT bot FROM {schema}.positions UNION SELECT bot FROM {schema}.bot_kv "
+        f"UNION SELECT bot FROM {schema}.trades UNION SELECT bot FROM {schema}.snapshots"
+    )}
+
+def merge_db(conn, src_path: str, bot: Optional[str] = None) -> List[str]:
+    """
+    Copy every bot from another state db (per-bot legacy files included)
+    into `conn`, all tables in one transaction. Refuses with ValueError if
+    any of them already has state in the target, so a bot's position and
+    trade history always come from the same file. Returns the bots merged.
+    """
+    bot = bot or os.path.splitext(os.path.basename(src_path))[0]
+    connect(src_path, bot=bot).close()  # brings the source up to the namespaced schema
+    conn.execute("ATTACH DATABASE ? AS src", (src_path,))
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            bots = _bots(conn, "src")
+            clash = sorted(bots & _bots(conn))
+            if clash:
+                raise ValueError(f"{src_path}: {', '.join(clash)} already in the target db; not merging")
+            conn.execute(
+                "INSERT INTO trades(bot, ts, side, qty, price, fee, cash_after, base_after) "
+                "SELECT bot, ts, side, qty, price, fee, cash_after, base_after FROM src.trades ORDER BY id"
+            )
+            conn.execute("INSERT INTO positions SELECT * FROM src.positions")
+            conn.execute("INSERT INTO bot_kv SELECT * FROM src.bot_kv")
+            conn.execute(f"INSERT INTO snapshots({', '.join(SNAPSHOT_COLUMNS)}) SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM src.snapshots")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.execute("DETACH DATABASE src")
+    return sorted(bots)
+
+def adopt_legacy_db(conn, bot: str = BOT_ID, path: Optional[str] = None) -> Optional[str]:
+    """
+    Merge the bot's pre-sharing state file (<bot>.db next to the shared db)
+    the first time the bot starts on the shared db, i.e. while it has no
+    state there yet. Returns the merged file's path, or None.
+    """
+    path = path or DB_PATH
+    legacy = os.path.join(os.path.dirname(os.path.abspath(path)), f"{bot}.db")
+    if legacy == os.path.abspath(path) or not os.path.exists(legacy) or bot in _bots(conn):
+        return None
+    merge_db(conn, legacy, bot=bot)
+    return legacy
+
+def get_last_candle_ts(conn, bot: str = BOT_ID) -> Optional[int]:
+    cur = conn.execute("SELECT v FROM bot_kv WHERE bot=? AND k='last_candle_ts'", (bot,))
     row = cur.fetchone()
     return int(row[0]) if row else None
 
-def set_last_candle_ts(conn, ts: int):
+def set_last_candle_ts(conn, ts: int, bot: str = BOT_ID):
     conn.execute(
-        "INSERT INTO kv(k,v) VALUES('last_candle_ts', ?) ON CONFLICT(k) DO UPDATE SET v=excluded.v",
-        (str(ts),),
+        "INSERT INTO bot_kv(bot,k,v) VALUES(?, 'last_candle_ts', ?) ON CONFLICT(bot,k) DO UPDATE SET v=excluded.v",
+        (bot, str(ts)),
     )
 
-def get_position(conn) -> Tuple[float, float, float]:
-    cur = conn.execute("SELECT base_qty, cash, avg_price FROM position WHERE id=1")
-    return cur.fetchone()
+def get_position(conn, bot: str = BOT_ID) -> Tuple[float, float, float]:
+    cur = conn.execute("SELECT base_qty, cash, avg_price FROM positions WHERE bot=?", (bot,))
+    return cur.fetchone() or (0.0, 0.0, 0.0)
 
-def set_position(conn, base_qty: float, cash: float, avg_price: float):
-    conn.execute("UPDATE position SET base_qty=?, cash=?, avg_price=? WHERE id=1", (base_qty, cash, avg_price))
+def set_position(conn, base_qty: float, cash: float, avg_price: float, bot: str = BOT_ID):
+    conn.execute(UPSERT_POSITION, (bot, base_qty, cash, avg_price))
 
-def add_trade(conn, ts:int, side:str, qty:float, price:float, fee:float, cash_after:float, base_after:float):
+def get_starting_cash(conn, bot: str = BOT_ID) -> Optional[float]:
+    row = conn.execute("SELECT starting_cash FROM positions WHERE bot=?", (bot,)).fetchone()
+    return row[0] if row else None
+
+def set_starting_cash(conn, starting_cash: float, bot: str = BOT_ID):
     conn.execute(
-        "INSERT INTO trades(ts, side, qty, price, fee, cash_after, base_after) VALUES (?,?,?,?,?,?,?)",
-        (ts, side, qty, price, fee, cash_after, base_after),
+        "INSERT INTO positions(bot, starting_cash) VALUES (?,?) ON CONFLICT(bot) DO UPDATE SET starting_cash=excluded.starting_cash",
+        (bot, starting_cash),
     )
+
+def add_trade(conn, ts:int, side:str, qty:float, price:float, fee:float, cash_after:float, base_after:float, bot: str = BOT_ID):
+    conn.execute(INSERT_TRADE, (bot, ts, side, qty, price, fee, cash_after, base_after))
+
+# ---------------------------
+# QUERIES (status / pnl reports)
+# ---------------------------
+def list_bots(conn) -> List[str]:
+    cur = conn.execute("SELECT bot FROM positions UNION SELECT bot FROM snapshots ORDER BY bot")
+    return [r[0] for r in cur.fetchall()]
+
+def get_snapshots(conn, bot: Optional[str] = None) -> List[Dict]:
+    sql = f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM snapshots"
+    cur = conn.execute(sql + " WHERE bot=?", (bot,)) if bot else conn.execute(sql + " ORDER BY bot")
+    rows = [dict(zip(SNAPSHOT_COLUMNS, r)) for r in cur.fetchall()]
+    for r in rows:
+        sc = r["starting_cash"]
+        r["roi_pct"] = (r["pnl"] / sc * 100) if sc and r["pnl"] is not None else None
+    return rows
+
+def trade_summary(conn) -> Dict[str, Tuple[int, Optional[int]]]:
+    """bot -> (trade count, last trade ts); one pass over idx_trades_bot_ts."""
+    cur = conn.execute("SELECT bot, COUNT(*), MAX(ts) FROM trades GROUP BY bot")
+    return {bot: (n, ts) for bot, n, ts in cur.fetchall()}
+
+def get_trades(conn, bot: str = BOT_ID, since_ts: Optional[int] = None, until_ts: Optional[int] = None) -> List[tuple]:
+    sql, params = "SELECT ts, side, qty, price, fee, cash_after, base_after FROM trades WHERE bot=?", [bot]
+    if since_ts is not None:
+        sql += " AND ts>=?"; params.append(since_ts)
+    if until_ts is not None:
+        sql += " AND ts<=?"; params.append(until_ts)
+    return conn.execute(sql + " ORDER BY ts, id", params).fetchall()
+
+
+class StateStore:
+    """
+    In-memory position book in front of the SQLite state db.
+
+    The in-memory position is the source of truth while the process runs.
+    Fills, the candle cursor and the bot's equity snapshot are buffered and
+    written by flush() in one transaction, so after a crash the db holds the
+    state as of the last flushed candle and the runner replays from its
+    last_candle_ts. After a failed tick, discard() does the same in-process.
+    """
+
+    def __init__(self, conn, bot: str = BOT_ID):
+        self.conn = conn
+        self.bot = bot
+        # fold whatever the WAL recovered into the main db file
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE);")
+        self.last_price = None
+        self.last_price_ts = None
+        self._trades: List[tuple] = []
+        self.discard()
+
+    def discard(self):
+        """
+        Drop everything buffered since the last flush and reload the committed
+        position, cash and cursor, so a candle whose flush (or processing)
+        failed can be replayed without filling twice.
+        """
+        conn, bot = self.conn, self.bot
+        self.base_qty, self.cash, self.avg_price = get_position(conn, bot)
+        self.starting_cash = get_starting_cash(conn, bot)
+        self.last_candle_ts = get_last_candle_ts(conn, bot)
+        self.trade_count, self.last_trade_ts = conn.execute(
+            "SELECT COUNT(*), MAX(ts) FROM trades WHERE bot=?", (bot,)
+        ).fetchone()
+        self._trades.clear()
+        self._position_dirty = False
+        self._cursor_dirty = False
+        self._snapshot_dirty = False
+
+    def get_position(self) -> Tuple[float, float, float]:
+        return self.base_qty, self.cash, self.avg_price
+
+    def set_position(self, base_qty: float, cash: float, avg_price: float):
+        self.base_qty, self.cash, self.avg_price = base_qty, cash, avg_price
+        self._position_dirty = True
+        self._snapshot_dirty = True
+
+    def set_starting_cash(self, starting_cash: float):
+        self.starting_cash = starting_cash
+        self._position_dirty = True
+
+    def add_trade(self, ts:int, side:str, qty:float, price:float, fee:float, cash_after:float, base_after:float):
+        self._trades.append((self.bot, ts, side, qty, price, fee, cash_after, base_after))
+        self.trade_count += 1
+        self.last_trade_ts = ts
+        self._snapshot_dirty = True
+
+    def set_last_candle_ts(self, ts: int):
+        self.last_candle_ts = ts
+        self._cursor_dirty = True
+
+    def mark_price(self, price: float, ts: int):
+        """Latest price, used for the equity/PnL snapshot written on flush."""
+        self.last_price = price
+        self.last_price_ts = ts
+        self._snapshot_dirty = True
+
+    def equity(self, last_price: float) -> float:
+        return self.cash + self.base_qty * last_price
+
+    @property
+    def dirty(self) -> bool:
+        snapshot_due = self._snapshot_dirty and self.last_price is not None
+        return self._position_dirty or self._cursor_dirty or snapshot_due or bool(self._trades)
+
+    def _snapshot_row(self):
+        equity = self.equity(self.last_price)
+        pnl = equity - self.starting_cash if self.starting_cash is not None else None
+        return (
+            self.bot, self.last_price_ts, self.last_price, self.cash, self.base_qty,
+            equity, self.starting_cash, pnl, self.trade_count, self.last_trade_ts,
+        )
+
+    def flush(self) -> bool:
+        """Group-commit everything buffered since the last flush. Returns False if there was nothing to write."""
+        if not self.dirty:
+            return False
+
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._position_dirty:
+                set_position(conn, self.base_qty, self.cash, self.avg_price, bot=self.bot)
+                if self.starting_cash is not None:
+                    set_starting_cash(conn, self.starting_cash, bot=self.bot)
+            if self._trades:
+                conn.executemany(INSERT_TRADE, self._trades)
+            if self._cursor_dirty:
+                set_last_candle_ts(conn, self.last_candle_ts, bot=self.bot)
+            snapshot_due = self._snapshot_dirty and self.last_price is not None
+            if snapshot_due:
+                conn.execute(UPSERT_SNAPSHOT, self._snapshot_row())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._trades.clear()
+        self._position_dirty = False
+        self._cursor_dirty = False
+        if snapshot_due:
+            self._snapshot_dirty = False
+        return True
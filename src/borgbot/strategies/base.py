@@ -1,6 +1,12 @@
 from abc import ABC, abstractmethod
 from typing import Dict
 
+import numpy as np
+
+# first bar the backtest asks a strategy for a signal
+WARMUP_BARS = 50
+
+
 class Strategy(ABC):
     def __init__(self, config: Dict):
         self.config = config
@@ -13,4 +19,29 @@ class Strategy(ABC):
             -1.0 = strong short
              0.0 = hold
         """
-        pass
\ No newline at end of file
+        pass
+
+
+def signal_series(strategy, candles, start: int = WARMUP_BARS, higher_tf=None) -> np.ndarray:
+    """
+    Signal for every bar of `candles`, 0.0 before `start`.
+
+    Bar i only sees candles[:i], exactly like the backtest loop. Strategies
+    that implement generate_signals(candles, start) are evaluated in one
+    vectorized call; anything else falls back to per-bar generate_signal.
+    `higher_tf` is a data.mtf.MultiTimeframe built over the same candles;
+    per-bar strategies get its view at bar i as context["higher_tf"].
+    """
+    vectorized = getattr(strategy, "generate_signals", None)
+    if vectorized is not None:
+        if higher_tf is None:
+            return vectorized(candles, start)
+        return vectorized(candles, start, higher_tf=higher_tf)
+
+    out = np.zeros(len(candles))
+    for i in range(start, len(candles)):
+        context = {"candles": candles.iloc[:i]}
+        if higher_tf is not None:
+            context["higher_tf"] = higher_tf.at(i)
+        out[i] = strategy.generate_signal(context)
+    return out
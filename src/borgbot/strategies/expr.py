@@ -0,0 +1,355 @@
+import ast
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from .base import Strategy, WARMUP_BARS
+
+# bytes of evaluated subexpressions kept between configs (every dataset together)
+EXPR_CACHE_MB = float(os.environ.get("EXPR_CACHE_MB", "512"))
+
+SERIES = ("open", "high", "low", "close", "volume")
+
+
+# ---------------------------
+# COMPILE
+# ---------------------------
+# A compiled expression is a tree of hashable tuples: ("col", name),
+# ("const", value), ("call", fn, *args) and ("op", op, *args). Parameters
+# are substituted while compiling, so equal subexpressions of different
+# configs are equal tuples and share one cache entry.
+
+_BINOPS = {ast.Add: "add", ast.Sub: "sub", ast.Mult: "mul", ast.Div: "div", ast.BitAnd: "and", ast.BitOr: "or"}
+_CMPOPS = {ast.Lt: "lt", ast.LtE: "le", ast.Gt: "gt", ast.GtE: "ge"}
+_FOLD = {"add": lambda a, b: a + b, "sub": lambda a, b: a - b, "mul": lambda a, b: a * b, "div": lambda a, b: a / b}
+
+
+def _compile(node, params):
+    if isinstance(node, ast.Expression):
+        return _compile(node.body, params)
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return ("const", float(node.value))
+
+    if isinstance(node, ast.Name):
+        if node.id in SERIES:
+            return ("col", node.id)
+        if node.id not in params:
+            raise ValueError(f"Unknown name {node.id!r}: not a series and not in the config")
+        return ("const", float(params[node.id]))
+
+    if isinstance(node, ast.UnaryOp):
+        arg = _compile(node.operand, params)
+        if isinstance(node.op, ast.USub):
+            return ("const", -arg[1]) if arg[0] == "const" else ("op", "neg", arg)
+        if isinstance(node.op, (ast.Invert, ast.Not)):
+            return ("op", "not", arg)
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+        op = _BINOPS[type(node.op)]
+        a, b = _compile(node.left, params), _compile(node.right, params)
+        if a[0] == b[0] == "const" and op in _FOLD:
+            return ("const", _FOLD[op](a[1], b[1]))
+        return ("op", op, a, b)
+
+    if isinstance(node, ast.BoolOp):
+        op = "and" if isinstance(node.op, ast.And) else "or"
+        out = _compile(node.values[0], params)
+        for value in node.values[1:]:
+            out = ("op", op, out, _compile(value, params))
+        return out
+
+    if isinstance(node, ast.Compare):
+        # a < b < c is (a < b) & (b < c), as in Python
+        out, left = None, _compile(node.left, params)
+        for op, right in zip(node.ops, node.comparators):
+            if type(op) not in _CMPOPS:
+                raise ValueError(f"Unsupported comparison {type(op).__name__}")
+            right = _compile(right, params)
+            term = ("op", _CMPOPS[type(op)], left, right)
+            out = term if out is None else ("op", "and", out, term)
+            left = right
+        return out
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        name = node.func.id
+        if name not in FUNCTIONS:
+            raise ValueError(f"Unknown function {name!r}; available: {', '.join(sorted(FUNCTIONS))}")
+        return ("call", name) + tuple(_compile(a, params) for a in node.args)
+
+    raise ValueError(f"Unsupported expression: {ast.dump(node)}")
+
+
+def compile_expr(text, params=None):
+    """Parse an expression and substitute `params`; raises ValueError on anything outside the language."""
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression {text!r}: {e.msg}") from None
+    return _compile(tree, params or {})
+
+
+_CONDITION_CALLS = ("cross", "crossunder", "valid")
+
+
+def is_condition(node):
+    """True when a compiled node is boolean per bar: comparisons, cross/crossunder/valid and & | ~ of those."""
+    if node[0] == "call":
+        return node[1] in _CONDITION_CALLS
+    if node[0] != "op":
+        return False
+    if node[1] in _CMPOPS.values():
+        return True
+    if node[1] in ("and", "or", "not"):
+        return all(is_condition(a) for a in node[2:])
+    return False
+
+
+# ---------------------------
+# FUNCTIONS
+# ---------------------------
+# fn(ev, *args) -> array; args are compiled nodes so periods can be read as constants.
+# Every series is causal: index j only uses bars up to and including j.
+
+def _period(node):
+    if node[0] != "const" or node[1] != int(node[1]) or node[1] < 1:
+        raise ValueError(f"Period must be a positive whole number, got {node}")
+    return int(node[1])
+
+
+# bars an ema needs before its value matches a run from the first bar to float precision:
+# (1 - 2 / (span + 1)) ** (EMA_SPANS * span) stays below 1e-17 for any span
+EMA_SPANS = 20
+
+
+def lookback(node):
+    """Bars before index j that the value at j can depend on."""
+    if node[0] != "call":
+        return max((lookback(a) for a in node[2:] if isinstance(a, tuple)), default=0) if node[0] == "op" else 0
+    fn, args = node[1], node[2:]
+    inner = max((lookback(a) for a in args), default=0)
+    if fn in ("sma", "rsi"):
+        return inner + _period(args[1]) + (fn == "rsi")
+    if fn == "ema":
+        return inner + EMA_SPANS * _period(args[1])
+    if fn == "atr":
+        return _period(args[0]) + 1
+    if fn == "shift":
+        return inner + _period(args[1])
+    if fn in ("cross", "crossunder"):
+        return inner + 1
+    return inner
+
+
+def _shifted(values, k=1):
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if k < len(values):
+        out[k:] = values[: len(values) - k]
+    return out
+
+
+def _sma(ev, x, n):
+    n = _period(n)
+    if x == ("col", "close") and f"sma_{n}" in ev.candles:
+        return np.asarray(ev.candles[f"sma_{n}"], dtype=np.float64)
+    from borgbot.indicators.sma import rolling_sma
+
+    return rolling_sma(ev.value(x), n)
+
+
+def _ema(ev, x, n):
+    import pandas as pd
+
+    return pd.Series(ev.value(x)).ewm(span=_period(n), adjust=False).mean().to_numpy()
+
+
+def _rsi(ev, x, n):
+    n = _period(n)
+    if x == ("col", "close") and f"rsi_{n}" in ev.candles:
+        return np.asarray(ev.candles[f"rsi_{n}"], dtype=np.float64)
+    from borgbot.indicators.rsi import rsi
+
+    return rsi(ev.value(x), n).to_numpy()
+
+
+def _atr(ev, n):
+    n = _period(n)
+    if f"atr_{n}" in ev.candles:
+        return np.asarray(ev.candles[f"atr_{n}"], dtype=np.float64)
+    from borgbot.indicators.atr import atr
+
+    return atr(ev.value(("col", "high")), ev.value(("col", "low")), ev.value(("col", "close")), n).to_numpy()
+
+
+def _cross(ev, a, b):
+    # a closes above b on this bar after being at or below it on the previous one
+    va, vb = ev.value(a), ev.value(b)
+    return (va > vb) & (_shifted(va) <= _shifted(vb))
+
+
+FUNCTIONS = {
+    "sma": _sma,
+    "ema": _ema,
+    "rsi": _rsi,
+    "atr": _atr,
+    "cross": _cross,
+    "crossunder": lambda ev, a, b: _cross(ev, b, a),
+    "shift": lambda ev, x, k: _shifted(ev.value(x), _period(k)),
+    "abs": lambda ev, x: np.abs(ev.value(x)),
+    "valid": lambda ev, x: ~np.isnan(ev.value(x)),
+    "min": lambda ev, a, b: np.fmin(ev.value(a), ev.value(b)),
+    "max": lambda ev, a, b: np.fmax(ev.value(a), ev.value(b)),
+}
+
+_OPS = {
+    "add": np.add, "sub": np.subtract, "mul": np.multiply, "div": np.divide,
+    "lt": np.less, "le": np.less_equal, "gt": np.greater, "ge": np.greater_equal,
+    "and": np.logical_and, "or": np.logical_or,
+}
+
+
+# ---------------------------
+# EVALUATE
+# ---------------------------
+class _Cache:
+    """LRU of evaluated nodes per dataset, bounded by total bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, pin):
+        # `pin` keeps the dataset's arrays alive, so their addresses in `key` can't be reused
+        value.flags.writeable = False  # shared by every config that reuses it
+        self.entries[key] = (value, pin)
+        self.bytes += value.nbytes
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, (old, _) = self.entries.popitem(last=False)
+            self.bytes -= old.nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+
+CACHE = _Cache(EXPR_CACHE_MB * 2**20)
+
+
+def _dataset_key(candles):
+    """Identity of a candle set by its columns' memory; views of one buffer at one offset share it."""
+    arrays = [np.asarray(candles[name]) for name in SERIES]
+    key = (len(candles), tuple(sorted(candles.columns)), tuple(a.__array_interface__["data"][0] for a in arrays))
+    return key, arrays
+
+
+class Evaluator:
+    """Evaluates compiled nodes over one candle set, sharing results through CACHE unless `cached` is False."""
+
+    def __init__(self, candles, cached=True):
+        self.candles = candles
+        self.cache = cache = CACHE if cached else None
+        self.key, self.pin = _dataset_key(candles) if cache is not None else (None, None)
+
+    def value(self, node):
+        key = (self.key, node)
+        if self.cache is not None and node[0] not in ("const", "col"):
+            hit = self.cache.get(key)
+            if hit is not None:
+                return hit
+
+        kind = node[0]
+        if kind == "const":
+            return np.full(len(self.candles), node[1])
+        if kind == "col":
+            return np.asarray(self.candles[node[1]], dtype=np.float64)
+        if kind == "call":
+            out = FUNCTIONS[node[1]](self, *node[2:])
+        elif node[1] == "neg":
+            out = -self.value(node[2])
+        elif node[1] == "not":
+            out = ~self.value(node[2]).astype(bool)
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out = _OPS[node[1]](self.value(node[2]), self.value(node[3]))
+
+        if self.cache is not None:
+            self.cache.put(key, out, self.pin)
+        return out
+
+
+# ---------------------------
+# STRATEGY
+# ---------------------------
+class ExprStrategy(Strategy):
+    """
+    Strategy written as expressions over candle series and indicators, e.g.
+
+        {"type": "expr", "fast": 9, "slow": 21, "p": 14, "os": 30,
+         "entry": "cross(sma(close, fast), sma(close, slow)) & (rsi(close, p) < os)",
+         "exit": "crossunder(sma(close, fast), sma(close, slow))"}
+
+    "entry" gives +1, "exit" -1 (both at once: 0); both must be conditions
+    (comparisons, cross/crossunder/valid, or & | ~ of those), so a NaN or
+    nonzero number is never read as true. A single numeric "signal"
+    expression gives its sign instead, a boolean one +1 where true. Other
+    config keys are parameters. Series: open high low close volume;
+    functions: sma ema rsi atr cross crossunder shift abs valid min max;
+    operators: + - * / < <= > >= & | ~ and parentheses.
+
+    Bar i sees candles[:i]. Subexpressions are cached by dataset, so
+    configs in one sweep that share sma(close, 9) compute it once.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        params = {k: v for k, v in config.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+        self.roots = {
+            name: compile_expr(config[name], params) for name in ("signal", "entry", "exit") if config.get(name)
+        }
+        if not self.roots or ("signal" in self.roots and len(self.roots) > 1):
+            raise ValueError("An expr strategy needs either a 'signal' or an 'entry' (and optional 'exit') expression")
+        for name in ("entry", "exit"):
+            if name in self.roots and not is_condition(self.roots[name]):
+                raise ValueError(f"{name!r} must be a condition (a comparison, cross, valid, or & | ~ of those)")
+
+    @property
+    def lookback(self):
+        return max(lookback(node) for node in self.roots.values()) + 1
+
+    def _evaluate(self, ev):
+        if "signal" in self.roots:
+            v = ev.value(self.roots["signal"])
+            if v.dtype == bool:
+                return v.astype(np.float64)
+            return np.nan_to_num(np.sign(v))
+        out = np.zeros(len(ev.candles))
+        out[ev.value(self.roots["entry"]).astype(bool)] += 1.0
+        if "exit" in self.roots:
+            out[ev.value(self.roots["exit"]).astype(bool)] -= 1.0
+        return out
+
+    def generate_signal(self, context):
+        candles = context["candles"]
+        if len(candles) == 0:
+            return 0.0
+        return float(self._evaluate(Evaluator(candles, cached=False))[-1])
+
+    def generate_signals(self, candles, start=WARMUP_BARS, higher_tf=None):
+        out = np.zeros(len(candles))
+        if len(candles) > 1:
+            out[1:] = self._evaluate(Evaluator(candles))[:-1]  # bar i sees candles[:i]
+        out[:start] = 0.0
+        return out
@@ -1,42 +1,62 @@
+import numpy as np
+
 from borgbot.indicators.rsi import rsi
-from .base import Strategy
+from borgbot.indicators.sma import rolling_sma
+from .base import Strategy, WARMUP_BARS
+
+
+def _last(values):
+    # Series from a DataFrame, plain array from a CandleArray
+    return values.iloc[-1] if hasattr(values, "iloc") else values[-1]
 
 class RSIStrategy(Strategy):
+    """
+    Buys below `oversold`, sells above `overbought`. RSI and the trend SMA
+    come from the rsi_<period> / sma_<trend_period> columns of
+    build_indicator_cache when present and are computed otherwise.
+    """
+
+    def _params(self):
+        return (
+            self.config.get("period", 14),
+            self.config.get("overbought", 70),
+            self.config.get("oversold", 30),
+            self.config.get("trend_period", 50),
+        )
+
+    @property
+    def lookback(self):
+        period, _, _, trend_period = self._params()
+        return max(period, trend_period) + 1
+
+    def _series(self, candles, period, trend_period):
+        closes = candles["close"]
+        col = f"rsi_{period}"
+        rsi_series = candles[col] if col in candles else rsi(closes, period)
+        col = f"sma_{trend_period}"
+        sma_series = candles[col] if col in candles else rolling_sma(closes, trend_period)
+        return rsi_series, sma_series
 
     def generate_signal(self, context) -> float:
 
         candles = context["candles"]
         closes = candles["close"]
 
-        period = self.config.get("period", 14)
-        overbought = self.config.get("overbought", 70)
-        oversold = self.config.get("oversold", 30)
-        trend_period = self.config.get("trend_period", 50)
-
-        # --- RSI ---
-        rsi_series = rsi(closes, period)
-
-        if len(rsi_series) < period:
-            return 0.0
-
-        value = rsi_series.iloc[-1]
+        period, overbought, oversold, trend_period = self._params()
 
-        if value != value:  # NaN
+        if len(closes) < max(period, trend_period):
             return 0.0
 
-        # --- TREND (from cache) ---
-        col = f"sma_{trend_period}"
+        # --- RSI / TREND (from cache) ---
+        rsi_series, sma_series = self._series(candles, period, trend_period)
 
-        if col not in candles:
-            return 0.0
-
-        sma_series = candles[col]
+        value = _last(rsi_series)
 
-        if len(sma_series) < trend_period:
+        if value != value:  # NaN
             return 0.0
 
-        trend_value = sma_series.iloc[-1]
-        price = closes.iloc[-1]
+        trend_value = _last(sma_series)
+        price = _last(closes)
 
         if trend_value != trend_value:  # NaN
             return 0.0
@@ -55,4 +75,26 @@ class RSIStrategy(Strategy):
                 return -1.0
             return -1.0
 
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+    def generate_signals(self, candles, start=WARMUP_BARS, higher_tf=None):
+        period, overbought, oversold, trend_period = self._params()
+        out = np.zeros(len(candles))
+        if len(candles) == 0:
+            return out
+
+        rsi_series, sma_series = self._series(candles, period, trend_period)
+
+        # bar i sees candles[:i], i.e. the causal series up to index i - 1
+        value = np.empty(len(candles))
+        value[0] = np.nan
+        value[1:] = np.asarray(rsi_series, dtype=np.float64)[:-1]
+        trend = np.empty(len(candles))
+        trend[0] = np.nan
+        trend[1:] = np.asarray(sma_series, dtype=np.float64)[:-1]
+
+        out[value < oversold] = 1.0
+        out[value > overbought] = -1.0
+        out[np.isnan(trend)] = 0.0
+        out[: max(start, period, trend_period)] = 0.0
+        return out
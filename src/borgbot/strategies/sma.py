@@ -1,8 +1,33 @@
-from borgbot.strategies.base import Strategy
-from borgbot.indicators.sma import sma
+import numpy as np
+
+from borgbot.strategies.base import Strategy, WARMUP_BARS
+from borgbot.indicators.sma import sma, trailing_sma
 
 
 class SMAStrategy(Strategy):
+    """
+    Fast/slow SMA cross. With config["trend_tf"] set (e.g. "1h"), longs are
+    only taken while that timeframe's close is above its
+    sma_<config["trend_sma"]> (default 50).
+    """
+
+    @property
+    def lookback(self):
+        # bars a signal depends on; the per-bar path also holds until 30 bars exist
+        return max(self.config["fast"], self.config["slow"], 30)
+
+    @property
+    def higher_tf(self):
+        tf = self.config.get("trend_tf")
+        return {tf: [f"sma_{self.config.get('trend_sma', 50)}"]} if tf else {}
+
+    def _trend_ok(self, higher_tf):
+        tf = self.config.get("trend_tf")
+        if not tf:
+            return True
+        bar = (higher_tf or {}).get(tf) or {}
+        trend = bar.get(f"sma_{self.config.get('trend_sma', 50)}")
+        return trend is not None and bar["close"] > trend
 
     def generate_signal(self, context):
 
@@ -17,9 +42,27 @@ class SMAStrategy(Strategy):
         slow = sma(closes, self.config["slow"])
 
         if fast > slow:
-            return 1.0
+            return 1.0 if self._trend_ok(context.get("higher_tf")) else 0.0
 
         if fast < slow:
             return -1.0
 
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+    def generate_signals(self, candles, start=WARMUP_BARS, higher_tf=None):
+        closes = np.asarray(candles["close"], dtype=np.float64)
+
+        fast = trailing_sma(closes, self.config["fast"])
+        slow = trailing_sma(closes, self.config["slow"])
+
+        out = np.sign(fast - slow)
+        out[: max(start, 30)] = 0.0
+
+        tf = self.config.get("trend_tf")
+        if tf:
+            if higher_tf is None:
+                out[out > 0] = 0.0
+            else:
+                trend = higher_tf.aligned(tf, f"sma_{self.config.get('trend_sma', 50)}")
+                out[(out > 0) & ~(higher_tf.aligned(tf, "close") > trend)] = 0.0
+        return out
@@ -1,10 +1,34 @@
 from typing import List, Tuple
-from .base import Strategy
+
+import numpy as np
+
+from borgbot.data.timeframes import merge_specs
+from .base import Strategy, WARMUP_BARS, signal_series
+
+def signal_matrix(strategies, candles, start=WARMUP_BARS, higher_tf=None) -> np.ndarray:
+    """
+    (n_bars, n_strategies) matrix of each strategy's signal_series, so
+    weighted stacks of them are one product: signal_matrix(...) @ weights.
+    """
+    out = np.empty((len(candles), len(strategies)))
+    for j, strategy in enumerate(strategies):
+        out[:, j] = signal_series(strategy, candles, start, higher_tf)
+    return out
 
 class StrategyStack:
     def __init__(self, strategies: List[Tuple[Strategy, float]]):
         self.strategies = strategies  # (strategy, weight)
 
+    @property
+    def lookback(self):
+        # None (unknown) if any member can't say how far back it looks
+        bars = [getattr(s, "lookback", None) for s, _ in self.strategies]
+        return None if None in bars else max(bars, default=0)
+
+    @property
+    def higher_tf(self):
+        return merge_specs(*(getattr(s, "higher_tf", None) for s, _ in self.strategies))
+
     def generate_signal(self, context) -> float:
         total_weight = 0.0
         weighted_sum = 0.0
@@ -17,4 +41,18 @@ class StrategyStack:
         if total_weight == 0:
             return 0.0
 
-        return weighted_sum / total_weight
\ No newline at end of file
+        return weighted_sum / total_weight
+
+    def generate_signals(self, candles, start=WARMUP_BARS, higher_tf=None) -> np.ndarray:
+        # same accumulation order as generate_signal, one member series at a time
+        total_weight = 0.0
+        weighted_sum = np.zeros(len(candles))
+
+        for strategy, weight in self.strategies:
+            weighted_sum += signal_series(strategy, candles, start, higher_tf) * weight
+            total_weight += weight
+
+        if total_weight == 0:
+            return np.zeros(len(candles))
+
+        return weighted_sum / total_weight
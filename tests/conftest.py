@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+
+def random_candles(n, seed=0, start="2024-01-01", freq="min", vol=0.003, spread=0.002):
+    """Geometric random-walk candles; high / low are close -+ `spread`."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, vol, n)))
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq=freq),
+        "open": close, "high": close * (1 + spread), "low": close * (1 - spread), "close": close, "volume": 1.0,
+    })
+
+
+class PerBar:
+    """Hides generate_signals so signal_series takes the per-bar path."""
+    def __init__(self, strategy):
+        self.strategy = strategy
+
+    def generate_signal(self, context):
+        return self.strategy.generate_signal(context)
@@ -0,0 +1,41 @@
+import sqlite3
+
+from borgbot.analytics.ledger import ledger_report
+from borgbot.state.store import connect, connect_readonly, StateStore
+
+
+def test_ledger_report_is_incremental_and_never_writes_the_state_db(tmp_path):
+    path = str(tmp_path / "borg.db")
+    state = StateStore(connect(path), bot="btc")
+    state.set_position(0.0, 1000.0, 0.0); state.set_starting_cash(1000.0)
+    state.add_trade(1, "buy", 1.0, 100.0, 0.1, 899.9, 1.0)
+    state.add_trade(2, "sell", 1.0, 110.0, 0.11, 1009.79, 0.0)
+    state.flush()
+
+    reader = connect_readonly(path)
+    checkpoints = sqlite3.connect(str(tmp_path / "checkpoints.db"), isolation_level=None)
+    first = ledger_report(reader, checkpoints_conn=checkpoints).iloc[0]
+    assert (first.trades, first.round_trips) == (2, 1)
+    assert round(first.pnl, 6) == 9.79 and round(first.pnl_min, 6) == -0.1
+
+    state.add_trade(3, "buy", 2.0, 100.0, 0.2, 809.59, 2.0)
+    state.mark_price(120.0, 3)
+    state.flush()
+
+    again = ledger_report(reader, checkpoints_conn=checkpoints).iloc[0]
+    assert again.trades == 3
+    assert round(again.equity, 6) == round(809.59 + 2 * 120.0, 6)
+    assert round(again.pnl_avg, 6) == round((-0.1 + 9.79 + 9.59) / 3, 6)
+    full = ledger_report(reader).iloc[0]  # no checkpoints: a full replay agrees
+    assert full.trades == 3 and round(full.equity - again.equity, 9) == 0 and round(full.pnl_avg - again.pnl_avg, 9) == 0
+
+    tables = {r[0] for r in reader.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert "ledger_checkpoints" not in tables
+    assert checkpoints.execute("SELECT last_id FROM ledger_checkpoints").fetchone() == (3,)
+
+    # the incremental read seeks past the checkpoint instead of walking the bot's whole history
+    (plan,) = [r[-1] for r in reader.execute(
+        "EXPLAIN QUERY PLAN SELECT id, ts, side='buy', qty, price, fee, base_after FROM trades "
+        "WHERE bot=? AND id>? ORDER BY id", ("btc", 3),
+    )]
+    assert "idx_trades_bot_id (bot=? AND id>?)" in plan
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from borgbot.backtest.engine import BacktestEngine
+from borgbot.backtest import segmented
+from borgbot.backtest.portfolio import PortfolioBacktestEngine, align_candles
+from borgbot.data.candles import CandleArray, time_range
+from borgbot.data.indicator_cache import build_indicator_cache
+from borgbot.data.loader import iter_candles
+from borgbot.indicators.sma import sma, trailing_sma
+from borgbot.risk.fixed_fraction import FixedFractionSizing
+from borgbot.strategies.base import signal_series
+from borgbot.strategies.expr import ExprStrategy
+from borgbot.strategies.rsi import RSIStrategy
+from borgbot.strategies.sma import SMAStrategy
+from borgbot.strategies.stack import StrategyStack
+
+from conftest import PerBar, random_candles
+
+
+def test_vectorized_sma_matches_per_bar():
+    candles = random_candles(600)
+    sma = SMAStrategy({"fast": 9, "slow": 21})
+    assert np.array_equal(signal_series(sma, candles), signal_series(PerBar(sma), candles))
+    assert BacktestEngine(sma).run(candles) == BacktestEngine(PerBar(sma)).run(candles)
+
+
+def test_trailing_sma_matches_per_bar_sma_to_rounding():
+    closes = random_candles(2000, seed=5)["close"].to_numpy()
+    for period in (9, 21, 50):
+        fast = trailing_sma(closes, period)
+        slow = [sma(list(closes[:i]), period) for i in range(period, len(closes))]
+        np.testing.assert_allclose(fast[period:], slow, rtol=1e-12)
+
+
+def test_vectorized_rsi_matches_per_bar():
+    raw = random_candles(900, seed=3)
+    cached = build_indicator_cache(raw)
+    assert np.allclose(cached["sma_100"].iloc[99:], raw["close"].rolling(100).mean().iloc[99:])
+    assert cached["sma_100"].isna().sum() == 99
+
+    for config in ({"period": 14}, {"period": 11, "overbought": 65, "oversold": 35, "trend_period": 100}):
+        rsi = RSIStrategy(config)
+        for candles in (raw, cached, CandleArray.from_frame(cached, dtype=np.float32)):
+            fast = signal_series(rsi, candles)
+            assert np.array_equal(fast, signal_series(PerBar(rsi), candles))
+            assert (fast > 0).any() and (fast < 0).any()
+
+    stack = StrategyStack([(SMAStrategy({"fast": 9, "slow": 21}), 0.5), (RSIStrategy({"period": 14}), 0.5)])
+    assert BacktestEngine(stack).run(cached) == BacktestEngine(PerBar(stack)).run(cached)
+
+
+def test_portfolio_shares_cash_across_aligned_assets():
+    btc = random_candles(800, seed=1)
+    eth = random_candles(700, seed=2, start="2024-01-01 03:20")
+    ts, closes, present = align_candles({"BTC": btc, "ETH": eth})
+    assert len(ts) == 900 and present.sum() == 1500
+    assert np.isnan(closes[0, 1]) and not np.isnan(closes[-1, 0])
+
+    sma = SMAStrategy({"fast": 9, "slow": 21})
+    res = PortfolioBacktestEngine({"BTC": sma, "ETH": sma}).run({"BTC": btc, "ETH": eth})
+    assert res["per_asset_trades"]["BTC"] > 0 and res["per_asset_trades"]["ETH"] > 0
+    assert 0 <= res["max_drawdown"] < 1
+
+    # one asset, all-in sizing and no costs is the single-series engine
+    single = BacktestEngine(sma, fees_bps=0).run(btc)
+    solo = PortfolioBacktestEngine(
+        {"BTC": sma}, sizing=FixedFractionSizing({"max_position_frac": 1.0}), fees_bps=0, slippage_pct=0
+    ).run({"BTC": btc})
+    assert (solo["trades"], solo["roi_pct"]) == (single["trades"], single["roi_pct"])
+
+
+class _AlwaysLong:
+    def generate_signal(self, context):
+        return 1.0
+
+
+def _flat_hours(n, drops):
+    df = random_candles(n, freq="h")
+    close = np.full(n, 100.0)
+    for start, stop, price in drops:
+        close[start:stop] = price
+    df["close"] = close
+    return df
+
+
+def test_trading_window_mask_matches_live_check_across_dst():
+    import pytz
+    from datetime import datetime
+
+    from borgbot.core.risk import is_in_window, local_days, window_mask
+
+    tz = pytz.timezone("Europe/Dublin")
+    ts = np.arange(1711760000000, 1711760000000 + 3 * 86_400_000, 7 * 60_000)  # spans the March DST change
+    local = [datetime.fromtimestamp(t / 1000, tz) for t in ts.tolist()]
+
+    for window in ("09:00-17:30", "22:00-03:15", "00:00-23:59"):
+        assert window_mask(ts, window, "Europe/Dublin").tolist() == [is_in_window(t, window) for t in local]
+
+    days = local_days(ts, "Europe/Dublin")
+    assert (np.diff(days) != 0).tolist() == (np.diff([t.date().toordinal() for t in local]) != 0).tolist()
+
+
+def test_backtest_applies_trading_window_and_daily_loss_halt():
+    candles = _flat_hours(24 * 5, [])
+    r = BacktestEngine(_AlwaysLong(), trading_window="09:00-16:59").run(candles)
+    assert r["paused_window"] == sum(1 for h in range(50, 24 * 5) if not 9 <= h % 24 <= 16)
+
+    # a 3% dip from bar 60 halts trading until equity is back above the day's 2% floor
+    dip = _flat_hours(24 * 5, [(60, 66, 97.0)])
+    r = BacktestEngine(_AlwaysLong(), daily_max_loss_pct=0.02).run(dip)
+    assert (r["paused_loss"], r["trades"]) == (6, 1)
+
+    # a lasting drop halts for the rest of the day; the next day starts a new baseline
+    drop = _flat_hours(24 * 5, [(60, 24 * 5, 97.0)])
+    r = BacktestEngine(_AlwaysLong(), daily_max_loss_pct=0.02).run(drop)
+    assert r["paused_loss"] == 72 - 60
+
+    assert BacktestEngine(_AlwaysLong()).run(drop)["paused_loss"] == 0
+
+
+def test_execution_sweep_matches_engine_on_one_signal_pass():
+    from borgbot.backtest.sweep import sweep_execution
+    from borgbot.strategies.base import WARMUP_BARS
+
+    candles = random_candles(3000, seed=7)
+    closes = candles["close"].to_numpy().copy()
+    signals = signal_series(SMAStrategy({"fast": 5, "slow": 20}), candles, WARMUP_BARS)
+    # flat, then a buy into a rising finish, so every setting ends holding a position
+    signals[-10:-3] = -1.0
+    signals[-3:] = 1.0
+    closes[-3:] = closes[-3] * np.array([1.0, 1.001, 1.002])
+
+    results = sweep_execution(closes, signals, (0.002, 0.01, 0.05), (0.0, 10.0, 25.0), (0.0, 0.001))
+    assert len(results) == 18
+
+    for r in results:
+        if r["slippage_pct"] == 0:
+            engine = BacktestEngine(None, trailing_pct=r["trailing_pct"], fees_bps=r["fees_bps"])
+            e = engine.run_signals(closes, signals)
+            assert (r["trades"], r["roi_pct"], r["final_equity"]) == (e["trades"], e["roi_pct"], e["final_equity"])
+            assert engine.trades[-1][0] == "buy"
+
+    by_key = {(r["trailing_pct"], r["fees_bps"], r["slippage_pct"]): r for r in results}
+    for trail in (0.002, 0.01, 0.05):
+        assert by_key[(trail, 10.0, 0.001)]["roi_pct"] < by_key[(trail, 10.0, 0.0)]["roi_pct"]
+        assert by_key[(trail, 25.0, 0.0)]["roi_pct"] < by_key[(trail, 0.0, 0.0)]["roi_pct"]
+
+
+def test_segmented_signals_and_results_match_one_pass(monkeypatch):
+    monkeypatch.setattr(segmented, "MIN_SEGMENT_BARS", 300)
+    raw = random_candles(2000, seed=7)
+    cached = build_indicator_cache(raw)
+    assert segmented.segment_bounds(2000, 3) == [(50, 700), (700, 1350), (1350, 2000)]
+
+    stack = StrategyStack([(SMAStrategy({"fast": 9, "slow": 21}), 0.5), (RSIStrategy({"period": 14}), 0.5)])
+    cross = ExprStrategy({"entry": "cross(ema(close, 9), sma(close, 30))", "exit": "rsi(close, 14) > 70"})
+    cases = [(stack, cached), (SMAStrategy({"fast": 5, "slow": 40}), CandleArray.from_frame(raw)), (cross, raw)]
+    for strategy, candles in cases:
+        one = signal_series(strategy, candles)
+        assert (one > 0).any() and (one < 0).any()
+        assert np.array_equal(segmented.segmented_signals(strategy, candles, workers=2, segments=5), one)
+    assert BacktestEngine(stack).run(cached, workers=3) == BacktestEngine(stack).run(cached)
+
+    # no known lookback (or a higher timeframe): one pass, no pool
+    monkeypatch.setattr("borgbot.research.pool.worker_executor", None)
+    per_bar = PerBar(SMAStrategy({"fast": 9, "slow": 21}))
+    head = raw.iloc[:700]
+    assert np.array_equal(segmented.segmented_signals(per_bar, head, workers=4), signal_series(per_bar, head))
+    trend = SMAStrategy({"fast": 9, "slow": 21, "trend_tf": "1h"})
+    assert BacktestEngine(trend).run(raw, workers=4) == BacktestEngine(trend).run(raw)
+
+
+def test_chunked_backtest_streams_the_store_and_matches_one_pass(tmp_path):
+    raw = random_candles(3000, seed=11)
+    path = str(tmp_path / "store.parquet")
+    raw.to_parquet(path, row_group_size=400)
+    start, end = "2024-01-01 02:00", "2024-01-02 20:00"
+    whole = time_range(raw, start, pd.Timestamp(end) + pd.Timedelta(minutes=1)).reset_index(drop=True)
+
+    chunks = list(iter_candles(path, start, end, chunk_rows=250))
+    assert max(len(c) for c in chunks) == 250 and sum(len(c) for c in chunks) == len(whole)
+    assert np.array_equal(np.concatenate([c["close"] for c in chunks]), whole["close"].to_numpy())
+
+    stack = lambda: StrategyStack([(SMAStrategy({"fast": 9, "slow": 21}), 0.5), (RSIStrategy({"period": 14}), 0.5)])
+    cross = lambda: ExprStrategy({"entry": "cross(ema(close, 9), sma(close, 30))", "exit": "rsi(close, 14) > 70"})
+    for make in (stack, cross):
+        for rules in ({}, {"trading_window": "03:00-18:00", "daily_max_loss_pct": 0.01}):
+            one = BacktestEngine(make(), trailing_pct=0.01, **rules).run(whole)
+            assert one["trades"] > 4
+            streamed = BacktestEngine(make(), trailing_pct=0.01, **rules).run_chunks(iter_candles(path, start, end, 37))
+            assert streamed == one
+
+    with pytest.raises(ValueError):
+        BacktestEngine(PerBar(stack())).run_chunks(iter_candles(path, chunk_rows=500))
+    with pytest.raises(ValueError):
+        BacktestEngine(stack()).run_chunks(iter_candles(path, "2030-01-01", "2030-02-01"))
+
+
+def test_stream_store_resamples_chunk_by_chunk(tmp_path, monkeypatch):
+    from borgbot.data import cache, loader
+    from borgbot.data.resample import resample
+
+    monkeypatch.setattr(cache, "DATA_DIR", str(tmp_path))
+    raw = random_candles(5000, seed=4)
+    raw.to_parquet(loader.base_path("BTC/USDT"), row_group_size=700)
+    monkeypatch.setattr(loader, "BASE_ROW_GROUP", 333)  # chunks end mid-bucket
+
+    path = loader.store_path("BTC/USDT", "1h")
+    built = pd.read_parquet(path)
+    assert built.equals(resample(raw, "1h"))
+    assert loader.derived_candles("BTC/USDT", "1h").equals(built)
+
+    with pytest.raises(FileNotFoundError):
+        loader.store_path("ETH/USDT", "1h")
@@ -0,0 +1,23 @@
+import pytest
+
+from benchmarks.cases import CASES
+from benchmarks.run import load_baselines, BASELINES
+from benchmarks.synthetic import synthetic_candles
+
+
+def test_synthetic_candles_deterministic():
+    a, b = synthetic_candles(500), synthetic_candles(500)
+    assert a.equals(b)
+    assert (a["high"] >= a[["open", "close"]].max(axis=1)).all()
+    assert (a["low"] <= a[["open", "close"]].min(axis=1)).all()
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda c: c.name)
+def test_case_runs_small(case):
+    case.run(case.setup(300))
+
+
+def test_every_case_size_has_a_baseline():
+    baselines = load_baselines(BASELINES)
+    missing = [f"{c.name}@{s}" for c in CASES for s in c.sizes if f"{c.name}@{s}" not in baselines]
+    assert not missing
@@ -0,0 +1,60 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from borgbot.backtest.engine import BacktestEngine
+from borgbot.data.candles import CandleArray, time_range
+from borgbot.data.indicator_cache import build_indicator_cache
+from borgbot.strategies.rsi import RSIStrategy
+from borgbot.strategies.sma import SMAStrategy
+
+from conftest import random_candles
+
+
+def test_round_trips_and_views(tmp_path):
+    df = random_candles(500)
+    ca = CandleArray.from_frame(df)
+    pd.testing.assert_frame_equal(ca.to_frame(), df, check_dtype=False)
+
+    ca.to_parquet(tmp_path / "c.parquet")
+    back = CandleArray.read_parquet(tmp_path / "c.parquet", dtype=np.float32)
+    assert back.dtype == np.float32 and back.nbytes < ca.nbytes * 0.6
+    assert np.array_equal(back["timestamp"], ca["timestamp"])
+
+    view = ca[100:200]
+    assert len(view) == 100 and np.shares_memory(view["close"], ca["close"])
+    assert len(time_range(ca, df["timestamp"][100], df["timestamp"][200])) == 100
+
+    # appending to a view copies it first; the parent is untouched
+    view.append(0, 1, 1, 1, 1, 1)
+    assert len(ca) == 500 and ca["close"][200] == df["close"][200]
+
+
+def test_merge_rows_is_a_growable_live_buffer():
+    live = CandleArray()
+    rows = [[i * 60_000, 1, 2, 0.5, float(i), 1] for i in range(100)]
+    live.merge_rows(rows[:60])
+    live.merge_rows([r[:4] + [-1.0, 1] for r in rows[50:60]])   # re-fetched window, last bar changed
+    assert len(live) == 60 and live["close"][-1] == -1.0 and live["close"][58] == 58.0
+
+    live.merge_rows(rows[59:], max_len=30)
+    assert len(live) <= 60 and live["timestamp"][-1] == 99 * 60_000
+    assert np.all(np.diff(live["timestamp"]) == 60_000)
+
+    state = pickle.loads(pickle.dumps(live))
+    assert len(state) == len(live) and len(state._cols["close"]) == len(live)
+
+    # trimming a view copies out of the parent's buffer instead of compacting inside it
+    parent = CandleArray.from_rows(rows)
+    before = parent["close"].copy()
+    view = parent[10:90].merge_rows([], max_len=20)
+    assert np.array_equal(parent["close"], before)
+    assert len(view) == 20 and view["close"][0] == 70.0
+
+
+def test_backtests_accept_candle_arrays():
+    df = build_indicator_cache(random_candles(800, seed=4))
+    ca = build_indicator_cache(CandleArray.from_frame(random_candles(800, seed=4)))
+    for strategy in (SMAStrategy({"fast": 9, "slow": 21}), RSIStrategy({"period": 14})):
+        assert BacktestEngine(strategy).run(ca) == BacktestEngine(strategy).run(df)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from borgbot.data.candles import CandleArray
+from borgbot.data.indicator_cache import build_indicator_cache
+from borgbot.research.walkforward_core import build_strategy
+from borgbot.strategies import expr
+from borgbot.strategies.base import signal_series
+from borgbot.strategies.expr import ExprStrategy, compile_expr
+from borgbot.strategies.rsi import RSIStrategy
+from borgbot.strategies.sma import SMAStrategy
+
+from conftest import PerBar, random_candles
+
+CROSS = "cross(sma(close, fast), sma(close, slow)) & (rsi(close, p) < os)"
+
+
+def test_compile_substitutes_params_and_folds_constants():
+    a = compile_expr(CROSS, {"fast": 9, "slow": 21, "p": 14, "os": 30})
+    b = compile_expr(CROSS, {"fast": 9, "slow": 50, "p": 14, "os": 30})
+    assert a[2][2] == b[2][2] == ("call", "sma", ("col", "close"), ("const", 9.0))
+    assert a[3] == b[3]  # the rsi test is shared too
+    assert compile_expr("close > 2 * 50 - 1") == ("op", "gt", ("col", "close"), ("const", 99.0))
+
+    for bad in ("close.real", "__import__('os')", "sma(close, n)", "close == 1", "lookahead(close)", "close >"):
+        with pytest.raises(ValueError):
+            compile_expr(bad)
+
+    # entry / exit must be conditions: a bare number would be true wherever it is nonzero or NaN
+    for entry in ("close / shift(close, 100) - 1", "sma(close, 5) & (close > 1)", "~close"):
+        with pytest.raises(ValueError):
+            ExprStrategy({"entry": entry})
+    ExprStrategy({"entry": "~(close / shift(close, 100) - 1 > 0) | valid(sma(close, 5))", "exit": "cross(close, open)"})
+
+
+def test_expressions_reproduce_the_class_strategies():
+    raw = random_candles(900, seed=3)
+    cached = build_indicator_cache(raw)
+
+    sma = ExprStrategy({"signal": "sma(close, fast) - sma(close, slow)", "fast": 9, "slow": 21})
+    assert np.array_equal(signal_series(sma, raw), signal_series(SMAStrategy({"fast": 9, "slow": 21}), raw))
+
+    rsi = ExprStrategy({
+        "entry": "(rsi(close, p) < 30) & valid(sma(close, 50))",
+        "exit": "(rsi(close, p) > 70) & valid(sma(close, 50))", "p": 14,
+    })
+    for candles in (raw, cached, CandleArray.from_frame(cached)):
+        assert np.array_equal(signal_series(rsi, candles), signal_series(RSIStrategy({"period": 14}), candles))
+
+
+def test_vectorized_matches_per_bar_and_shares_subexpressions(monkeypatch):
+    monkeypatch.setattr(expr, "CACHE", expr._Cache(2**30))
+    candles = build_indicator_cache(random_candles(700, seed=5))
+
+    configs = [
+        {"type": "expr", "entry": CROSS, "exit": "crossunder(ema(close, fast), sma(close, slow))",
+         "fast": fast, "slow": slow, "p": 14, "os": 45}
+        for fast in (5, 9) for slow in (20, 30)
+    ]
+    first = signal_series(ExprStrategy(configs[0]), candles)
+    assert (first > 0).any() and (first < 0).any()
+    assert np.array_equal(first, signal_series(PerBar(ExprStrategy(configs[0])), candles))
+
+    expr.CACHE.hits = expr.CACHE.misses = 0
+    for cfg in configs[1:]:
+        build_strategy(cfg).generate_signals(candles)
+    # ema(close, 9) and the rsi test computed once each, whatever config needs them again
+    assert expr.CACHE.hits >= 3
+
+    # a walk-forward fold is a new view; it gets its own entries
+    fold = candles.iloc[100:600]
+    assert np.array_equal(
+        signal_series(ExprStrategy(configs[0]), fold), signal_series(PerBar(ExprStrategy(configs[0])), fold),
+    )
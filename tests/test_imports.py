@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+CLIS = [
+    "borgbot.backtest.run",
+    "borgbot.research.optimizer",
+    "borgbot.research.discovery_engine",
+    "borgbot.research.stack_optimizer",
+    "borgbot.research.walkforward",
+    "borgbot.research.worker",
+    "borgbot.data.downloader",
+    "borgbot.analytics.report",
+]
+# loaded only once a CLI has parsed its arguments / built an exchange adapter
+HEAVY = ("pandas", "ccxt", "numpy", "pyarrow")
+DAEMON_DEFERRED = ("pydantic", "yaml", "pytz", "structlog")
+
+ENV = {**os.environ, "PYTHONPATH": os.path.join(os.path.dirname(__file__), "..", "src")}
+
+
+def _run(*args):
+    return subprocess.run([sys.executable, *args], env=ENV, capture_output=True, text=True, check=True).stdout
+
+
+@pytest.mark.parametrize("module", CLIS + ["borgbot.app.paper_runner"])
+def test_cli_modules_import_without_heavy_deps(module):
+    # the daemon's candle buffer needs numpy; its config, logging and tz libraries load in main()
+    heavy = HEAVY[:2] + DAEMON_DEFERRED if module == "borgbot.app.paper_runner" else HEAVY
+    out = _run("-c", f"import sys, {module}; print(sorted(m for m in {heavy!r} if m in sys.modules))")
+    assert out.strip() == "[]"
+
+
+@pytest.mark.parametrize("module", CLIS)
+def test_help_skips_heavy_deps(module):
+    # what makes --help slow is importing these; asserting on them instead of wall-clock time keeps the test deterministic
+    code = (
+        "import runpy, sys\n"
+        "sys.argv = ['x', '--help']\n"
+        "try:\n"
+        f"    runpy.run_module({module!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print(sorted(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    assert _run("-c", code).strip().splitlines()[-1] == "[]"
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from borgbot.data import cache, integrity, loader, sync
+from borgbot.data.resample import resample
+
+from conftest import random_candles
+
+MIN = 60_000
+
+
+def test_scan_finds_gaps_duplicates_and_disorder():
+    ts = np.arange(0, 3000) * MIN
+    ts = np.delete(ts, np.r_[100:110, 2000:2500])          # two gaps
+    ts = np.r_[ts[:50], ts[51], ts[50], ts[52:], ts[-1]]   # one swap + one duplicate
+    report = integrity.scan(ts, "1m")
+
+    assert report["out_of_order"] == 1 and report["duplicates"] == 1 and report["misaligned"] == 0
+    assert report["gaps"] == [[100 * MIN, 109 * MIN, 10], [2000 * MIN, 2499 * MIN, 500]]
+    assert sum(e for _, e, _ in report["days"]) - sum(a for _, _, a in report["days"]) == report["missing"] == 510
+
+    assert integrity.range_complete(report, 0, 99 * MIN) == (True, 0)
+    assert integrity.range_complete(report, 0, 2000 * MIN) == (False, 11)
+    assert integrity.refetch_plan(report, limit=200) == [
+        (100 * MIN, 10), (2000 * MIN, 200), (2200 * MIN, 200), (2400 * MIN, 100),
+    ]
+
+
+class _Exchange:
+    def __init__(self, candles, outage):
+        self.rows = [
+            [int(t.value // 1_000_000), o, h, l, c, v]
+            for t, o, h, l, c, v in candles.itertuples(index=False)
+        ]
+        self.outage = outage
+        self.calls = 0
+
+    def fetch_ohlcv(self, symbol, timeframe, since, limit):
+        self.calls += 1
+        rows = [r for r in self.rows if r[0] >= since and not self.outage[0] <= r[0] <= self.outage[1]]
+        return rows[:limit]
+
+
+def test_fill_gaps_refetches_only_missing_ranges(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "DATA_DIR", str(tmp_path))
+    candles = random_candles(2000)
+    t0 = int(candles["timestamp"].iloc[0].value // 1_000_000)
+    stored = candles.drop(index=list(range(300, 340)) + list(range(1500, 1520)))
+    loader.save_base(stored, loader.base_path("BTC/USDT"))
+
+    assert integrity.gap_index("BTC/USDT")["missing"] == 60
+    exchange = _Exchange(candles, outage=(t0 + 1500 * MIN, t0 + 1519 * MIN))
+    assert integrity.fill_gaps(exchange, "BTC/USDT") == (40, t0 + 300 * MIN)
+
+    report = integrity.gap_index("BTC/USDT")
+    assert report["missing"] == 20 and report["confirmed"] == report["gaps"]
+    calls = exchange.calls
+    assert integrity.fill_gaps(exchange, "BTC/USDT") == (0, None) and exchange.calls == calls
+
+
+def test_mid_store_fill_rebuilds_derived_caches_from_the_gap(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "DATA_DIR", str(tmp_path))
+    candles = random_candles(6000)
+    loader.save_base(candles.drop(index=range(2000, 2300)), loader.base_path("BTC/USDT"))
+    before = loader.derived_candles("BTC/USDT", "1h")
+    assert len(before) == 96
+
+    added, first = integrity.fill_gaps(_Exchange(candles, outage=(0, 0)), "BTC/USDT")
+    assert added == 300
+    sync.refresh_derived("BTC/USDT", since=first)
+
+    fresh = resample(candles, "1h")
+    assert len(fresh) == 100
+    assert cache.load_cache("BTC/USDT", "1h").equals(fresh)
+
+
+def test_sync_bootstraps_the_1m_store_from_a_legacy_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "DATA_DIR", str(tmp_path))
+    with pytest.raises(SystemExit, match="borgbot.data.downloader"):
+        sync.bootstrap("BTC/USDT")
+
+    candles = random_candles(600)
+    loader.save_base(resample(candles, "5m"), loader.base_path("BTC/USDT", "5m"))
+    requested = []
+
+    def download(symbol, timeframe, start, end):
+        requested.append((timeframe, pd.Timestamp(start)))
+        return candles
+
+    monkeypatch.setattr(sync, "download", download)
+    sync.bootstrap("BTC/USDT")
+    sync.bootstrap("BTC/USDT")  # a store exists now: nothing to do
+
+    assert requested == [("1m", candles["timestamp"].iloc[0] - pd.Timedelta(days=1))]
+    assert pd.read_parquet(loader.base_path("BTC/USDT")).equals(candles)
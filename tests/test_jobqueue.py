@@ -0,0 +1,117 @@
+import os
+import subprocess
+import sys
+
+from borgbot.research import jobqueue
+
+from conftest import random_candles
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+
+def test_lease_expiry_retry_and_failure(tmp_path):
+    conn = jobqueue.connect(str(tmp_path / "q.db"))
+    jobqueue.enqueue(conn, "exp", "backtest", [(0, {"config": {}}), (1, {"config": {}})])
+    jobqueue.enqueue(conn, "exp", "backtest", [(0, {"config": {}})])  # already queued: ignored
+    assert jobqueue.counts(conn) == {"pending": 2}
+
+    a = jobqueue.lease(conn, "a", lease_s=-1)  # expires immediately
+
+    # a's lease ran out: c takes the task over and a can no longer report it
+    c = jobqueue.lease(conn, "c", max_attempts=3)
+    assert (a["task"], c["task"], c["attempt"]) == (0, 0, 2)
+    assert not jobqueue.complete(conn, a["id"], "a", {"roi": 1})
+    assert jobqueue.extend(conn, c["id"], "c")
+    assert jobqueue.complete(conn, c["id"], "c", {"roi": 2})
+
+    b = jobqueue.lease(conn, "b")
+    assert b["task"] == 1
+    assert jobqueue.fail(conn, b["id"], "b", "boom", max_attempts=2)
+    assert jobqueue.lease(conn, "b", max_attempts=2)["attempt"] == 2
+    assert jobqueue.fail(conn, b["id"], "b", "boom again", max_attempts=2)
+    assert jobqueue.lease(conn, "b") is None
+
+    got = jobqueue.collect(conn, "exp")
+    assert [row[1:] for row in got] == [(0, "done", {"roi": 2}), (1, "failed", "boom again")]
+    jobqueue.ack(conn, [row[0] for row in got])
+    assert jobqueue.collect(conn, "exp") == []
+
+    # queueing the experiment again retries what failed
+    jobqueue.enqueue(conn, "exp", "backtest", [(1, {"config": {}})])
+    assert jobqueue.counts(conn, "exp") == {"done": 1, "pending": 1}
+
+
+def test_results_survive_a_coordinator_dying_mid_collect(tmp_path):
+    conn = jobqueue.connect(str(tmp_path / "q.db"))
+    jobqueue.enqueue(conn, "exp", "backtest", [(t, {}) for t in range(4)])
+    for t in range(4):
+        job = jobqueue.lease(conn, "w")
+        jobqueue.complete(conn, job["id"], "w", {"task": t})
+
+    stored = {}
+
+    def crash_on_third(task, status, value):
+        if len(stored) == 2:
+            raise KeyboardInterrupt
+        stored[task] = value
+
+    try:
+        jobqueue.drain(conn, "exp", crash_on_third, poll_s=0)
+    except KeyboardInterrupt:
+        pass
+    assert sorted(stored) == [0, 1]
+
+    # --resume queues what the research DB still lists as pending; the rest is delivered again
+    jobqueue.enqueue(conn, "exp", "backtest", [(t, {}) for t in (2, 3)])
+    jobqueue.drain(conn, "exp", lambda task, status, value: stored.setdefault(task, value), poll_s=0)
+    assert stored == {t: {"task": t} for t in range(4)}
+
+    # even results acknowledged by an older coordinator come back for tasks still pending
+    conn.execute("UPDATE job_queue SET collected=1")
+    jobqueue.enqueue(conn, "exp", "backtest", [(3, {})])
+    assert [row[1] for row in jobqueue.collect(conn, "exp")] == [3]
+
+
+def _write_store(data_dir, n=30_000):
+    from borgbot.data.loader import base_path, save_base
+
+    save_base(random_candles(n, seed=7, vol=0.002, spread=0.001), base_path("BTC/USDT", "1m"))
+
+
+def test_workers_drain_a_sweep(tmp_path, monkeypatch):
+    from borgbot.data import cache
+
+    monkeypatch.setattr(cache, "DATA_DIR", str(tmp_path))
+    _write_store(tmp_path)
+
+    db = str(tmp_path / "q.db")
+    conn = jobqueue.connect(db)
+    dataset = {"symbol": "BTC/USDT", "timeframe": "5m", "start": "2024-01-01", "end": "2024-01-21"}
+    folds = [["2024-01-01", "2024-01-08"], ["2024-01-08", "2024-01-15"], ["2024-01-15", "2024-01-21"]]
+    tasks = [
+        (i, {"config": {"type": "sma", "fast": fast, "slow": 21}, "dataset": dataset, "fold": fold})
+        for i, (fast, fold) in enumerate((f, fold) for f in (5, 7, 9) for fold in folds)
+    ]
+    tasks.append((99, {"config": {"type": "sma", "fast": 5, "slow": 21}, "dataset": {**dataset, "symbol": "NOPE/USDT"}}))
+    jobqueue.enqueue(conn, "exp", "backtest", tasks)
+
+    env = {**os.environ, "PYTHONPATH": SRC, "DATA_DIR": str(tmp_path), "MAX_ATTEMPTS": "2"}
+    cmd = [sys.executable, "-m", "borgbot.research.worker", "--db", db, "--poll", "0.05", "--idle_exit", "0.5"]
+    workers = [subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL) for _ in range(3)]
+
+    got = {}
+    jobqueue.drain(conn, "exp", lambda task, status, value: got.setdefault(task, (status, value)), poll_s=0.05)
+    for w in workers:
+        assert w.wait(timeout=60) == 0
+
+    assert got.pop(99)[0] == "failed"
+    assert sorted(got) == list(range(9)) and all(status == "done" for status, _ in got.values())
+
+    from borgbot.data.candles import time_range
+    from borgbot.data.indicator_cache import build_indicator_cache
+    from borgbot.data.loader import RESEARCH_DTYPE, load_candles
+    from borgbot.research.walkforward_core import run_backtest
+
+    candles = build_indicator_cache(load_candles("BTC/USDT", "5m", dataset["start"], dataset["end"], dtype=RESEARCH_DTYPE))
+    for task, payload in tasks[:-1]:
+        assert got[task][1] == run_backtest(payload["config"], time_range(candles, *payload["fold"]))
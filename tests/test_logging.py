@@ -0,0 +1,39 @@
+import json
+import logging
+
+import structlog
+
+from borgbot.infra import logging as borg_logging
+
+
+def test_throttle_samples_and_reports_suppressed():
+    now = [0.0]
+    throttle = borg_logging.EventThrottle(sample={"paper.skip_*": 2}, rate_limit={"risk.pause": 60}, clock=lambda: now[0])
+
+    def kept(event, method="info"):
+        try:
+            return throttle(None, method, {"event": event})
+        except structlog.DropEvent:
+            return None
+
+    assert [kept("paper.skip_no_cash") is not None for _ in range(4)] == [True, False, True, False]
+    assert kept("risk.pause") == {"event": "risk.pause"}
+    assert kept("risk.pause") is None
+    assert kept("risk.pause", "error") is not None
+    now[0] = 61.0
+    assert kept("risk.pause") == {"event": "risk.pause", "suppressed": 1}
+
+
+def test_queued_lines_are_written_on_shutdown(tmp_path, monkeypatch):
+    path = tmp_path / "borg.jsonl"
+    monkeypatch.setattr(borg_logging, "LOG_PATH", str(path))
+    log = borg_logging.configure_logging(run_id="abc")
+    for i in range(500):
+        log.info("tick", i=i)
+    borg_logging.shutdown_logging()
+    structlog.reset_defaults()
+    logging.getLogger().handlers = []
+
+    lines = [json.loads(l) for l in path.read_text().splitlines()]
+    assert len(lines) == 500
+    assert lines[-1]["i"] == 499 and lines[-1]["run_id"] == "abc" and lines[-1]["level"] == "info"
@@ -0,0 +1,50 @@
+import threading
+
+from borgbot.infra.metrics import Histogram, Metrics
+
+
+def test_histogram_quantiles_and_prometheus_text():
+    h = Histogram(buckets=(0.001, 0.01, 0.1))
+    for v in [0.0005] * 50 + [0.005] * 49 + [0.05]:
+        h.observe(v)
+    assert h.quantile(0.5) == 0.001
+    assert 0.01 < h.quantile(0.995) <= 0.1
+
+    m = Metrics("btcusdt_1m")
+    with m.time("signal"):
+        pass
+    m.inc("orders_skipped", reason="no_cash")
+    text = m.render_prometheus()
+    assert 'borg_stage_seconds_count{bot="btcusdt_1m",stage="signal"} 1' in text
+    assert 'borg_orders_skipped_total{bot="btcusdt_1m",reason="no_cash"} 1' in text
+
+    assert m.stats()["stages"]["signal"]["n"] == 1
+    assert m.stats()["stages"] == {}
+    assert m.stats()["counters"] == {"orders_skipped.no_cash": 1}
+
+
+def test_render_while_runner_adds_keys():
+    m = Metrics("btcusdt_1m")
+    stop = threading.Event()
+    errors = []
+
+    def scrape():
+        while not stop.is_set():
+            try:
+                m.render_prometheus()
+                m.stats()
+            except RuntimeError as e:  # dictionary changed size during iteration
+                errors.append(e)
+                return
+
+    t = threading.Thread(target=scrape)
+    t.start()
+    try:
+        for i in range(20000):
+            m.observe(f"stage{i}", 0.001)
+            m.inc("orders", symbol=f"s{i}")
+    finally:
+        stop.set()
+        t.join()
+    assert errors == []
+    assert m.render_prometheus().count("borg_stage_seconds_count") == 20000
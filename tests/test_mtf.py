@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from borgbot.backtest.engine import BacktestEngine
+from borgbot.data.mtf import MultiTimeframe
+from borgbot.data.resample import resample
+from borgbot.strategies.base import signal_series
+from borgbot.strategies.sma import SMAStrategy
+
+from conftest import PerBar, random_candles
+
+
+def test_resample_matches_pandas():
+    candles = random_candles(1000)
+    candles["high"] += np.arange(1000) % 7
+    ours = resample(candles, "1h")
+    ref = candles.set_index("timestamp").resample("1h").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    ).reset_index()
+    pd.testing.assert_frame_equal(ours, ref, check_dtype=False, check_freq=False)
+
+
+def test_incremental_update_matches_batch_without_lookahead():
+    candles = random_candles(6000)
+    spec = {"1h": ["sma_20", "rsi_14"], "4h": ["atr_3"]}
+    batch = MultiTimeframe(spec).update(candles)
+
+    live = MultiTimeframe(spec, base_timeframe="1m")
+    for lo in range(0, 6000, 97):
+        live.update(candles.iloc[max(0, lo - 5):lo + 97])  # overlapping windows like the runner's fetch
+    for tf, name in (("1h", "sma_20"), ("1h", "rsi_14"), ("4h", "atr_3"), ("1h", "close")):
+        assert np.allclose(batch.aligned(tf, name), live.aligned(tf, name), equal_nan=True, rtol=1e-12)
+
+    # changing bars from 2500 on can't change what bars up to 2500 saw
+    future = candles.copy()
+    future.loc[2500:, ["open", "high", "low", "close"]] *= 2
+    other = MultiTimeframe(spec).update(future)
+    sma = batch.aligned("1h", "sma_20")
+    assert np.array_equal(sma[:2501], other.aligned("1h", "sma_20")[:2501], equal_nan=True)
+    assert not np.array_equal(sma[2501:], other.aligned("1h", "sma_20")[2501:], equal_nan=True)
+
+    # 6000 minutes = 100 hours: the last bar sees hour 98, the live loop (after it closes) hour 99
+    t0 = int(pd.Timestamp("2024-01-01").value // 1_000_000)
+    assert batch.at(5999)["1h"]["timestamp"] == t0 + 98 * 3_600_000
+    assert live.latest()["1h"]["timestamp"] == t0 + 99 * 3_600_000
+    assert live.latest()["1h"]["close"] == candles["close"].iloc[-1]
+
+
+def test_trend_filter_vectorized_matches_per_bar():
+    candles = random_candles(3000, seed=3)
+    sma = SMAStrategy({"fast": 9, "slow": 21, "trend_tf": "1h", "trend_sma": 5})
+    mtf = MultiTimeframe(sma.higher_tf).update(candles)
+
+    vec = signal_series(sma, candles, higher_tf=mtf)
+    assert np.array_equal(vec, signal_series(PerBar(sma), candles, higher_tf=mtf))
+    assert (vec > 0).sum() < (signal_series(SMAStrategy({"fast": 9, "slow": 21}), candles) > 0).sum()
+    assert BacktestEngine(sma).run(candles) == BacktestEngine(PerBar(sma), higher_tf=sma.higher_tf).run(candles)
+
+
+def test_load_data_derives_higher_timeframes_from_1m(tmp_path, monkeypatch):
+    from borgbot.data import cache, loader
+
+    monkeypatch.setattr(cache, "DATA_DIR", str(tmp_path))
+    candles = random_candles(3000)
+    candles.iloc[:2000].to_parquet(loader.base_path("BTC/USDT"))
+
+    first = loader.load_data("BTC/USDT", "1h", "2024-01-01", "2024-02-01")
+    pd.testing.assert_frame_equal(first, resample(candles.iloc[:2000], "1h"), check_dtype=False)
+    assert cache.has_cache("BTC/USDT", "1h")
+
+    # sync appended to the base store: the cached partial last hour is rebuilt, the rest reused
+    candles.to_parquet(loader.base_path("BTC/USDT"))
+    second = loader.load_data("BTC/USDT", "1h", "2024-01-01", "2024-02-01")
+    pd.testing.assert_frame_equal(second, resample(candles, "1h"), check_dtype=False)
@@ -0,0 +1,57 @@
+import json
+import sqlite3
+
+from borgbot.research import profiling
+from borgbot.research.stack_optimizer import run_backtest
+from borgbot.strategies.rsi import RSIStrategy
+from borgbot.strategies.sma import SMAStrategy
+
+from conftest import random_candles
+
+
+def _candles(n=400):
+    return random_candles(n, seed=1, vol=0.01, spread=0.01)
+
+
+def test_classify_first_matching_stage_wins():
+    path = ["engine.py:run", "strategies/rsi.py:generate_signal", "borgbot/indicators/rsi.py:rsi"]
+    assert profiling.classify(path) == "indicators"
+    assert profiling.classify(path[:2] + ["pandas/core/indexing.py:__getitem__"]) == "slicing"
+    assert profiling.classify(path[:2]) == "signals"
+    assert profiling.classify(["engine.py:run_signals"]) == "backtest"
+
+
+def test_profiled_tasks_aggregate_and_save(tmp_path):
+    profiling._calls.clear()
+    candles = _candles()
+    prof = profiling.Profile("stack_optimizer", every=2)
+    task = prof.wrap(run_backtest)
+
+    results = prof.unwrap(task(combo, candles) for combo in [(SMAStrategy({"fast": 5, "slow": 20}),), (RSIStrategy({}),)] * 2)
+    with prof.stage("db"):
+        pass
+
+    assert [r["strategies"] for r in results] == ["SMAStrategy", "RSIStrategy"] * 2
+    assert prof.tasks["RSIStrategy"]["tasks"] == 2
+    assert sum(t["sampled"] for t in prof.tasks.values()) == 2
+
+    rows = prof.summary()
+    rsi = {r["stage"]: r for r in rows if r["key"] == "RSIStrategy"}
+    assert abs(sum(r["share"] for r in rsi.values()) - 1) < 1e-9
+    assert "indicators" in rsi and "slicing" in rsi
+    assert any(r["key"] == "(main)" and r["stage"] == "db" for r in rows)
+
+    db = str(tmp_path / "research.db")
+    prof.save("abc", db)
+    summary, collapsed = sqlite3.connect(db).execute("SELECT summary, collapsed FROM profiles").fetchone()
+    assert json.loads(summary) == json.loads(json.dumps(rows))
+    line = collapsed.splitlines()[0]
+    assert ";" in line and line.rsplit(" ", 1)[1].isdigit()
+
+
+def test_disabled_profile_is_transparent():
+    prof = profiling.from_args(type("Args", (), {"profile": False})(), "optimizer")
+    assert prof.wrap(len) is len
+    assert prof.unwrap([1, 2]) == [1, 2]
+    with prof.stage("load"):
+        pass
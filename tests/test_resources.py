@@ -0,0 +1,64 @@
+import numpy as np
+
+from borgbot.research import resources
+from borgbot.research.pool import worker_executor
+
+
+def _cgroup(tmp_path, cpu_max="max 100000", memory_max="max", memory_current="0"):
+    (tmp_path / "cpu.max").write_text(cpu_max + "\n")
+    (tmp_path / "memory.max").write_text(memory_max + "\n")
+    (tmp_path / "memory.current").write_text(memory_current + "\n")
+    return str(tmp_path)
+
+
+def _square(x):
+    return x * x
+
+
+def test_cgroup_quota_caps_cpus_and_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(resources.os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    root = _cgroup(tmp_path, cpu_max="150000 100000", memory_max=str(2 * 2**30), memory_current=str(2**29))
+
+    assert resources.cpu_limit(root) == 2  # 1.5 CPUs of quota rounds up
+    assert resources.memory_limit(root) == 2 * 2**30
+    assert resources.memory_used(root) == 2**29
+
+    unlimited = tmp_path / "unlimited"
+    unlimited.mkdir()
+    assert resources.cpu_limit(_cgroup(unlimited)) == 8
+
+
+def test_plan_is_bounded_by_memory_and_tasks(tmp_path, monkeypatch):
+    monkeypatch.setattr(resources.os, "sched_getaffinity", lambda pid: set(range(16)), raising=False)
+    monkeypatch.setattr(resources, "WORKER_BASE_MB", 100.0)
+    root = _cgroup(tmp_path, memory_max=str(1 * 2**30))
+
+    big = np.zeros(8_000_000)  # 64 MB a worker has to hold on top of its base
+    p = resources.plan("max", big, n_tasks=1000, root=root)
+    assert p.cpus == 16
+    assert p.reason == "memory bound"
+    assert p.workers * p.per_worker <= 2**30
+    assert 1 <= p.chunksize <= resources.MAX_CHUNK
+
+    assert resources.plan("max", None, n_tasks=3, root=root).workers == 3
+    assert resources.plan("low", None, n_tasks=1000, root=root).workers == 1
+    assert resources.plan("low", None, n_tasks=1000, explicit=4, root=root).workers == 4
+
+
+def test_memory_guard_throttles_and_recovers(tmp_path, monkeypatch):
+    root = _cgroup(tmp_path, memory_max="1000")
+    guard = resources.MemoryGuard(4, root=root)
+
+    monkeypatch.setattr(resources, "memory_used", lambda root=None: 950)
+    assert [guard.check() for _ in range(5)] == [3, 2, 1, 1, 1]
+
+    monkeypatch.setattr(resources, "memory_used", lambda root=None: 100)
+    assert [guard.check() for _ in range(4)] == [2, 3, 4, 4]
+
+
+def test_run_adaptive_yields_every_result_with_its_index():
+    p = resources.Plan(2, 3, 2, 2**30, 0, "test")
+    items = list(range(20))
+    with worker_executor(2) as executor:
+        out = dict(resources.run_adaptive(executor, _square, items, p))
+    assert out == {i: i * i for i in items}
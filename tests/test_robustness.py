@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from borgbot.research import robustness
+from borgbot.research.selector import select_strategies
+
+
+def test_trade_returns_pairs_round_trips_net_of_fees():
+    trades = [("buy", 100.0), ("sell", 110.0), ("buy", 110.0), ("trailing_stop", 99.0), ("buy", 90.0)]
+    r = robustness.trade_returns(trades, fees_bps=10.0)
+
+    fee = 0.001
+    assert r == pytest.approx([1.1 * (1 - fee) / (1 + fee) - 1, 0.9 * (1 - fee) / (1 + fee) - 1])
+    assert len(robustness.trade_returns([], 10.0)) == 0
+
+
+def _reference(returns, order):
+    equity = np.cumprod(1 + returns[order])
+    peak = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    return (equity[-1] - 1) * 100, (1 - equity / peak).max()
+
+
+@pytest.mark.parametrize("method", robustness.METHODS)
+def test_simulations_match_a_plain_equity_curve(method):
+    returns = np.random.default_rng(3).normal(0.001, 0.03, 200)
+    roi, dd = robustness.simulate(returns, sims=50, method=method, block=7, seed=11)
+
+    draws = np.array(list(robustness._draws(np.random.default_rng(11), method, 200, 50, 7))).T
+    for k in range(50):
+        ref_roi, ref_dd = _reference(returns, draws[k])
+        assert roi[k] == pytest.approx(ref_roi)
+        assert dd[k] == pytest.approx(ref_dd)
+
+    if method == "shuffle":
+        assert all(sorted(d) == list(range(200)) for d in draws)
+        assert np.ptp(roi) == pytest.approx(0.0, abs=1e-9)  # order never changes the product
+
+
+def test_confidence_brackets_the_typical_outcome():
+    returns = np.random.default_rng(5).normal(0.002, 0.02, 500)
+    mc = robustness.confidence(returns, sims=2000, method="bootstrap", level=0.9, seed=1)
+
+    assert mc["mc_roi_lo"] < mc["mc_roi_median"] < mc["mc_roi_hi"]
+    assert 0 < mc["mc_dd_median"] < mc["mc_dd_hi"] < 1
+    assert 0 <= mc["mc_p_loss"] < 0.5
+    assert mc == robustness.confidence(returns, sims=2000, method="bootstrap", level=0.9, seed=1)
+    assert robustness.confidence([0.01], sims=100) is None
+
+
+def test_select_strategies_drops_likely_losers():
+    base = {"roi": 5.0, "roi_std": 2.0, "drawdown": 0.1, "score": 1.0}
+    steady = {**base, "config": "steady", "mc_p_loss": 0.05}
+    fragile = {**base, "config": "fragile", "mc_p_loss": 0.45}
+    unchecked = {**base, "config": "unchecked"}
+
+    assert [r["config"] for r in select_strategies([steady, fragile, unchecked])] == ["steady", "unchecked"]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from borgbot.research import stability
+from borgbot.research.selector import select_strategies
+
+
+def test_box_sum_matches_a_direct_window_sum():
+    a = np.random.default_rng(0).normal(size=(4, 5, 3))
+    got = stability.box_sum(a, 1)
+
+    padded = np.pad(a, 1)
+    for i, j, k in np.ndindex(a.shape):
+        assert np.isclose(got[i, j, k], padded[i: i + 3, j: j + 3, k: k + 3].sum())
+
+
+def test_lucky_spike_among_bad_neighbors_loses_to_a_plateau():
+    results = []
+    for fast in range(5, 10):
+        for slow in range(20, 25):
+            # a broad plateau around (6, 21) and a lone spike at (9, 24)
+            score = 10.0 if fast <= 7 and slow <= 22 else -5.0
+            if (fast, slow) == (9, 24):
+                score = 30.0
+            results.append({"config": {"type": "sma", "fast": fast, "slow": slow}, "score": score})
+    results.append({"config": {"type": "rsi", "period": 14}, "score": 3.0})
+
+    cubes = stability.annotate(results)
+    by_cfg = {(r["config"]["type"], r["config"].get("fast"), r["config"].get("slow")): r for r in results}
+
+    spike, plateau = by_cfg[("sma", 9, 24)], by_cfg[("sma", 6, 21)]
+    assert spike["score"] > plateau["score"]
+    assert spike["stable_score"] < plateau["stable_score"]
+    assert spike["neighbor_score"] == -5.0 and spike["neighbors"] == 3
+    assert plateau["neighbor_score"] == 10.0 and plateau["neighbors"] == 8
+
+    lone = by_cfg[("rsi", None, None)]
+    assert lone["neighbor_score"] is None and lone["stable_score"] == 3.0
+    assert set(cubes) == {"sma", "rsi"}
+
+    base = {"roi": 5.0, "roi_std": 2.0, "drawdown": 0.1}
+    picked = select_strategies([{**base, **r} for r in (spike, plateau, lone)])
+    assert [r["config"] for r in picked] == [plateau["config"], lone["config"]]
+
+
+def test_heatmaps_project_each_parameter_pair(tmp_path):
+    results = [
+        {"config": {"type": "rsi", "period": p, "overbought": ob, "oversold": 30}, "score": float(p + ob)}
+        for p in (10, 11) for ob in (65, 70, 75)
+    ]
+    paths = stability.write_heatmaps(stability.annotate(results, radius=0), "exp1", str(tmp_path))
+
+    assert sorted(p.rsplit("/", 1)[-1] for p in paths if p.endswith(".csv")) == [
+        "exp1_rsi_overbought_oversold.csv", "exp1_rsi_period_overbought.csv", "exp1_rsi_period_oversold.csv",
+    ]
+    lines = (tmp_path / "exp1_rsi_period_overbought.csv").read_text().splitlines()
+    assert lines[0] == "period\\overbought,65,70,75"
+    assert lines[2] == "11,76.0000,81.0000,86.0000"
+
+
+def test_heatmap_pngs_when_matplotlib_is_installed(tmp_path):
+    pytest.importorskip("matplotlib")
+    results = [{"config": {"type": "sma", "fast": f, "slow": s}, "score": float(f - s)} for f in (5, 6) for s in (20, 30)]
+    paths = stability.write_heatmaps(stability.annotate(results), "exp2", str(tmp_path))
+    assert (tmp_path / "exp2_sma_fast_slow.png").stat().st_size > 0 and len(paths) == 2
@@ -0,0 +1,40 @@
+import numpy as np
+
+from borgbot.research.stack_optimizer import run_backtest, run_weights, stack_label, weight_blocks, weight_grid
+from borgbot.strategies.rsi import RSIStrategy
+from borgbot.strategies.sma import SMAStrategy
+from borgbot.strategies.stack import StrategyStack, signal_matrix
+
+from conftest import random_candles
+
+
+def _candles(n=1500, seed=5):
+    return random_candles(n, seed, vol=0.004)
+
+
+def test_weight_grid_covers_subsets_once():
+    assert weight_grid(2) == [(0.0, 1.0), (1.0, 0.0), (1.0, 1.0)]
+    assert len(weight_grid(3)) == 7
+    grid = weight_grid(2, (1.0, 2.0))
+    assert (2.0, 2.0) not in grid and (1.0, 2.0) in grid and len(grid) == 5
+    assert stack_label(["A", "B"], (1.0, 1.0)) == "A,B"
+    assert stack_label(["A", "B"], (0.0, 2.0)) == "B"
+    assert stack_label(["A", "B"], (1.0, 2.0)) == "A*1,B*2"
+
+
+def test_signal_matrix_stacks_match_full_backtests():
+    candles = _candles()
+    members = [SMAStrategy({"fast": 9, "slow": 21}), RSIStrategy({"period": 14}), SMAStrategy({"fast": 20, "slow": 50})]
+    signals = signal_matrix(members, candles)
+    closes = candles["close"].to_numpy()
+
+    grid = weight_grid(len(members), (1.0, 2.0))
+    results = [r for block in weight_blocks(grid, len(closes), 2) for r in run_weights(block, signals, closes)]
+    assert len(results) == len(grid)
+
+    for w, r in zip(grid, results):
+        stack = StrategyStack([(m, wi) for m, wi in zip(members, w) if wi])
+        assert np.array_equal(np.sign(stack.generate_signals(candles)), np.sign(signals @ np.asarray(w)))
+        if len(set(x for x in w if x)) == 1:
+            subset = [m for m, wi in zip(members, w) if wi]
+            assert r["roi"] == run_backtest(subset, candles)["roi"]
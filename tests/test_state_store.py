@@ -0,0 +1,120 @@
+import sqlite3
+
+import pytest
+
+from borgbot.state.store import adopt_legacy_db, connect, get_snapshots, merge_db, trade_summary, StateStore
+from borgbot.execution.paper import PaperExecutionAdapter
+
+
+class _Log:
+    def info(self, *a, **kw): pass
+
+
+def test_fills_are_buffered_until_flush(tmp_path):
+    path = str(tmp_path / "bot.db")
+    state = StateStore(connect(path), bot="btc")
+    state.set_position(0.0, 1000.0, 0.0)
+    PaperExecutionAdapter(state, _Log(), fees_bps=10, slippage_pct=0.0).execute_order("buy", 1.0, 100.0)
+    state.set_last_candle_ts(60_000)
+
+    other = connect(path)
+    assert other.execute("SELECT COUNT(*) FROM trades").fetchone() == (0,)
+
+    assert state.flush()
+    assert not state.flush()
+    assert other.execute("SELECT COUNT(*) FROM trades").fetchone() == (1,)
+
+    reopened = StateStore(connect(path), bot="btc")
+    assert reopened.get_position() == state.get_position()
+    assert reopened.last_candle_ts == 60_000
+
+
+class _FailOnce:
+    """Connection whose first trade insert fails, like a locked or full disk mid-flush."""
+
+    def __init__(self, conn):
+        self.conn, self.failed = conn, False
+
+    def executemany(self, sql, rows):
+        if not self.failed:
+            self.failed = True
+            raise sqlite3.OperationalError("disk I/O error")
+        return self.conn.executemany(sql, rows)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def test_failed_flush_is_discarded_before_the_candle_is_retried(tmp_path):
+    path = str(tmp_path / "bot.db")
+    state = StateStore(connect(path), bot="btc")
+    state.set_position(0.0, 1000.0, 0.0)
+    state.flush()
+    state.conn = _FailOnce(state.conn)
+    paper = PaperExecutionAdapter(state, _Log(), fees_bps=0, slippage_pct=0.0)
+
+    for attempt in range(2):  # the runner's loop: same candle until it commits
+        try:
+            paper.execute_order("buy", 1.0, 100.0)
+            state.set_last_candle_ts(60_000)
+            state.flush()
+            break
+        except sqlite3.OperationalError:
+            state.discard()
+    assert attempt == 1
+
+    other = connect(path)
+    assert other.execute("SELECT COUNT(*) FROM trades").fetchone() == (1,)
+    assert StateStore(other, bot="btc").get_position() == state.get_position() == (1.0, 900.0, 100.0)
+    assert state.trade_count == 1
+
+
+def _legacy_db(legacy):
+    old = sqlite3.connect(legacy)
+    old.execute("CREATE TABLE kv (k TEXT PRIMARY KEY, v TEXT)")
+    old.execute("CREATE TABLE position (id INTEGER PRIMARY KEY CHECK (id=1), base_qty REAL, cash REAL, avg_price REAL)")
+    old.execute("CREATE TABLE trades (id INTEGER PRIMARY KEY AUTOINCREMENT, ts INTEGER, side TEXT, qty REAL, price REAL, fee REAL, cash_after REAL, base_after REAL)")
+    old.execute("INSERT INTO position VALUES (1, 1.0, 899.9, 100.0)")
+    old.execute("INSERT INTO trades(ts, side, qty, price, fee, cash_after, base_after) VALUES (1, 'buy', 1.0, 100.0, 0.1, 899.9, 1.0)")
+    old.execute("INSERT INTO kv VALUES ('last_candle_ts', '60000')")
+    old.commit(); old.close()
+
+
+def test_bots_share_one_db_and_legacy_files_merge(tmp_path):
+    legacy = str(tmp_path / "btcusdt_1m.db")
+    _legacy_db(legacy)
+
+    conn = connect(str(tmp_path / "borg.db"))
+    assert merge_db(conn, legacy) == ["btcusdt_1m"]
+    with pytest.raises(ValueError):
+        merge_db(conn, legacy)  # the bot is already there: nothing is half-merged
+
+    eth = StateStore(conn, bot="ethusdt_1h")
+    eth.set_position(0.0, 500.0, 0.0); eth.set_starting_cash(500.0)
+    eth.mark_price(2000.0, 120_000)
+    eth.flush()
+
+    btc = StateStore(conn, bot="btcusdt_1m")
+    assert btc.get_position() == (1.0, 899.9, 100.0)
+    assert btc.starting_cash == 1000.0 and btc.last_candle_ts == 60000
+    btc.mark_price(110.0, 120_000)
+    btc.flush()
+
+    assert trade_summary(conn) == {"btcusdt_1m": (1, 1)}
+    snaps = {s["bot"]: s for s in get_snapshots(conn)}
+    assert round(snaps["btcusdt_1m"]["pnl"], 6) == 9.9
+    assert snaps["ethusdt_1h"]["roi_pct"] == 0.0
+
+
+def test_bot_adopts_its_legacy_file_on_first_start(tmp_path):
+    shared = str(tmp_path / "borg.db")
+    _legacy_db(str(tmp_path / "btcusdt_1m.db"))
+
+    conn = connect(shared, bot="btcusdt_1m")
+    assert adopt_legacy_db(conn, bot="btcusdt_1m", path=shared) == str(tmp_path / "btcusdt_1m.db")
+    assert StateStore(conn, bot="btcusdt_1m").get_position() == (1.0, 899.9, 100.0)
+
+    # later starts (and bots without a legacy file) leave the shared db alone
+    assert adopt_legacy_db(conn, bot="btcusdt_1m", path=shared) is None
+    assert adopt_legacy_db(conn, bot="ethusdt_1h", path=shared) is None
+    assert trade_summary(conn) == {"btcusdt_1m": (1, 1)}
@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from borgbot.research import discovery_engine, store
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "research.db")
+    monkeypatch.setattr(store, "DB_PATH", path)
+    store.init_db()
+    return path
+
+
+def test_optimizer_tasks_resume_where_they_stopped(db):
+    combos = [{"fast": f, "slow": 20} for f in range(5, 10)]
+    exp_id = store.create_experiment("BTC/USDT", "1h", "sma")
+    store.create_job(exp_id, "optimizer", {"symbol": "BTC/USDT", "tf": "1h"}, combos)
+
+    for task, combo in store.pending_tasks(exp_id)[:2]:
+        r = {**combo, "roi": 1.0, "drawdown": 0.5, "trades": 3, "score": float(task)}
+        store.insert_task_result(exp_id, task, r)
+
+    # a restart sees only what never committed, with the stored job arguments
+    tool, args, completed = store.load_job(exp_id)
+    assert (tool, args["tf"], completed) == ("optimizer", "1h", None)
+    assert [c for _, c in store.pending_tasks(exp_id)] == combos[2:]
+    assert [r["fast"] for r in store.task_results(exp_id)] == [5, 6]
+
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM results WHERE experiment_id=?", (exp_id,)).fetchone()[0] == 2
+
+    store.complete_job(exp_id)
+    assert store.load_job(exp_id)[2] is not None
+    assert store.load_job(12345) is None
+
+
+def test_discovery_results_commit_with_their_task(db):
+    configs = [{"type": "rsi", "period": p} for p in (10, 11, 12)]
+    store.create_job("abcd1234", "discovery", {"symbol": "BTC/USDT", "tf": "1h"}, configs)
+
+    r = {"config": configs[0], "roi": 2.0, "drawdown": 0.1, "score": 7.0, "roi_std": 0.5}
+    discovery_engine.save_result("abcd1234", "t0", "BTC/USDT", "1h", 0, r)
+    # too unstable to rank: kept for the stability cube, not in discovery_results
+    unstable = {**r, "config": configs[1], "score": -3.0, "roi_std": 14.0, "filtered": "roi_std"}
+    discovery_engine.save_result("abcd1234", "t0", "BTC/USDT", "1h", 1, unstable)
+    discovery_engine.save_result("abcd1234", "t0", "BTC/USDT", "1h", 2, None)  # no fold fits the data
+
+    assert store.pending_tasks("abcd1234") == []
+    assert store.task_results("abcd1234") == [r, unstable, None]
+
+    rows = sqlite3.connect(db).execute("SELECT config, score, roi_std FROM discovery_results").fetchall()
+    assert rows == [(str(configs[0]), 7.0, 0.5)]